@@ -0,0 +1,34 @@
+"""
+Startup Paths
+Makes the crawler package (crawler/crawler: FAISS shards, embedding models,
+language helpers) importable from the API. Called once by every entry point
+(main.py, standalone jobs) before anything imports crawler.*
+"""
+
+import os
+import sys
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+# Directory holding the crawler package, i.e. crawler/ (which contains crawler/crawler)
+CRAWLER_DIR = os.path.abspath(os.path.join(API_DIR, "..", "crawler"))
+
+
+def configure_paths():
+    """
+    Put the api and crawler directories first on sys.path
+
+    Started from the repository root, the outer crawler/ directory (the
+    Scrapy project) would otherwise be found as the 'crawler' package before
+    crawler/crawler, and 'crawler.ai' would not resolve.
+    """
+    for path in (API_DIR, CRAWLER_DIR):
+        if path in sys.path:
+            sys.path.remove(path)
+    sys.path.insert(0, API_DIR)
+    sys.path.insert(0, CRAWLER_DIR)
+
+    # Drop an outer crawler package imported before the paths were fixed
+    crawler = sys.modules.get("crawler")
+    if crawler is not None and os.path.join(CRAWLER_DIR, "crawler") not in list(getattr(crawler, "__path__", [])):
+        for name in [name for name in sys.modules if name == "crawler" or name.startswith("crawler.")]:
+            del sys.modules[name]
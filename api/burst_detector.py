@@ -0,0 +1,208 @@
+"""
+Burst Detection
+Streaming EWMA baseline of the hourly item count of every dark-web term,
+wallet and category (burst_state); an hour whose count runs far above its
+baseline is recorded in trend_anomalies while it is still being counted
+"""
+
+import logging
+import math
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import desc, select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+
+from entity_index import normalize_entity
+from models_sql import BurstState, TrendAnomaly, TrendBucket
+
+logger = logging.getLogger(__name__)
+
+# EWMA weight of each closed hour (0.05: the baseline spans roughly the last day)
+ALPHA = float(os.getenv("BURST_ALPHA", "0.05"))
+# Standard deviations above the baseline that make an hour a burst
+Z_THRESHOLD = float(os.getenv("BURST_Z_THRESHOLD", "4"))
+# Fewer items than this in an hour are never a burst (rare keys are noisy)
+MIN_COUNT = int(os.getenv("BURST_MIN_COUNT", "5"))
+# Floor of the deviation, so a flat baseline does not turn +1 into a burst
+MIN_STD = 1.0
+# Empty hours folded into a baseline before it is treated as fully decayed
+MAX_GAP_HOURS = 168
+
+DIMENSIONS = ("term", "wallet", "category")
+HOUR = timedelta(hours=1)
+
+
+def _hour(timestamp):
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def _fold(mean, var, value):
+    """One EWMA step of mean and variance"""
+    diff = value - mean
+    incr = ALPHA * diff
+    return mean + incr, (1 - ALPHA) * (var + diff * incr)
+
+
+def _step(state, bucket, n=1):
+    """
+    Count n items of one key in hour bucket, closing the hours counted before
+
+    Returns:
+        False for a late item (hour already closed), True otherwise
+    """
+    current = state["bucket_start"]
+    if current is not None and bucket < current:
+        return False
+    if bucket != current:
+        if current is not None:
+            state["mean"], state["var"] = _fold(state["mean"], state["var"], state["count"])
+            gap = int((bucket - current) / HOUR) - 1
+            if gap >= MAX_GAP_HOURS:
+                state["mean"], state["var"] = 0.0, 0.0
+            else:
+                for _ in range(gap):
+                    state["mean"], state["var"] = _fold(state["mean"], state["var"], 0)
+        state["bucket_start"], state["count"] = bucket, 0
+    state["count"] += n
+    return True
+
+
+def zscore(count, mean, var):
+    return (count - mean) / max(math.sqrt(max(var, 0.0)), MIN_STD)
+
+
+def _is_burst(count, mean, var):
+    return count >= MIN_COUNT and zscore(count, mean, var) >= Z_THRESHOLD
+
+
+def burst_keys(trend_keys, entities):
+    """
+    Keys an item is counted under for burst detection
+
+    Args:
+        trend_keys: (dimension, key) set returned by trend_rollup.record_item
+        entities: The item's entity dict (wallets come from its CRYPTO values)
+    """
+    keys = {(dimension, key) for dimension, key in trend_keys if dimension in DIMENSIONS}
+    if isinstance(entities, dict):
+        for value in entities.get("CRYPTO") or []:
+            wallet = normalize_entity("CRYPTO", value)
+            if wallet:
+                keys.add(("wallet", wallet))
+    return keys
+
+
+def _new_state(dimension, key):
+    return {"dimension": dimension, "key": key, "bucket_start": None, "count": 0, "mean": 0.0, "var": 0.0}
+
+
+def _save_states(conn, states):
+    statement = insert(BurstState)
+    statement = statement.on_conflict_do_update(
+        index_elements=[BurstState.dimension, BurstState.key],
+        set_={name: getattr(statement.excluded, name) for name in ("bucket_start", "count", "mean", "var")},
+    )
+    conn.execute(statement, states)
+
+
+def observe(conn, keys, seen_at):
+    """
+    Count one new item under keys and record any burst it causes (caller commits).
+    Constant work per key: one state row read and written.
+
+    Args:
+        conn: Session or Connection
+        keys: (dimension, key) pairs from burst_keys()
+        seen_at: Item timestamp
+
+    Returns:
+        List of anomaly dicts for the keys now bursting
+    """
+    keys = list(keys)
+    if not keys:
+        return []
+    bucket = _hour(seen_at or datetime.utcnow())
+
+    states = {}
+    for start in range(0, len(keys), 400):  # SQLite variable limit (2 per key)
+        for row in conn.execute(
+            select(BurstState.dimension, BurstState.key, BurstState.bucket_start,
+                   BurstState.count, BurstState.mean, BurstState.var)
+            .where(tuple_(BurstState.dimension, BurstState.key).in_(keys[start:start + 400]))
+        ):
+            states[(row.dimension, row.key)] = row._asdict()
+
+    changed, anomalies = [], []
+    for dimension, key in keys:
+        state = states.get((dimension, key)) or _new_state(dimension, key)
+        if not _step(state, bucket):
+            continue
+        changed.append(state)
+        count, mean, var = state["count"], state["mean"], state["var"]
+        if _is_burst(count, mean, var):
+            anomalies.append({
+                "dimension": dimension, "key": key, "bucket_start": bucket, "count": count,
+                "expected": mean, "zscore": zscore(count, mean, var), "detected_at": datetime.utcnow(),
+            })
+            if not _is_burst(count - 1, mean, var):
+                logger.warning(f"[Bursts] {dimension} '{key}': {count} items this hour "
+                               f"(baseline {mean:.1f}, z={zscore(count, mean, var):.1f})")
+
+    if changed:
+        _save_states(conn, changed)
+    if anomalies:
+        # One row per key and hour, updated to the peak as the hour fills
+        statement = insert(TrendAnomaly)
+        statement = statement.on_conflict_do_update(
+            index_elements=[TrendAnomaly.dimension, TrendAnomaly.key, TrendAnomaly.bucket_start],
+            set_={name: getattr(statement.excluded, name) for name in ("count", "expected", "zscore")},
+        )
+        conn.execute(statement, anomalies)
+    return anomalies
+
+
+def seed_baselines(conn, days=14):
+    """
+    Start the term and category baselines from the hourly trend buckets of
+    the last days, so a fresh install does not flag every busy key at once
+    (wallets have no hourly rollup and start from zero)
+
+    Returns:
+        Number of baselines seeded
+    """
+    since = _hour(datetime.utcnow()) - timedelta(days=days)
+    rows = conn.execute(
+        select(TrendBucket.dimension, TrendBucket.key, TrendBucket.bucket_start, TrendBucket.count)
+        .where(TrendBucket.granularity == "hour", TrendBucket.dimension.in_(("term", "category")),
+               TrendBucket.bucket_start >= since)
+        .order_by(TrendBucket.bucket_start)
+    )
+    states = {}
+    for dimension, key, bucket, count in rows:
+        state = states.setdefault((dimension, key), _new_state(dimension, key))
+        _step(state, bucket, count or 0)
+    if states:
+        _save_states(conn, list(states.values()))
+    logger.info(f"[Bursts] Seeded {len(states)} baselines from {days} days of trend buckets")
+    return len(states)
+
+
+def recent_anomalies(db, dimension=None, hours=72, limit=100):
+    """Bursts detected in the last hours, newest first"""
+    query = db.query(TrendAnomaly).filter(TrendAnomaly.detected_at >= datetime.utcnow() - timedelta(hours=hours))
+    if dimension:
+        query = query.filter(TrendAnomaly.dimension == dimension)
+    return [
+        {
+            "id": a.id,
+            "dimension": a.dimension,
+            "key": a.key,
+            "hour": a.bucket_start.isoformat() if a.bucket_start else None,
+            "count": a.count,
+            "expected": round(a.expected or 0.0, 2),
+            "zscore": round(a.zscore or 0.0, 2),
+            "detected_at": a.detected_at.isoformat() if a.detected_at else None,
+        }
+        for a in query.order_by(desc(TrendAnomaly.detected_at)).limit(limit)
+    ]
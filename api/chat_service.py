@@ -38,7 +38,7 @@ class ChatService:
         try:
             db = SessionLocal()
             # Get last 50 high risk items for RAG context
-            items = db.query(CrawledItem).filter(
+            items = db.query(CrawledItem.category, CrawledItem.title, CrawledItem.url).filter(
                 CrawledItem.risk_score > 0.7
             ).order_by(desc(CrawledItem.timestamp)).limit(10).all()
             
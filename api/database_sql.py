@@ -18,6 +18,11 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def ensure_schema():
+    """Create/upgrade the schema: model tables and columns plus numbered migrations"""
+    from migrations import migrate
+    return migrate(engine)
+
 # Dependency for FastAPI
 def get_db():
     db = SessionLocal()
@@ -0,0 +1,226 @@
+"""
+Entity Co-occurrence Graph
+Weighted entity-entity edges maintained at ingest (entity_edges), with k-hop
+neighbourhood queries for /entity-graph
+"""
+
+import logging
+import os
+from collections import Counter
+from itertools import combinations
+
+from sqlalchemy import DateTime, bindparam, desc, select, text, tuple_
+
+from models_sql import CrawledItem, Entity, EntityEdge, EntityMention
+
+logger = logging.getLogger(__name__)
+
+# Entity types that become graph nodes (terms, amounts and products are too generic)
+GRAPH_TYPES = tuple(
+    t.strip() for t in os.getenv(
+        "GRAPH_ENTITY_TYPES",
+        "PERSON,ORG,LOC,GPE,CRYPTO,EMAIL,JABBER,TELEGRAM,ONION,PHONE,IP_ADDRESS",
+    ).split(",") if t.strip()
+)
+# Pages listing more entities than this (directories, link farms) add no
+# edges: pairing them would add n^2 meaningless links
+MAX_ENTITIES_PER_ITEM = int(os.getenv("GRAPH_MAX_ENTITIES_PER_ITEM", "50"))
+
+MAX_HOPS = 3
+MAX_NODES = 1000
+
+
+def link_entities(conn, entity_ids, seen_at):
+    """
+    Add the co-occurrences of one item's entities to the graph (caller commits)
+
+    Args:
+        conn: Session or Connection
+        entity_ids: Ids returned by entity_index.index_entities for the item
+        seen_at: Item timestamp
+
+    Returns:
+        Number of entity pairs linked
+    """
+    if len(entity_ids) < 2:
+        return 0
+    ids = sorted(conn.execute(
+        select(Entity.id).where(Entity.id.in_(entity_ids), Entity.entity_type.in_(GRAPH_TYPES))
+    ).scalars().all())
+    if len(ids) < 2 or len(ids) > MAX_ENTITIES_PER_ITEM:
+        return 0
+
+    pairs = list(combinations(ids, 2))
+    existing = set()
+    for start in range(0, len(pairs), 400):  # SQLite variable limit (2 per pair)
+        existing.update((a, b) for a, b in conn.execute(
+            select(EntityEdge.source_id, EntityEdge.target_id)
+            .where(tuple_(EntityEdge.source_id, EntityEdge.target_id).in_(pairs[start:start + 400]))
+        ))
+
+    new_pairs = [pair for pair in pairs if pair not in existing]
+    if new_pairs:
+        conn.execute(EntityEdge.__table__.insert(), [
+            {"source_id": a, "target_id": b, "weight": 1, "first_seen": seen_at, "last_seen": seen_at}
+            for a, b in new_pairs
+        ])
+        degree = Counter(node for pair in new_pairs for node in pair)
+        conn.execute(
+            text("UPDATE entities SET degree = COALESCE(degree, 0) + :n WHERE id = :id"),
+            [{"id": node, "n": n} for node, n in degree.items()],
+        )
+    if existing:
+        conn.execute(
+            text("UPDATE entity_edges SET weight = weight + 1, "
+                 "first_seen = MIN(first_seen, :seen), last_seen = MAX(last_seen, :seen) "
+                 "WHERE source_id = :a AND target_id = :b").bindparams(bindparam("seen", type_=DateTime)),
+            [{"a": a, "b": b, "seen": seen_at} for a, b in existing],
+        )
+    return len(pairs)
+
+
+def rebuild_graph(conn):
+    """
+    Recompute every edge and degree from entity_mentions (after a backfill or
+    a change of GRAPH_ENTITY_TYPES / GRAPH_MAX_ENTITIES_PER_ITEM)
+    """
+    types = ", ".join(f"'{t}'" for t in GRAPH_TYPES if t.replace("_", "").isalnum())
+    conn.execute(text("DELETE FROM entity_edges"))
+    conn.execute(text(f"""
+        WITH graph_mentions AS (
+            SELECT m.item_id, m.entity_id, m.seen_at
+            FROM entity_mentions m JOIN entities e ON e.id = m.entity_id
+            WHERE e.entity_type IN ({types})
+        ),
+        linkable AS (
+            SELECT item_id FROM graph_mentions
+            GROUP BY item_id HAVING COUNT(*) BETWEEN 2 AND :max_entities
+        )
+        INSERT INTO entity_edges (source_id, target_id, weight, first_seen, last_seen)
+        SELECT a.entity_id, b.entity_id, COUNT(*), MIN(a.seen_at), MAX(a.seen_at)
+        FROM graph_mentions a
+        JOIN graph_mentions b ON b.item_id = a.item_id AND b.entity_id > a.entity_id
+        WHERE a.item_id IN (SELECT item_id FROM linkable)
+        GROUP BY a.entity_id, b.entity_id
+    """), {"max_entities": MAX_ENTITIES_PER_ITEM})
+    conn.execute(text("""
+        UPDATE entities SET degree =
+            (SELECT COUNT(*) FROM entity_edges WHERE source_id = entities.id) +
+            (SELECT COUNT(*) FROM entity_edges WHERE target_id = entities.id)
+    """))
+    edges = conn.execute(text("SELECT COUNT(*) FROM entity_edges")).scalar()
+    logger.info(f"[Graph] Rebuilt entity graph: {edges} edges")
+    return edges
+
+
+def _top_edges(db, node, per_node, min_weight):
+    """Heaviest edges of one node (both directions), via the weight indexes"""
+    edges = []
+    for own, other in ((EntityEdge.source_id, EntityEdge.target_id), (EntityEdge.target_id, EntityEdge.source_id)):
+        edges += db.query(other, EntityEdge.weight).filter(own == node, EntityEdge.weight >= min_weight) \
+            .order_by(desc(EntityEdge.weight)).limit(per_node).all()
+    return sorted(edges, key=lambda e: e[1], reverse=True)[:per_node]
+
+
+def neighborhood(db, seeds, hops=1, min_weight=1, per_node=15, max_nodes=150, max_degree=None):
+    """
+    Breadth-first k-hop neighbourhood around seed entities
+
+    Args:
+        db: Database session
+        seeds: Entity ids to start from
+        hops: Expansion depth (capped at MAX_HOPS)
+        min_weight: Ignore edges seen in fewer items
+        per_node: Heaviest edges followed per expanded node (level of detail)
+        max_nodes: Stop adding nodes beyond this many
+        max_degree: Nodes with a higher degree are shown but not expanded (hubs)
+
+    Returns:
+        (depth by entity id, list of (a, b, weight) edges, truncated flag)
+    """
+    depth = {seed: 0 for seed in seeds}
+    edges = {}
+    frontier = list(depth)
+    truncated = False
+    for level in range(1, min(hops, MAX_HOPS) + 1):
+        if max_degree is not None and level > 1:
+            degrees = dict(db.query(Entity.id, Entity.degree).filter(Entity.id.in_(frontier)).all())
+            frontier = [node for node in frontier if (degrees.get(node) or 0) <= max_degree]
+        next_frontier = []
+        for node in frontier:
+            for other, weight in _top_edges(db, node, per_node, min_weight):
+                if other not in depth:
+                    if len(depth) >= max_nodes:
+                        truncated = True
+                        continue
+                    depth[other] = level
+                    next_frontier.append(other)
+                edges[(min(node, other), max(node, other))] = weight
+        frontier = next_frontier
+        if not frontier:
+            break
+    return depth, [(a, b, w) for (a, b), w in edges.items()], truncated
+
+
+def overview_seeds(db, count=10, entity_type=None):
+    """Most mentioned graph entities, the starting points of a corpus overview"""
+    query = db.query(Entity.id).filter(Entity.degree > 0)
+    query = query.filter(Entity.entity_type == entity_type) if entity_type else \
+        query.filter(Entity.entity_type.in_(GRAPH_TYPES))
+    return [entity_id for (entity_id,) in query.order_by(desc(Entity.item_count)).limit(count)]
+
+
+def build_graph(db, seeds, documents=0, **options):
+    """
+    Nodes and edges for the frontend (vis-network layout of /entity-graph)
+
+    Args:
+        seeds: Entity ids to start from
+        documents: Most recent documents attached to each entity node
+        **options: Passed to neighborhood()
+    """
+    depth, links, truncated = neighborhood(db, seeds, **options)
+    entities = db.query(Entity).filter(Entity.id.in_(list(depth))).all() if depth else []
+
+    nodes = [
+        {
+            "id": f"ent_{e.id}",
+            "entity_id": e.id,
+            "name": e.display_value,
+            "group": e.entity_type,
+            "degree": e.degree or 0,
+            "item_count": e.item_count or 0,
+            "depth": depth[e.id],
+        }
+        for e in entities
+    ]
+    edges = [
+        {"source": f"ent_{a}", "target": f"ent_{b}", "label": "CO_OCCURS", "weight": w}
+        for a, b, w in links
+    ]
+
+    if documents:
+        seen_docs = set()
+        for e in entities:
+            rows = (
+                db.query(CrawledItem.id, CrawledItem.title, CrawledItem.url, CrawledItem.risk_score)
+                .join(EntityMention, EntityMention.item_id == CrawledItem.id)
+                .filter(EntityMention.entity_id == e.id)
+                .order_by(desc(EntityMention.seen_at))
+                .limit(documents)
+                .all()
+            )
+            for item in rows:
+                doc_id = f"doc_{item.id}"
+                if doc_id not in seen_docs:
+                    seen_docs.add(doc_id)
+                    nodes.append({
+                        "id": doc_id,
+                        "name": item.title or item.url,
+                        "group": "DOCUMENT",
+                        "url": item.url,
+                        "risk_score": item.risk_score,
+                    })
+                edges.append({"source": doc_id, "target": f"ent_{e.id}", "label": "MENTIONS", "weight": 1})
+
+    return {"nodes": nodes, "edges": edges, "seeds": [f"ent_{s}" for s in seeds], "truncated": truncated}
@@ -0,0 +1,169 @@
+"""
+Entity Index
+Normalized (entity, item) table behind indicator pivots, entity counts and the
+entity graph, filled at ingest and backfilled by a migration
+"""
+
+import logging
+import re
+from datetime import datetime
+
+from sqlalchemy import desc, func, literal_column, select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+
+from models_sql import CrawledItem, Entity, EntityMention
+
+logger = logging.getLogger(__name__)
+
+# Placeholders rather than values (one shared "entity" per type is no pivot)
+SKIP_TYPES = {"PGP_KEY"}
+# Indicators compared case-insensitively; crypto addresses are case-sensitive
+CASELESS_TYPES = {"EMAIL", "JABBER", "ONION", "TELEGRAM", "IP_ADDRESS", "PHONE", "CARD_BIN"}
+CRYPTO_PREFIX = re.compile(r"^(?:BTC|LTC|ETH|XMR)_")
+MAX_VALUE_LENGTH = 512
+
+
+def normalize_entity(entity_type, value):
+    """
+    Lookup key of an extracted entity value
+
+    CRYPTO values are stored as "<COIN>_<address>"; the key is the bare
+    address so a wallet can be looked up as pasted. Names and terms are
+    case- and whitespace-folded.
+
+    Returns:
+        Normalized value, or None if the value is not indexable
+    """
+    if not isinstance(value, str):
+        return None
+    value = " ".join(value.split())
+    if entity_type == "CRYPTO":
+        value = CRYPTO_PREFIX.sub("", value)
+    elif entity_type in CASELESS_TYPES:
+        value = value.lower()
+    else:
+        value = value.casefold()
+    if not value or len(value) > MAX_VALUE_LENGTH:
+        return None
+    return value
+
+
+def _entity_rows(entities):
+    rows = {}
+    if not isinstance(entities, dict):
+        return rows
+    for entity_type, values in entities.items():
+        if entity_type in SKIP_TYPES or not isinstance(values, list):
+            continue
+        for value in values:
+            key = normalize_entity(entity_type, value)
+            if key is not None:
+                rows.setdefault((entity_type, key), " ".join(value.split()))
+    return rows
+
+
+def index_entities(conn, item_id, entities, seen_at):
+    """
+    Add one item's entities to the index (caller commits)
+
+    Args:
+        conn: Session or Connection
+        item_id: CrawledItem id
+        entities: The item's entity dict (type -> list of values)
+        seen_at: Item timestamp
+
+    Returns:
+        Ids of the item's entities
+    """
+    rows = _entity_rows(entities)
+    if not rows:
+        return []
+    seen_at = seen_at or datetime.utcnow()
+
+    # Upsert: new entities start at one item, known ones widen their time range
+    statement = insert(Entity)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Entity.entity_type, Entity.value],
+        set_={
+            "item_count": Entity.item_count + 1,
+            "first_seen": func.min(Entity.first_seen, statement.excluded.first_seen),
+            "last_seen": func.max(Entity.last_seen, statement.excluded.last_seen),
+        },
+    )
+    conn.execute(statement, [
+        {"entity_type": entity_type, "value": key, "display_value": display,
+         "first_seen": seen_at, "last_seen": seen_at, "item_count": 1}
+        for (entity_type, key), display in rows.items()
+    ])
+
+    keys = list(rows)
+    entity_ids = []
+    for start in range(0, len(keys), 400):  # SQLite variable limit (2 per key)
+        entity_ids += conn.execute(
+            select(Entity.id).where(tuple_(Entity.entity_type, Entity.value).in_(keys[start:start + 400]))
+        ).scalars().all()
+    conn.execute(
+        insert(EntityMention).on_conflict_do_nothing(),
+        [{"entity_id": entity_id, "item_id": item_id, "seen_at": seen_at} for entity_id in entity_ids],
+    )
+    return entity_ids
+
+
+def backfill_entities(conn, batch_size=500):
+    """
+    Index the entity JSON of every stored item (run once, by migration)
+
+    Returns:
+        Number of items indexed
+    """
+    done = 0
+    last_rowid = 0
+    rowid = literal_column("crawled_items.rowid")
+    while True:
+        rows = conn.execute(
+            select(rowid.label("rowid"), CrawledItem.id, CrawledItem.entities, CrawledItem.timestamp)
+            .where(rowid > last_rowid)
+            .order_by(rowid)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            index_entities(conn, row.id, row.entities, row.timestamp)
+        last_rowid = rows[-1].rowid
+        done += len(rows)
+        logger.info(f"[Entities] Indexed entities of {done} items")
+    return done
+
+
+def lookup_entities(db, value, entity_type=None, limit=20):
+    """Entities whose normalized value matches value (any type unless given)"""
+    if entity_type:
+        keys = [normalize_entity(entity_type, value)]
+    else:
+        # The same string normalizes differently per type family
+        keys = {normalize_entity(t, value) for t in ("CRYPTO", "EMAIL", "PERSON")}
+    query = db.query(Entity).filter(Entity.value.in_([k for k in keys if k]))
+    if entity_type:
+        query = query.filter(Entity.entity_type == entity_type)
+    return query.order_by(desc(Entity.item_count)).limit(limit).all()
+
+
+def top_entities(db, entity_type=None, limit=50):
+    """Most mentioned entities, optionally of one type"""
+    query = db.query(Entity)
+    if entity_type:
+        query = query.filter(Entity.entity_type == entity_type)
+    return query.order_by(desc(Entity.item_count)).limit(limit).all()
+
+
+def entity_summary(entity):
+    return {
+        "id": entity.id,
+        "type": entity.entity_type,
+        "value": entity.display_value,
+        "normalized": entity.value,
+        "item_count": entity.item_count,
+        "first_seen": entity.first_seen.isoformat() if entity.first_seen else None,
+        "last_seen": entity.last_seen.isoformat() if entity.last_seen else None,
+    }
@@ -0,0 +1,174 @@
+"""
+SQLite FTS5 Full-Text Index
+External-content FTS5 table over crawled_items (title, main_text, url), kept in sync by triggers
+"""
+
+import html
+import logging
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import DateTime, bindparam, text
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "crawled_items_fts"
+
+# BM25 column weights: a hit in the title counts most, the url (wallets and
+# handles often appear there) more than body text
+BM25_WEIGHTS = (10.0, 1.0, 3.0)
+SNIPPET_TOKENS = 24
+# Control characters that never occur in page text mark the highlights, so the
+# snippet can be HTML-escaped before the <mark> tags are put in
+_HL_START, _HL_END = "\x02", "\x03"
+
+# Porter stemming on top of unicode61 so "leak" also finds "leaks"/"leaked";
+# prefix indexes make short prefix* queries cheap
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, main_text, url,
+        content='crawled_items', content_rowid='rowid',
+        tokenize='porter unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON crawled_items BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, main_text, url) VALUES (new.rowid, new.title, new.main_text, new.url);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON crawled_items BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, main_text, url)
+        VALUES ('delete', old.rowid, old.title, old.main_text, old.url);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, main_text, url ON crawled_items BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, main_text, url)
+        VALUES ('delete', old.rowid, old.title, old.main_text, old.url);
+        INSERT INTO {FTS_TABLE}(rowid, title, main_text, url) VALUES (new.rowid, new.title, new.main_text, new.url);
+    END""",
+]
+
+
+def ensure_fts(conn):
+    """
+    Create the FTS table and its sync triggers; index existing rows on first creation
+
+    Args:
+        conn: SQLAlchemy connection inside a transaction
+    """
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    ).first()
+    for statement in FTS_DDL:
+        conn.execute(text(statement))
+    if not exists:
+        rebuild_fts(conn)
+
+
+def drop_fts(conn):
+    """Drop the FTS table and its triggers (before changing the indexed columns)"""
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+
+def rebuild_fts(conn):
+    """
+    Re-index every row from crawled_items.
+
+    crawled_items has a text primary key, so its rowids are not guaranteed
+    stable across VACUUM; run this after vacuuming the database.
+    """
+    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    logger.info(f"[FTS] Rebuilt {FTS_TABLE}")
+
+
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """
+    Turn user input into a safe FTS5 MATCH expression.
+
+    Supported: "exact phrases", prefix* terms and OR between terms; every
+    other term is quoted, so punctuation in wallets, emails or urls can never
+    be read as FTS5 syntax. Terms are ANDed.
+
+    Returns:
+        MATCH string, or None if the query has no searchable terms
+    """
+    parts = []
+    for phrase, word in _QUERY_TOKEN.findall(q or ""):
+        if phrase:
+            phrase = phrase.strip()
+            if phrase:
+                parts.append('"' + phrase.replace('"', '""') + '"')
+            continue
+        if word == "OR":
+            if parts and parts[-1] != "OR":
+                parts.append("OR")
+            continue
+        prefix = word.endswith("*") and len(word.rstrip("*")) > 0
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            parts.append(f'"{word}"' + ("*" if prefix else ""))
+    while parts and parts[-1] == "OR":
+        parts.pop()
+    return " ".join(parts) or None
+
+
+def _format_snippet(raw: Optional[str]) -> str:
+    if not raw:
+        return ""
+    return html.escape(raw).replace(_HL_START, "<mark>").replace(_HL_END, "</mark>")
+
+
+def search_fts(
+    db,
+    q: str,
+    limit: int = 50,
+    category: Optional[str] = None,
+    min_risk: Optional[float] = None,
+    since=None,
+    until=None,
+) -> List[Tuple[str, float, str]]:
+    """
+    BM25-ranked full-text search with highlighted snippets
+
+    Returns:
+        List of (item_id, bm25 score (lower is better), snippet HTML), best first.
+        Raises sqlalchemy OperationalError if the FTS table is missing.
+    """
+    match = build_match_query(q)
+    if not match:
+        return []
+
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    clauses = [f"{FTS_TABLE} MATCH :match"]
+    params = {"match": match, "limit": limit}
+    if category and category != "All":
+        clauses.append("ci.category = :category")
+        params["category"] = category
+    if min_risk:
+        clauses.append("ci.risk_score >= :min_risk")
+        params["min_risk"] = min_risk
+    if since:
+        clauses.append("ci.timestamp >= :since")
+        params["since"] = since
+    if until:
+        clauses.append("ci.timestamp <= :until")
+        params["until"] = until
+
+    sql = f"""
+        SELECT ci.id, bm25({FTS_TABLE}, {weights}) AS score,
+               snippet({FTS_TABLE}, -1, '{_HL_START}', '{_HL_END}', '...', {SNIPPET_TOKENS}) AS snippet
+        FROM {FTS_TABLE}
+        JOIN crawled_items ci ON ci.rowid = {FTS_TABLE}.rowid
+        WHERE {' AND '.join(clauses)}
+        ORDER BY score
+        LIMIT :limit
+    """
+    statement = text(sql)
+    for name in ("since", "until"):
+        if name in params:
+            statement = statement.bindparams(bindparam(name, type_=DateTime))
+    rows = db.execute(statement, params).all()
+    return [(row.id, float(row.score), _format_snippet(row.snippet)) for row in rows]
+
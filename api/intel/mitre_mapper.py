@@ -1,5 +1,6 @@
 import logging
 import re
+from keyword_engine import get_keyword_engine
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +33,10 @@ MITRE_DETAILS = {
     "T1071": "Application Layer Protocol"
 }
 
-def map_text_to_attck(text):
+keyword_engine = get_keyword_engine()
+keyword_engine.register("mitre_attck", MITRE_KB.keys())
+
+def map_text_to_attck(text, keyword_hits=None):
     """
     Scans text for MITRE keywords and returns detected TTPs.
     """
@@ -41,10 +45,12 @@ def map_text_to_attck(text):
     if not text:
         return []
         
-    text_lower = text.lower()
+    if keyword_hits is None:
+        keyword_hits = keyword_engine.scan(text, lexicons=("mitre_attck",))
     
-    for keyword, ttp_id in MITRE_KB.items():
-        if keyword in text_lower:
+    for keyword in keyword_hits.get("mitre_attck", []):
+        ttp_id = MITRE_KB.get(keyword)
+        if ttp_id:
             if ttp_id not in detected_ttps:
                 detected_ttps[ttp_id] = {
                     "id": ttp_id,
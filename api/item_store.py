@@ -0,0 +1,112 @@
+"""
+Cold Content Store
+Raw HTML and full page text, zlib-compressed in item_content and loaded by id
+only when a single item is opened
+"""
+
+import logging
+import zlib
+
+from sqlalchemy import text as sql
+from sqlalchemy.orm import load_only
+
+from models_sql import CrawledItem, ItemContent
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_LEVEL = 6
+
+# Columns list views, the live feed, reports and the chat context need
+SUMMARY_COLUMNS = (
+    CrawledItem.id, CrawledItem.url, CrawledItem.title, CrawledItem.risk_score,
+    CrawledItem.conn_type, CrawledItem.depth, CrawledItem.timestamp,
+    CrawledItem.category, CrawledItem.entities, CrawledItem.sentiment, CrawledItem.csam_flag,
+)
+
+
+def summary_only(*extra):
+    """Query option that loads only SUMMARY_COLUMNS (plus extra) of a CrawledItem"""
+    return load_only(*SUMMARY_COLUMNS, *extra)
+
+
+def compress(value):
+    if not value:
+        return None
+    return zlib.compress(value.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def decompress(blob):
+    if not blob:
+        return ""
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def save_content(db, item_id, raw_html, text):
+    """Stage the compressed content of an item on the session (caller commits)"""
+    db.add(ItemContent(
+        item_id=item_id,
+        raw_html=compress(raw_html),
+        text=compress(text),
+        size=len(raw_html or "") + len(text or ""),
+    ))
+
+
+def load_content(db, item_id):
+    """
+    Decompressed raw HTML and full text of one item
+
+    Returns:
+        Dict with "raw_html" and "text" (empty strings when nothing is stored)
+    """
+    row = db.query(ItemContent.raw_html, ItemContent.text).filter(ItemContent.item_id == item_id).first()
+    if not row:
+        return {"raw_html": "", "text": ""}
+    return {"raw_html": decompress(row.raw_html), "text": decompress(row.text)}
+
+
+def move_inline_content(conn, batch_size=200):
+    """
+    Migrate raw_html/text stored inline in crawled_items (databases created
+    before item_content existed) into item_content, then clear the inline copies.
+
+    Items without main_text get their full text as main_text, so listing and
+    full-text search keep working for them.
+
+    Returns:
+        Number of items moved
+    """
+    columns = {row[1] for row in conn.execute(sql("PRAGMA table_info(crawled_items)"))}
+    if not {"raw_html", "text"} <= columns:
+        return 0
+
+    conn.execute(sql(
+        "UPDATE crawled_items SET main_text = text WHERE (main_text IS NULL OR main_text = '') AND text IS NOT NULL"
+    ))
+    moved = 0
+    while True:
+        rows = conn.execute(sql(
+            "SELECT id, raw_html, text FROM crawled_items "
+            "WHERE raw_html IS NOT NULL OR text IS NOT NULL LIMIT :limit"
+        ), {"limit": batch_size}).all()
+        if not rows:
+            break
+        conn.execute(
+            sql("INSERT OR REPLACE INTO item_content (item_id, codec, raw_html, text, size) "
+                "VALUES (:item_id, 'zlib', :raw_html, :text, :size)"),
+            [
+                {
+                    "item_id": row.id,
+                    "raw_html": compress(row.raw_html),
+                    "text": compress(row.text),
+                    "size": len(row.raw_html or "") + len(row.text or ""),
+                }
+                for row in rows
+            ],
+        )
+        conn.execute(
+            sql("UPDATE crawled_items SET raw_html = NULL, text = NULL WHERE id = :id"),
+            [{"id": row.id} for row in rows],
+        )
+        moved += len(rows)
+        logger.info(f"[ItemStore] Moved content of {moved} items to item_content")
+    return moved
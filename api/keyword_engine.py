@@ -0,0 +1,234 @@
+"""
+Multi-pattern Keyword Engine
+Scans a text once against every registered lexicon with word-boundary matching
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import ahocorasick  # pyahocorasick (optional C automaton)
+except ImportError:
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+LEXICON_DIR = os.getenv("KEYWORD_LEXICON_DIR")
+RELOAD_INTERVAL = float(os.getenv("KEYWORD_RELOAD_INTERVAL", "30"))
+
+
+# Scripts written without spaces between words (kana, CJK ideographs, hangul)
+# cannot use word boundaries, so their characters never block a match.
+_UNSPACED = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af"
+_UNSPACED_RE = re.compile(f"[{_UNSPACED}]")
+_BOUNDARY_CHAR = f"[^\\W{_UNSPACED}]"
+
+
+def _is_word_char(ch):
+    return (ch.isalnum() or ch == "_") and not _UNSPACED_RE.match(ch)
+
+
+def _build_trie_pattern(terms):
+    """
+    Compile terms into a trie-shaped regex so the regex engine walks a prefix
+    tree at each position instead of trying every alternative in turn.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def _render(node):
+        is_end = "" in node
+        branches = [re.escape(ch) + _render(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if is_end:
+            return "(?:" + body + ")?"
+        return body
+
+    return _render(trie)
+
+
+class KeywordEngine:
+    """
+    Single-pass keyword matcher shared by every substring filter.
+
+    All lexicons are merged into one automaton (pyahocorasick when installed,
+    otherwise a trie-compiled regex), so scan cost depends on the text length
+    rather than on how many terms are registered. Matches must start and end
+    on a word boundary, so "rat" no longer fires inside "separate" (CJK and
+    other unspaced scripts match anywhere).
+
+    Lexicons registered in code act as defaults; a file named
+    ``<KEYWORD_LEXICON_DIR>/<lexicon>.txt`` (one term per line) overrides
+    them and is picked up again whenever it changes on disk.
+    """
+
+    def __init__(self, lexicon_dir=LEXICON_DIR, reload_interval=RELOAD_INTERVAL):
+        """
+        Args:
+            lexicon_dir: Directory holding <lexicon>.txt override files
+            reload_interval: Seconds between override-file change checks
+        """
+        self.lexicon_dir = lexicon_dir
+        self.reload_interval = reload_interval
+        self._defaults: Dict[str, List[str]] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        # (term -> [lexicon names], matcher) swapped atomically on rebuild
+        self._compiled = ({}, None)
+
+    def register(self, name: str, terms: Iterable[str]):
+        """Register (or replace) the default terms of a lexicon and rebuild"""
+        with self._lock:
+            self._defaults[name] = list(terms)
+            self._rebuild()
+
+    def reload(self):
+        """Re-read lexicon override files and rebuild the automaton"""
+        with self._lock:
+            self._rebuild()
+
+    def lexicon(self, name: str) -> List[str]:
+        """Return the active terms of a lexicon"""
+        term_map, _ = self._compiled
+        return sorted(term for term, names in term_map.items() if name in names)
+
+    def scan(self, text: Optional[str], lexicons: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """
+        Scan text once and return the hits for every lexicon.
+
+        Args:
+            text: Text to scan (case-insensitive)
+            lexicons: Optional subset of lexicon names to report
+
+        Returns:
+            Dict of lexicon name -> list of matched terms (in order of first hit)
+        """
+        self._maybe_reload()
+
+        hits: Dict[str, List[str]] = {}
+        if not text:
+            return hits
+
+        term_map, matcher = self._compiled
+        if matcher is None:
+            return hits
+
+        wanted = set(lexicons) if lexicons is not None else None
+        for term in self._iter_matches(text.lower(), matcher):
+            for name in term_map.get(term, ()):
+                if wanted is not None and name not in wanted:
+                    continue
+                found = hits.setdefault(name, [])
+                if term not in found:
+                    found.append(term)
+        return hits
+
+    # --- Internals ---
+
+    def _iter_matches(self, text, matcher):
+        if ahocorasick is not None:
+            length = len(text)
+            for end, term in matcher.iter(text):
+                start = end - len(term) + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if end + 1 < length and _is_word_char(text[end + 1]):
+                    continue
+                yield term
+            return
+
+        # Lookahead keeps matches zero-width so overlapping terms are all seen;
+        # shorter terms that are word-prefixes of a longer hit are expanded
+        # from the prefix table built at compile time.
+        regex, prefixes = matcher
+        for match in regex.finditer(text):
+            term = match.group(1)
+            yield term
+            yield from prefixes.get(term, ())
+
+    def _load_terms(self, name):
+        terms = self._defaults.get(name, [])
+        if self.lexicon_dir:
+            path = os.path.join(self.lexicon_dir, f"{name}.txt")
+            if os.path.exists(path):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        terms = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+                    self._mtimes[name] = os.path.getmtime(path)
+                except OSError as e:
+                    logger.error(f"[Keywords] Failed to read lexicon {path}: {e}")
+        return terms
+
+    def _rebuild(self):
+        term_map: Dict[str, List[str]] = {}
+        for name in self._defaults:
+            for term in self._load_terms(name):
+                term = term.lower().strip()
+                if term and name not in term_map.setdefault(term, []):
+                    term_map[term].append(name)
+
+        if not term_map:
+            self._compiled = ({}, None)
+            return
+
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for term in term_map:
+                automaton.add_word(term, term)
+            automaton.make_automaton()
+            matcher = automaton
+        else:
+            pattern = _build_trie_pattern(term_map)
+            regex = re.compile(f"(?=(?<!{_BOUNDARY_CHAR})(" + pattern + f")(?!{_BOUNDARY_CHAR}))")
+            prefixes = {}
+            for term in term_map:
+                for i, ch in enumerate(term):
+                    if i and not _is_word_char(ch) and term[:i] in term_map:
+                        prefixes.setdefault(term, []).append(term[:i])
+            matcher = (regex, prefixes)
+
+        self._compiled = (term_map, matcher)
+        self._last_check = time.monotonic()
+        logger.info(f"[Keywords] Compiled {len(term_map)} terms across {len(self._defaults)} lexicons")
+
+    def _maybe_reload(self):
+        if not self.lexicon_dir:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+
+        for name in self._defaults:
+            path = os.path.join(self.lexicon_dir, f"{name}.txt")
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                mtime = None
+            if mtime != self._mtimes.get(name):
+                logger.info(f"[Keywords] Lexicon '{name}' changed on disk, reloading")
+                self._mtimes[name] = mtime
+                self.reload()
+                return
+
+
+# Global engine instance shared by the crawler pipeline and the API
+_keyword_engine = None
+
+def get_keyword_engine():
+    """Get or create global keyword engine instance"""
+    global _keyword_engine
+    if _keyword_engine is None:
+        _keyword_engine = KeywordEngine()
+    return _keyword_engine
@@ -2,9 +2,12 @@
 import sys
 import os
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import bootstrap
+bootstrap.configure_paths()
+
 print(f"DEBUG: sys.path: {sys.path}")
 print(f"DEBUG: CWD: {os.getcwd()}")
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
     import database_sql
@@ -17,7 +20,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func, or_
+from sqlalchemy import desc, func, or_, tuple_
+from sqlalchemy.exc import OperationalError
 import subprocess
 import logging
 import asyncio
@@ -28,8 +32,15 @@ import json
 
 from database_sql import get_db, engine, Base
 from models_sql import User, CrawledItem, DailyReport, SeenURL
+from fts_index import search_fts
+from item_store import SUMMARY_COLUMNS, load_content, summary_only
+from stats_rollup import get_user_stats, read_counters, refresh_user_stats
+from pagination import (
+    MAX_PAGE_SIZE, decode_cursor, encode_cursor, item_columns, json_page, keyset_after,
+    parse_fields, serialize_item,
+)
 # from report_generator import get_report_generator
-# from scheduler import get_scheduler
+from scheduler import get_scheduler, job_metrics
 from redis_manager import get_redis_manager
 from pdf_generator import get_pdf_generator
 from notification_manager import get_notification_manager
@@ -83,10 +94,14 @@ active_connections = []
 @app.on_event("startup")
 async def startup_event():
     logger.info("Startup Event Skipped (Already handled by init_database.py)")
-    pass
+    # Background jobs (daily report, cleanup, topic clustering); enable in one
+    # process only when running several API workers
+    if os.getenv("ENABLE_SCHEDULER", "false").lower() == "true":
+        get_scheduler().start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    get_scheduler().shutdown()
     logger.info("[API] Shutdown complete")
 
 # --- Endpoints ---
@@ -109,21 +124,57 @@ async def get_crawl_status(current_user: User = Depends(get_current_user)):
 
 @app.get("/items")
 async def search_items(
+    request: Request,
     q: Optional[str] = None,
     category: Optional[str] = None,
     risk_score: Optional[float] = None,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(CrawledItem)
+    """
+    List items newest first, or search them with q (best match first).
+
+    Listings page with keyset cursors: pass the X-Next-Cursor header of a
+    response as ?cursor= to get the next page. ?fields=id,title,snippet
+    selects the fields returned; by default a short snippet replaces the text.
+    """
+    try:
+        selected = parse_fields(fields)
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if q and position:
+        raise HTTPException(status_code=400, detail="cursor pagination is not available for ranked search (q)")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    if q:
+        # FTS5 index: BM25 ranking, "phrases", prefix* terms and highlighted snippets
+        try:
+            hits = search_fts(db, q, limit=limit, category=category, min_risk=risk_score)
+            rows = {
+                row.id: row for row in
+                db.query(*item_columns(selected))
+                .filter(CrawledItem.id.in_([item_id for item_id, _, _ in hits])).all()
+            }
+            return json_page(request, [
+                serialize_item(rows[item_id], selected, snippet=snippet)
+                for item_id, _, snippet in hits if item_id in rows
+            ])
+        except OperationalError as e:
+            logger.warning(f"[Search] Full-text index unavailable, falling back to LIKE: {e}")
+            db.rollback()
+
+    query = db.query(*item_columns(selected, full_text=bool(q)))
     
     if q:
         # Simple text search (SQLite LIKE)
         search = f"%{q}%"
         query = query.filter(or_(
             CrawledItem.title.ilike(search),
-            CrawledItem.text.ilike(search),
+            CrawledItem.main_text.ilike(search),
             CrawledItem.url.ilike(search)
         ))
         
@@ -132,27 +183,109 @@ async def search_items(
         
     if risk_score:
         query = query.filter(CrawledItem.risk_score >= risk_score)
+
+    if position:
+        query = query.filter(keyset_after(position))
         
-    items = query.order_by(desc(CrawledItem.timestamp)).limit(limit).all()
-    # Exclude raw_html from list response to save bandwidth
+    rows = query.order_by(desc(CrawledItem.timestamp), desc(CrawledItem.id)).limit(limit).all()
+    next_cursor = encode_cursor(rows[-1]) if len(rows) == limit and not q else None
+    return json_page(request, [serialize_item(row, selected, q or "") for row in rows], next_cursor)
+
+def item_summary(item):
+    # Main text only; raw HTML and the full page text are served by /items/{item_id}
+    return {
+        "id": item.id,
+        "url": item.url,
+        "title": item.title,
+        "text": item.main_text,
+        "risk_score": item.risk_score,
+        "conn_type": item.conn_type,
+        "depth": item.depth,
+        "timestamp": item.timestamp,
+        "category": item.category,
+        "entities": item.entities,
+        "sentiment": item.sentiment,
+        "csam_flag": item.csam_flag
+    }
+
+# --- Semantic Search ---
+# Plain def: FAISS search and embedding are CPU-bound, so FastAPI runs these
+# in its threadpool instead of blocking the event loop
+from semantic_search import get_semantic_search
+
+@app.get("/items/{item_id}/similar")
+def get_similar_items(
+    item_id: str,
+    limit: int = 10,
+    category: Optional[str] = None,
+    risk_score: Optional[float] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    item = db.query(CrawledItem).filter(CrawledItem.id == item_id).first()
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    results = get_semantic_search().similar_to_item(
+        db, item, limit=min(limit, 100),
+        category=category, min_risk=risk_score, since=since, until=until
+    )
+    return [{**item_summary(hit), "similarity": round(score, 4)} for hit, score in results]
+
+@app.get("/search/semantic")
+def semantic_search(
+    q: str,
+    limit: int = 20,
+    category: Optional[str] = None,
+    risk_score: Optional[float] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+
+    results = get_semantic_search().search_text(
+        db, q, limit=min(limit, 100),
+        category=category, min_risk=risk_score, since=since, until=until
+    )
+    return [{**item_summary(hit), "similarity": round(score, 4)} for hit, score in results]
+
+# --- Hybrid Search ---
+from search_service import get_hybrid_search, make_snippet
+
+@app.get("/search")
+async def hybrid_search(
+    q: str,
+    limit: int = 20,
+    category: Optional[str] = None,
+    risk_score: Optional[float] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+
+    results, partial = await get_hybrid_search().search(
+        q, limit=min(limit, 100),
+        category=category, min_risk=risk_score, since=since, until=until
+    )
     formatted = []
-    for item in items:
-        item_dict = {
-            "id": item.id,
-            "url": item.url,
-            "title": item.title,
-            "text": item.text,
-            "risk_score": item.risk_score,
-            "conn_type": item.conn_type,
-            "depth": item.depth,
-            "timestamp": item.timestamp,
-            "category": item.category,
-            "entities": item.entities,
-            "sentiment": item.sentiment,
-            "csam_flag": item.csam_flag
-        }
-        formatted.append(item_dict)
-    return formatted
+    for item, score, matched_by in results:
+        summary = item_summary(item)
+        summary.pop("text")
+        summary.update({
+            # FTS5 snippet for lexical hits, plain window for semantic-only hits
+            "snippet": getattr(item, "fts_snippet", None) or make_snippet(item.main_text, q),
+            "score": round(score, 5),
+            "matched_by": matched_by,
+        })
+        formatted.append(summary)
+    return {"results": formatted, "partial": partial}
 
 @app.get("/items/{item_id}")
 async def get_item_details(
@@ -163,13 +296,14 @@ async def get_item_details(
     item = db.query(CrawledItem).filter(CrawledItem.id == item_id).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
-        
+
+    content = load_content(db, item.id)
     return {
         "id": item.id,
         "url": item.url,
         "title": item.title,
-        "text": item.text,
-        "raw_html": item.raw_html,
+        "text": content["text"] or item.main_text,
+        "raw_html": content["raw_html"],
         "risk_score": item.risk_score,
         "conn_type": item.conn_type,
         "depth": item.depth,
@@ -224,6 +358,57 @@ async def admin_start_crawl(
         logger.error(f"[Crawler] Error: {e}")
         return JSONResponse(status_code=500, content={"message": str(e)})
 
+# --- Embedding Model Management ---
+REEMBED_STATUS = {"running": False, "model": None}
+
+def run_reembed_subprocess(model):
+    logger.info(f"[Reembed] Starting subprocess (Model: {model})...")
+    try:
+        crawler_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "crawler"))
+        cmd = [sys.executable, "-m", "crawler.reembed", "--model", model]
+        result = subprocess.run(cmd, cwd=crawler_dir, capture_output=True, text=True)
+        if result.returncode == 0:
+            logger.info(f"[Reembed] Success: {result.stderr[-200:]}")
+        else:
+            logger.error(f"[Reembed] Failed: {result.stderr[-2000:]}")
+    except Exception as ex:
+        logger.error(f"[Reembed] Subprocess error: {ex}")
+    finally:
+        REEMBED_STATUS["running"] = False
+
+@app.post("/admin/embeddings/reembed")
+@limiter.limit("2/minute")
+async def admin_reembed(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    model: str,
+    current_user: User = Depends(get_admin_user)
+):
+    """Re-embed the corpus with another model and switch the index once it has caught up"""
+    if REEMBED_STATUS["running"]:
+        return JSONResponse(status_code=400, content={"message": "Re-embedding already in progress"})
+
+    log_audit_event(current_user, "REEMBED_CORPUS", {"ip": request.client.host, "model": model}, "HIGH")
+    REEMBED_STATUS.update(running=True, model=model)
+    background_tasks.add_task(run_reembed_subprocess, model)
+    return {"status": "success", "message": f"Re-embedding with {model} started in background"}
+
+@app.get("/admin/embeddings/status")
+async def admin_embedding_status(current_user: User = Depends(get_admin_user)):
+    from crawler.ai.embedding_registry import active_embedding
+    from crawler.reembed import read_state
+    job_model = REEMBED_STATUS["model"]
+    return {
+        "active": active_embedding(),
+        "running": REEMBED_STATUS["running"],
+        "job": read_state(job_model) if job_model else None,
+    }
+
+@app.get("/admin/jobs")
+def admin_job_metrics(current_user: User = Depends(get_admin_user), db: Session = Depends(get_db)):
+    """Duration and outcome of the recent runs of each scheduled job"""
+    return job_metrics(db)
+
 class SeedRequest(BaseModel):
     seed_url: str
 
@@ -283,6 +468,7 @@ async def seed_crawler(
 @app.post("/user/watchlist")
 async def update_watchlist(
     keywords: List[str], 
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -298,32 +484,53 @@ async def update_watchlist(
     current_user.assets = current_assets
     
     db.commit()
+    # Recount the /stats watchlist counters off the request path
+    background_tasks.add_task(refresh_user_stats, current_user.id)
     
     log_audit_event(current_user, "UPDATE_WATCHLIST", {"keywords": keywords})
     return {"status": "success", "message": f"Added {len(keywords)} keywords"}
 
 @app.get("/stats")
-async def get_stats(request: Request, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_stats(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
     try:
-        # Simplified stats for now
-        # 1. Total findings
-        total = db.query(CrawledItem).count()
-        
-        # 2. Risk distribution?
-        # Manually aggregate for SQLite simplicity
-        # Or just return raw counts for categories if we had them
-        
-        # Fetch a sample to guess categories or just hardcode
-        high_risk = db.query(CrawledItem).filter(CrawledItem.risk_score >= 0.8).count()
-        medium_risk = db.query(CrawledItem).filter(CrawledItem.risk_score >= 0.5, CrawledItem.risk_score < 0.8).count()
-        low_risk = total - high_risk - medium_risk
-        
+        # Counters kept current by triggers on crawled_items (stats_rollup.py)
+        counters = read_counters(db)
+        risk = counters["risk"]
+        high_risk, medium_risk, low_risk = (risk.get(band, 0) for band in ("high", "medium", "low"))
+
         stats = {
             "categories": ["High Risk", "Medium Risk", "Low Risk"],
             "counts": [high_risk, medium_risk, low_risk],
-            "total": total,
-            "view_mode": "GLOBAL" # TODO: Personalized
+            "total": counters["total"].get("", 0),
+            "by_category": counters["category"],
+            "by_conn_type": counters["conn_type"],
+            "view_mode": "GLOBAL",
         }
+
+        # Personal view: the same breakdown over items matching the user's watchlist
+        # (stored row only; a stale one is recounted in the background)
+        terms, user_stats, stale = get_user_stats(db, current_user)
+        if stale:
+            background_tasks.add_task(refresh_user_stats, current_user.id)
+        if terms:
+            matches = (user_stats.matches if user_stats else 0) or 0
+            high = (user_stats.high_risk if user_stats else 0) or 0
+            medium = (user_stats.medium_risk if user_stats else 0) or 0
+            last_match_at = user_stats.last_match_at if user_stats else None
+            stats["view_mode"] = "PERSONAL"
+            stats["user"] = {
+                "watch_terms": len(terms),
+                "categories": ["High Risk", "Medium Risk", "Low Risk"],
+                "counts": [high, medium, matches - high - medium],
+                "total": matches,
+                "last_match_at": last_match_at.isoformat() if last_match_at else None,
+                "stale": stale,
+            }
         return stats
     except Exception as e:
         logger.error(f"[Stats] Error: {e}")
@@ -341,7 +548,7 @@ async def websocket_endpoint(websocket: WebSocket):
         # 1. Send recent history immediately
         db = SessionLocal()
         try:
-            recent_items = db.query(CrawledItem).order_by(CrawledItem.timestamp.desc()).limit(50).all()
+            recent_items = db.query(CrawledItem).options(summary_only()).order_by(CrawledItem.timestamp.desc()).limit(50).all()
             # Send in reverse order (oldest -> newest) so client log looks right, OR just send as is and let client sort.
             # Let's send oldest first for "log" feel.
             for item in reversed(recent_items):
@@ -370,7 +577,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 # Query recent items (simulate "live" feed with any recent item)
                 # In production, strictly query > last_check
                 
-                query = db.query(CrawledItem).filter(CrawledItem.timestamp > last_check).order_by(CrawledItem.timestamp.asc())
+                query = db.query(CrawledItem).options(summary_only()).filter(CrawledItem.timestamp > last_check).order_by(CrawledItem.timestamp.asc())
                 new_items = query.all()
                 
                 if new_items:
@@ -417,7 +624,7 @@ async def generate_report(request: Request, current_user: User = Depends(get_adm
         
         # Fetch items
         twenty_four_hours_ago = datetime.utcnow() - timedelta(days=1)
-        high_risk_items = db.query(CrawledItem).filter(
+        high_risk_items = db.query(*SUMMARY_COLUMNS).filter(
             CrawledItem.risk_score >= 0.8
             # CrawledItem.timestamp >= twenty_four_hours_ago # Timestamp might be string or datetime?
         ).order_by(desc(CrawledItem.timestamp)).limit(50).all()
@@ -425,11 +632,8 @@ async def generate_report(request: Request, current_user: User = Depends(get_adm
         if not high_risk_items:
              return {"status": "success", "message": "No high risks found", "report": None}
 
-        # Convert to list of dicts for generator
-        docs = [item.__dict__ for item in high_risk_items] 
-        # Clean up SQLAlchemy state
-        for d in docs: 
-            d.pop('_sa_instance_state', None)
+        # Convert to list of dicts for generator (summary columns only)
+        docs = [row._asdict() for row in high_risk_items]
             
         report_gen = ReportGenerator() # Instantiate directly
         summary = report_gen.create_executive_summary(docs)
@@ -556,68 +760,212 @@ async def chat_endpoint(request: ChatRequest, current_user: User = Depends(get_c
     except Exception as e:
         return JSONResponse(status_code=500, content={"message": str(e)})
 
-# Stats endpoints placeholders
+# Topic trends (precomputed by the topic clustering job)
+from topic_clustering import get_trending_topics, get_historical_topics
+from trend_rollup import (
+    DIMENSIONS as TREND_DIMENSIONS, GRANULARITIES as TREND_GRANULARITIES, MAX_DAYS as TREND_MAX_DAYS,
+    trend_changes, trend_series,
+)
+
 @app.get("/trending")
-async def get_trending():
-    # Placeholder
-    return {"trends": []}
+def get_trending(limit: int = 10, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return get_trending_topics(db, limit=min(limit, 100))
 
 @app.get("/historical-trends")
-async def get_historical_trends():
-    return {"trends": []}
+def get_historical_trends(
+    runs: int = 28,
+    dimension: Optional[str] = None,
+    days: int = 90,
+    granularity: str = "day",
+    keys: Optional[str] = None,
+    top: int = 10,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Topic sizes per clustering run, or with ?dimension= the item counts per
+    hour/day bucket of a dimension (category, risk, host, entity_type, term)
+    from the trend rollups, e.g. ?dimension=category&days=90
+    """
+    if not dimension:
+        return get_historical_topics(db, runs=min(runs, 100))
+    if dimension not in TREND_DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"dimension must be one of: {', '.join(TREND_DIMENSIONS)}")
+    if granularity not in TREND_GRANULARITIES:
+        raise HTTPException(status_code=400, detail="granularity must be 'hour' or 'day'")
+    key_list = [k.strip() for k in keys.split(",") if k.strip()] if keys else None
+    return trend_series(db, dimension, days=days, granularity=granularity, keys=key_list, top=min(top, 100))
+
+@app.get("/trend-changes")
+def get_trend_changes(
+    dimension: str = "term",
+    days: int = 7,
+    top: int = 10,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Percentage change per key over the last complete days against the days before"""
+    if dimension not in TREND_DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"dimension must be one of: {', '.join(TREND_DIMENSIONS)}")
+    # Two windows of days must fit in the daily rollups
+    days = max(1, min(days, TREND_MAX_DAYS["day"] // 2))
+    return {"dimension": dimension, "days": days, "changes": trend_changes(db, dimension, days=days, top=min(top, 100))}
+
+# Bursts flagged by the streaming detector in the crawler pipeline
+from burst_detector import DIMENSIONS as BURST_DIMENSIONS, recent_anomalies
+
+@app.get("/anomalies")
+def get_anomalies(
+    dimension: Optional[str] = None,
+    hours: int = 72,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Term, wallet and category bursts detected in the last hours, newest first"""
+    if dimension and dimension not in BURST_DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"dimension must be one of: {', '.join(BURST_DIMENSIONS)}")
+    return recent_anomalies(db, dimension=dimension, hours=min(hours, 24 * 90), limit=min(limit, 1000))
     
+# --- Entity Index (indicator pivots) ---
+from models_sql import Entity, EntityMention
+from entity_index import entity_summary, lookup_entities, top_entities
+
+@app.get("/entities")
+def list_entities(
+    type: Optional[str] = None,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Most mentioned entities, optionally of one type (EMAIL, CRYPTO, PERSON, ...)"""
+    return [entity_summary(e) for e in top_entities(db, entity_type=type, limit=min(limit, 500))]
+
+@app.get("/entities/lookup")
+def lookup_entity(
+    value: str,
+    type: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Find an indicator (wallet, email, handle, name...) as pasted"""
+    if not value.strip():
+        raise HTTPException(status_code=400, detail="Value must not be empty")
+    return [entity_summary(e) for e in lookup_entities(db, value, entity_type=type)]
+
+@app.get("/entities/{entity_id}/items")
+def get_entity_items(
+    entity_id: int,
+    request: Request,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Items mentioning an entity, newest first (keyset-paged like /items)"""
+    if not db.query(Entity.id).filter(Entity.id == entity_id).first():
+        raise HTTPException(status_code=404, detail="Entity not found")
+    try:
+        selected = parse_fields(fields)
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    query = (
+        db.query(*item_columns(selected))
+        .join(EntityMention, EntityMention.item_id == CrawledItem.id)
+        .filter(EntityMention.entity_id == entity_id)
+    )
+    if position:
+        query = query.filter(tuple_(EntityMention.seen_at, EntityMention.item_id) < tuple_(*position))
+    rows = query.order_by(desc(EntityMention.seen_at), desc(EntityMention.item_id)).limit(limit).all()
+    next_cursor = encode_cursor(rows[-1]) if len(rows) == limit else None
+    return json_page(request, [serialize_item(row, selected) for row in rows], next_cursor)
+
+from entity_graph import MAX_HOPS, MAX_NODES, build_graph, overview_seeds
+
 @app.get("/entity-graph")
-async def get_graph(
+def get_graph(
+    seed: Optional[int] = None,
+    value: Optional[str] = None,
+    type: Optional[str] = None,
+    hops: int = 1,
+    min_weight: int = 1,
+    per_node: int = 15,
+    max_nodes: int = 150,
+    max_degree: Optional[int] = None,
+    documents: int = 0,
     db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user),
-    limit: int = 50
+    current_user: User = Depends(get_current_user)
 ):
+    """
+    Entity co-occurrence graph from the precomputed entity_edges table.
+
+    With seed (entity id) or value (indicator as pasted) the k-hop
+    neighbourhood around it is returned; without, an overview grown from
+    the most mentioned entities. per_node, max_nodes and max_degree bound
+    the level of detail; documents attaches each entity's latest pages.
+    """
     try:
-        items = db.query(CrawledItem).order_by(desc(CrawledItem.timestamp)).limit(limit).all()
-        nodes = []
-        edges = []
-        
-        node_ids = set()
-        
-        for item in items:
-            doc_id = f"doc_{item.id}"
-            if doc_id not in node_ids:
-                nodes.append({
-                    "id": doc_id,
-                    "name": item.title or item.url,
-                    "group": "DOCUMENT",
-                    "url": item.url,
-                    "risk_score": item.risk_score
-                })
-                node_ids.add(doc_id)
-            
-            if item.entities and isinstance(item.entities, dict):
-                for ent_type, ent_list in item.entities.items():
-                    # Limit to specific groups to avoid noise
-                    if ent_type not in ["PERSON", "ORG", "LOC", "CRYPTO"]:
-                        continue
-                        
-                    for ent_val in ent_list:
-                        ent_id = f"ent_{ent_type}_{ent_val}"
-                        if ent_id not in node_ids:
-                            nodes.append({
-                                "id": ent_id,
-                                "name": ent_val,
-                                "group": ent_type
-                            })
-                            node_ids.add(ent_id)
-                        
-                        edges.append({
-                            "source": doc_id,
-                            "target": ent_id,
-                            "label": "MENTIONS"
-                        })
-                        
-        return {"nodes": nodes, "edges": edges}
+        if seed is not None:
+            seeds = [seed]
+        elif value:
+            seeds = [e.id for e in lookup_entities(db, value, entity_type=type, limit=5)]
+        else:
+            seeds = overview_seeds(db, count=max(1, min(max_nodes // 10, 20)), entity_type=type)
+        return build_graph(
+            db, seeds,
+            documents=max(0, min(documents, 10)),
+            hops=max(1, min(hops, MAX_HOPS)),
+            min_weight=max(1, min_weight),
+            per_node=max(1, min(per_node, 100)),
+            max_nodes=max(1, min(max_nodes, MAX_NODES)),
+            max_degree=max_degree,
+        )
     except Exception as e:
         logger.error(f"[Graph] Error: {e}")
         return JSONResponse(status_code=500, content={"message": str(e)})
 
+# --- Columnar export for offline analytics ---
+import parquet_export
+
+@app.get("/export/parquet/{table}")
+@limiter.limit("5/minute")
+def export_parquet(
+    request: Request,
+    table: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    category: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    One Parquet file of crawled_items, entity_mentions, entities or
+    entity_edges, streamed row group by row group (since/until/category
+    select the items, and their mentions)
+    """
+    if not parquet_export.available():
+        return JSONResponse(status_code=503, content={"message": "Parquet export needs pyarrow (pip install pyarrow)"})
+    if table not in parquet_export.TABLES:
+        raise HTTPException(status_code=400, detail=f"table must be one of: {', '.join(parquet_export.TABLES)}")
+    log_audit_event(current_user, "EXPORT_PARQUET", {"ip": request.client.host, "table": table, "category": category})
+
+    def generate():
+        # Own session: the request-scoped one may be closed before the body is streamed
+        from database_sql import SessionLocal
+        db = SessionLocal()
+        try:
+            yield from parquet_export.stream_parquet(db, table, since=since, until=until, category=category)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/vnd.apache.parquet",
+        headers={"Content-Disposition": f"attachment; filename={table}.parquet"},
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,187 @@
+"""
+Schema Migrations
+Versioned, idempotent schema changes tracked in SQLite's PRAGMA user_version
+"""
+
+import logging
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+
+def _sync_tables(conn):
+    """
+    Create missing tables and add columns introduced after the database was
+    first created (SQLite create_all never alters existing tables).
+    """
+    import models_sql  # noqa: F401 - registers the models on Base
+    from database_sql import Base
+
+    if not inspect(conn).get_table_names():
+        # New database: lets the compaction job return freed pages incrementally
+        conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+    Base.metadata.create_all(bind=conn)
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                col_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+
+
+def _create_fts(conn):
+    # Full-text index over crawled_items, kept in sync by triggers
+    from fts_index import ensure_fts
+    ensure_fts(conn)
+
+
+def _move_cold_content(conn):
+    # FTS now indexes main_text instead of the full text, which moves out of the row
+    from fts_index import drop_fts, ensure_fts
+    from item_store import move_inline_content
+    drop_fts(conn)
+    moved = move_inline_content(conn)
+    ensure_fts(conn)
+    if moved:
+        logger.info(f"[Migrations] Moved {moved} items to item_content; "
+                    f"run 'python migrations.py --vacuum' to reclaim the space")
+
+
+def _backfill_entities(conn):
+    from entity_index import backfill_entities
+    backfill_entities(conn)
+
+
+def _build_entity_graph(conn):
+    from entity_graph import rebuild_graph
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_entities_item_count ON entities (item_count)"))
+    rebuild_graph(conn)
+
+
+def _create_stats_counters(conn):
+    from stats_rollup import ensure_stats
+    ensure_stats(conn)
+
+
+def _backfill_trends(conn):
+    from trend_rollup import rebuild_trends
+    rebuild_trends(conn)
+
+
+def _seed_bursts(conn):
+    from burst_detector import seed_baselines
+    seed_baselines(conn)
+
+
+# (version, description, list of SQL statements or a callable taking the connection).
+# Append only; never edit a migration that has shipped.
+MIGRATIONS = [
+    (1, "FTS5 index over crawled_items", _create_fts),
+    (2, "Composite indexes for the hot crawled_items queries", [
+        # Feeds, /ws history and polling: ORDER BY / range on timestamp
+        "CREATE INDEX IF NOT EXISTS ix_crawled_items_timestamp ON crawled_items (timestamp)",
+        # /stats risk buckets (covering), risk-filtered listings
+        "CREATE INDEX IF NOT EXISTS ix_crawled_items_risk_timestamp ON crawled_items (risk_score, timestamp)",
+        # /items?category=...: equality then newest first without a sort
+        "CREATE INDEX IF NOT EXISTS ix_crawled_items_category_timestamp ON crawled_items (category, timestamp)",
+        # Daily report / /generate-report: newest high-risk findings
+        "CREATE INDEX IF NOT EXISTS ix_crawled_items_high_risk_timestamp ON crawled_items (timestamp) "
+        "WHERE risk_score >= 0.8",
+        "ANALYZE crawled_items",
+    ]),
+    (3, "Compressed raw_html/text in item_content, FTS over main_text", _move_cold_content),
+    (4, "Keyset pagination on (timestamp, id)", [
+        # ORDER BY timestamp DESC, id DESC with a (timestamp, id) row-value
+        # cursor: the id tie-break must be in the index to avoid a sort.
+        # These supersede the timestamp-only indexes of migration 2.
+        "CREATE INDEX IF NOT EXISTS ix_crawled_items_timestamp_id ON crawled_items (timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS ix_crawled_items_category_timestamp_id ON crawled_items (category, timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS ix_crawled_items_high_risk_timestamp_id ON crawled_items (timestamp, id) "
+        "WHERE risk_score >= 0.8",
+        "DROP INDEX IF EXISTS ix_crawled_items_timestamp",
+        "DROP INDEX IF EXISTS ix_crawled_items_category_timestamp",
+        "DROP INDEX IF EXISTS ix_crawled_items_high_risk_timestamp",
+        "ANALYZE crawled_items",
+    ]),
+    (5, "Backfill the entity index from crawled_items.entities", _backfill_entities),
+    (6, "Entity co-occurrence graph from entity_mentions", _build_entity_graph),
+    (7, "Trigger-maintained /stats counters", _create_stats_counters),
+    (8, "Backfill hourly/daily trend buckets from crawled_items", _backfill_trends),
+    (9, "Seed burst detection baselines from the hourly trend buckets", _seed_bursts),
+    (10, "Partial index of items still holding raw HTML (retention)", [
+        "CREATE INDEX IF NOT EXISTS ix_item_content_raw_html ON item_content (item_id) WHERE raw_html IS NOT NULL",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    return conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+
+def migrate(engine=None):
+    """
+    Bring the database schema up to date
+
+    Tables/columns declared in models_sql are synced first, then every
+    numbered migration above the stored user_version runs in its own
+    transaction and bumps the version, so an interrupted upgrade resumes
+    at the failed step.
+
+    Returns:
+        Schema version after migrating
+    """
+    if engine is None:
+        from database_sql import engine
+
+    with engine.begin() as conn:
+        _sync_tables(conn)
+        version = current_version(conn)
+
+    for number, description, steps in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as conn:
+            logger.info(f"[Migrations] Applying {number}: {description}")
+            if callable(steps):
+                steps(conn)
+            else:
+                for statement in steps:
+                    conn.execute(text(statement))
+            # PRAGMA does not take bound parameters; number is a trusted int
+            conn.execute(text(f"PRAGMA user_version = {int(number)}"))
+        version = number
+    return version
+
+
+def vacuum(engine=None):
+    """
+    Rewrite the database file to return freed pages to the OS, switching it
+    to auto_vacuum=INCREMENTAL so the compaction job can do this in small
+    steps from then on.
+
+    VACUUM may renumber the rowids of crawled_items (text primary key), so
+    the FTS index is rebuilt afterwards.
+    """
+    if engine is None:
+        from database_sql import engine
+    from fts_index import rebuild_fts
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+        conn.execute(text("VACUUM"))
+    with engine.begin() as conn:
+        rebuild_fts(conn)
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    print(f"Schema at version {migrate()} (latest {LATEST_VERSION})")
+    if "--vacuum" in sys.argv:
+        vacuum()
+        print("Database vacuumed")
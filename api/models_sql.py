@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, Text, ForeignKey, JSON, LargeBinary, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database_sql import Base
@@ -30,12 +30,12 @@ class User(Base):
 
 class CrawledItem(Base):
     __tablename__ = "crawled_items"
+    # Query indexes (timestamp, risk/category composites) are created in migrations.py
 
     id = Column(String, primary_key=True, default=generate_uuid)
     url = Column(String, index=True)
     title = Column(String)
-    text = Column(Text) # Main content
-    raw_html = Column(Text, nullable=True) # Full HTML to render layout
+    # Full visible text and raw HTML live compressed in item_content (see item_store.py)
     risk_score = Column(Float, default=0.0)
     conn_type = Column(String) # Tor or Direct
     depth = Column(Integer)
@@ -47,9 +47,172 @@ class CrawledItem(Base):
     
     # Analysis
     category = Column(String, nullable=True)
+    language = Column(String, nullable=True) # ISO 639-1 code from language detection
     entities = Column(JSON, default=list) # Extracted entities
     sentiment = Column(String, nullable=True)
     csam_flag = Column(Boolean, default=False)
+    # Boilerplate-free content fed to the models, listed and searched (FTS).
+    # Declared last: SQLite reads the small columns before it without walking
+    # this column's overflow pages.
+    main_text = Column(Text, nullable=True)
+
+
+class ItemContent(Base):
+    __tablename__ = "item_content"
+
+    item_id = Column(String, ForeignKey("crawled_items.id"), primary_key=True)
+    codec = Column(String, default="zlib")
+    raw_html = Column(LargeBinary, nullable=True) # Full HTML to render layout
+    text = Column(LargeBinary, nullable=True) # Full visible page text
+    size = Column(Integer, default=0) # Uncompressed bytes of both
+
+
+class ContentFingerprint(Base):
+    __tablename__ = "content_fingerprints"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    item_id = Column(String, ForeignKey("crawled_items.id"), index=True)
+    signature = Column(LargeBinary) # MinHash signature of the main text (64 x uint32)
+    # LSH bucket keys, one per band of the signature; near-duplicates share at least one
+    band0 = Column(Integer, index=True)
+    band1 = Column(Integer, index=True)
+    band2 = Column(Integer, index=True)
+    band3 = Column(Integer, index=True)
+    band4 = Column(Integer, index=True)
+    band5 = Column(Integer, index=True)
+    band6 = Column(Integer, index=True)
+    band7 = Column(Integer, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+
+class ItemEmbedding(Base):
+    __tablename__ = "item_embeddings"
+
+    item_id = Column(String, ForeignKey("crawled_items.id"), primary_key=True)
+    model = Column(String, primary_key=True) # Embedding model name (version)
+    dimension = Column(Integer)
+    vector = Column(LargeBinary) # float16, L2-normalized by the FAISS layer on use
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Entity(Base):
+    __tablename__ = "entities"
+    __table_args__ = (
+        UniqueConstraint("entity_type", "value", name="uq_entities_type_value"),
+        Index("ix_entities_type_count", "entity_type", "item_count"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entity_type = Column(String) # Key in CrawledItem.entities (EMAIL, CRYPTO, PERSON, ...)
+    value = Column(String, index=True) # Normalized for lookups (see entity_index.normalize_entity)
+    display_value = Column(String) # As first extracted
+    first_seen = Column(DateTime)
+    last_seen = Column(DateTime)
+    item_count = Column(Integer, default=0, index=True) # Items mentioning the entity
+    degree = Column(Integer, default=0) # Distinct co-occurring entities (entity_edges)
+
+
+class EntityMention(Base):
+    __tablename__ = "entity_mentions"
+    __table_args__ = (
+        Index("ix_entity_mentions_entity_seen", "entity_id", "seen_at", "item_id"),
+    )
+
+    entity_id = Column(Integer, ForeignKey("entities.id"), primary_key=True)
+    item_id = Column(String, ForeignKey("crawled_items.id"), primary_key=True, index=True)
+    seen_at = Column(DateTime) # Timestamp of the item
+
+
+class EntityEdge(Base):
+    __tablename__ = "entity_edges"
+    __table_args__ = (
+        Index("ix_entity_edges_source_weight", "source_id", "weight"),
+        Index("ix_entity_edges_target_weight", "target_id", "weight"),
+    )
+
+    # Undirected co-occurrence: source_id < target_id
+    source_id = Column(Integer, ForeignKey("entities.id"), primary_key=True)
+    target_id = Column(Integer, ForeignKey("entities.id"), primary_key=True)
+    weight = Column(Integer, default=0) # Items mentioning both
+    first_seen = Column(DateTime)
+    last_seen = Column(DateTime)
+
+
+class TopicCluster(Base):
+    __tablename__ = "topic_clusters"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    run_id = Column(String, index=True) # One clustering run = one set of topics
+    computed_at = Column(DateTime, default=datetime.utcnow, index=True)
+    window_start = Column(DateTime)
+    window_end = Column(DateTime)
+    cluster_no = Column(Integer)
+    label = Column(String)
+    terms = Column(JSON, default=list) # Top c-TF-IDF terms
+    size = Column(Integer)
+    daily_counts = Column(JSON, default=dict) # ISO date -> documents in the cluster
+    avg_risk = Column(Float)
+    top_category = Column(String, nullable=True)
+    sample_item_ids = Column(JSON, default=list) # Documents nearest the centroid
+
+
+class StatsCounter(Base):
+    __tablename__ = "stats_counters"
+
+    # Maintained by triggers on crawled_items (see stats_rollup.py)
+    scope = Column(String, primary_key=True) # total, risk, category, conn_type
+    key = Column(String, primary_key=True)
+    value = Column(Integer, default=0)
+
+
+class UserStats(Base):
+    __tablename__ = "user_stats"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    terms_hash = Column(String) # Watchlist the counters were built for
+    matches = Column(Integer, default=0) # Items matching any watched keyword/domain/name
+    high_risk = Column(Integer, default=0)
+    medium_risk = Column(Integer, default=0)
+    last_match_at = Column(DateTime, nullable=True)
+
+
+class TrendBucket(Base):
+    __tablename__ = "trend_buckets"
+
+    # Item counts per time bucket, updated at ingest (see trend_rollup.py)
+    granularity = Column(String, primary_key=True) # hour, day
+    dimension = Column(String, primary_key=True) # category, risk, host, entity_type, term
+    bucket_start = Column(DateTime, primary_key=True)
+    key = Column(String, primary_key=True)
+    count = Column(Integer, default=0)
+
+
+class BurstState(Base):
+    __tablename__ = "burst_state"
+
+    # Running hourly baseline of one term / wallet / category (see burst_detector.py)
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    bucket_start = Column(DateTime) # Hour being counted
+    count = Column(Integer, default=0) # Items in that hour so far
+    mean = Column(Float, default=0.0) # EWMA of closed hourly counts
+    var = Column(Float, default=0.0) # EW variance of closed hourly counts
+
+
+class TrendAnomaly(Base):
+    __tablename__ = "trend_anomalies"
+    __table_args__ = (
+        UniqueConstraint("dimension", "key", "bucket_start", name="uq_trend_anomalies_bucket"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    dimension = Column(String)
+    key = Column(String)
+    bucket_start = Column(DateTime) # Hour of the burst
+    count = Column(Integer) # Peak count seen in that hour
+    expected = Column(Float) # Baseline mean
+    zscore = Column(Float)
+    detected_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 
 class DailyReport(Base):
@@ -62,6 +225,20 @@ class DailyReport(Base):
     period = Column(String) # e.g. "last_24_hours"
 
 
+class JobRun(Base):
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        Index("ix_job_runs_job_started", "job_id", "started_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(String) # Scheduler job id
+    started_at = Column(DateTime, default=datetime.utcnow)
+    duration_ms = Column(Integer)
+    status = Column(String) # ok, error
+    detail = Column(JSON, default=dict) # Job result (rows affected...) or error message
+
+
 class SeenURL(Base):
     __tablename__ = "seen_urls"
 
@@ -0,0 +1,150 @@
+"""
+Item Listing Helpers
+Keyset cursors on (timestamp, id), field projection and compact (gzipped) JSON
+pages for /items
+"""
+
+import base64
+import gzip
+import json
+import os
+from datetime import datetime
+
+from fastapi.responses import Response
+from sqlalchemy import func, tuple_
+
+from models_sql import CrawledItem
+from search_service import SNIPPET_CHARS, make_snippet
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MAX_PAGE_SIZE = int(os.getenv("ITEMS_MAX_PAGE_SIZE", "1000"))
+# Responses above this size are gzipped for clients that accept it
+GZIP_MIN_BYTES = int(os.getenv("ITEMS_GZIP_MIN_BYTES", "4096"))
+
+# Fields a client can request with ?fields=; "text" is the item's main text
+FIELD_COLUMNS = {
+    "id": CrawledItem.id,
+    "url": CrawledItem.url,
+    "title": CrawledItem.title,
+    "risk_score": CrawledItem.risk_score,
+    "conn_type": CrawledItem.conn_type,
+    "depth": CrawledItem.depth,
+    "timestamp": CrawledItem.timestamp,
+    "category": CrawledItem.category,
+    "language": CrawledItem.language,
+    "entities": CrawledItem.entities,
+    "sentiment": CrawledItem.sentiment,
+    "csam_flag": CrawledItem.csam_flag,
+    "text": CrawledItem.main_text,
+}
+SNIPPET_FIELD = "snippet"
+DEFAULT_FIELDS = [
+    "id", "url", "title", "risk_score", "conn_type", "depth", "timestamp",
+    "category", "entities", "sentiment", "csam_flag", SNIPPET_FIELD,
+]
+
+
+def parse_fields(fields):
+    """
+    Validate a comma-separated ?fields= value
+
+    Returns:
+        Requested field names in order (DEFAULT_FIELDS when empty)
+
+    Raises:
+        ValueError: for unknown field names
+    """
+    if not fields:
+        return list(DEFAULT_FIELDS)
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in FIELD_COLUMNS and name != SNIPPET_FIELD]
+    if unknown:
+        allowed = ", ".join([*FIELD_COLUMNS, SNIPPET_FIELD])
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (allowed: {allowed})")
+    return names
+
+
+def item_columns(fields, full_text=False):
+    """
+    Columns to select for fields. id and timestamp are always selected (the
+    cursor is built from them); a snippet needs only the start of the main
+    text, cut in SQL (one extra character tells make_snippet it was cut),
+    unless full_text is set (snippet around a LIKE match).
+    """
+    names = list(dict.fromkeys(["id", "timestamp", *(f for f in fields if f != SNIPPET_FIELD)]))
+    columns = [FIELD_COLUMNS[name].label(name) for name in names]
+    if SNIPPET_FIELD in fields and "text" not in names:
+        source = CrawledItem.main_text if full_text else func.substr(CrawledItem.main_text, 1, SNIPPET_CHARS + 1)
+        columns.append(source.label("text"))
+    return columns
+
+
+def serialize_item(row, fields, q="", snippet=None):
+    """Dict of the requested fields of a row selected with item_columns()"""
+    data = {}
+    for name in fields:
+        if name == SNIPPET_FIELD:
+            data[name] = snippet if snippet is not None else make_snippet(row.text, q)
+        elif name == "timestamp":
+            data[name] = row.timestamp.isoformat() if row.timestamp else None
+        else:
+            data[name] = getattr(row, name)
+    return data
+
+
+def encode_cursor(row):
+    """Opaque cursor pointing just past row (newest-first order)"""
+    raw = json.dumps([row.timestamp.isoformat(), row.id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Returns:
+        (timestamp, id) the next page starts after
+
+    Raises:
+        ValueError: for a malformed cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, item_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), str(item_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_after(position):
+    """
+    Filter for rows older than position in ORDER BY timestamp DESC, id DESC.
+
+    A row-value comparison, so SQLite seeks the (timestamp, id) index instead
+    of skipping rows like OFFSET: every page costs the same.
+    """
+    timestamp, item_id = position
+    return tuple_(CrawledItem.timestamp, CrawledItem.id) < tuple_(timestamp, item_id)
+
+
+def _dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def json_page(request, payload, next_cursor=None):
+    """
+    Compact JSON response, gzipped when large and the client accepts gzip.
+    The cursor of the next page (if any) is sent in X-Next-Cursor.
+    """
+    body = _dumps(payload)
+    headers = {"Vary": "Accept-Encoding"}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,371 @@
+"""
+Parquet Export
+Columnar copies of crawled_items and the entity tables for offline analytics
+(pandas, DuckDB): an incremental, day/category-partitioned export job and a
+streaming single-file export, both reading the database in keyset batches
+"""
+
+import glob
+import json
+import logging
+import os
+from datetime import datetime
+from urllib.parse import quote
+
+from sqlalchemy import JSON, Boolean, DateTime, Float, Integer, LargeBinary, select, tuple_
+
+from database_sql import BASE_DIR
+from models_sql import CrawledItem, Entity, EntityEdge, EntityMention
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = os.getenv("EXPORT_DIR") or os.path.join(BASE_DIR, "exports")
+# Rows read (and written as one row group) per batch
+BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "5000"))
+# Include main_text (the bulk of an item) in exports
+INCLUDE_TEXT = os.getenv("EXPORT_INCLUDE_TEXT", "true").lower() == "true"
+COMPRESSION = "zstd"
+
+TABLES = ("crawled_items", "entity_mentions", "entities", "entity_edges")
+STATE_FILE = "_export_state.json"
+
+
+def available():
+    return pa is not None
+
+
+def _arrow_type(column):
+    column_type = column.type
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, LargeBinary):
+        return pa.binary()
+    return pa.string()  # String, Text, and JSON serialized as text
+
+
+def _columns(model, exclude=()):
+    return [column for column in model.__table__.columns if column.name not in exclude]
+
+
+def _item_columns(partitioned):
+    exclude = set() if INCLUDE_TEXT else {"main_text"}
+    if partitioned:
+        exclude.add("category")  # Encoded in the partition path
+    return _columns(CrawledItem, exclude)
+
+
+def _schema(columns):
+    return pa.schema([(column.name, _arrow_type(column)) for column in columns])
+
+
+def _to_table(rows, columns, schema):
+    data = {}
+    for i, column in enumerate(columns):
+        values = [row[i] for row in rows]
+        if isinstance(column.type, JSON):
+            values = [json.dumps(v, ensure_ascii=False) if v is not None else None for v in values]
+        data[column.name] = values
+    return pa.Table.from_pydict(data, schema=schema)
+
+
+def _iter_items(db, columns, after=None, since=None, until=None, category=None, batch_rows=BATCH_ROWS):
+    """Batches of item rows, oldest first, continuing after a (timestamp, id) position"""
+    names = [column.name for column in columns]
+    if "timestamp" not in names or "id" not in names:
+        raise ValueError("columns must include id and timestamp")
+    position = after
+    while True:
+        query = select(*columns).order_by(CrawledItem.timestamp, CrawledItem.id).limit(batch_rows)
+        if position:
+            query = query.where(tuple_(CrawledItem.timestamp, CrawledItem.id) > tuple_(*position))
+        if since:
+            query = query.where(CrawledItem.timestamp >= since)
+        if until:
+            query = query.where(CrawledItem.timestamp < until)
+        if category:
+            query = query.where(CrawledItem.category == category)
+        rows = db.execute(query).all()
+        if not rows:
+            return
+        yield rows
+        position = (rows[-1].timestamp, rows[-1].id)
+
+
+def _mentions_of(db, item_ids):
+    columns = _columns(EntityMention)
+    rows = []
+    for start in range(0, len(item_ids), 500):
+        rows += db.execute(select(*columns).where(EntityMention.item_id.in_(item_ids[start:start + 500]))).all()
+    return rows
+
+
+def _iter_table(db, model, key_columns, batch_rows=BATCH_ROWS):
+    """Batches of a whole table in primary-key order (keyset, no OFFSET)"""
+    columns = _columns(model)
+    position = None
+    while True:
+        query = select(*columns).order_by(*key_columns).limit(batch_rows)
+        if position:
+            query = query.where(tuple_(*key_columns) > tuple_(*position))
+        rows = db.execute(query).all()
+        if not rows:
+            return
+        yield rows
+        position = tuple(getattr(rows[-1], column.name) for column in key_columns)
+
+
+SNAPSHOT_TABLES = {
+    "entities": (Entity, (Entity.id,)),
+    "entity_edges": (EntityEdge, (EntityEdge.source_id, EntityEdge.target_id)),
+}
+
+
+# --- Partitioned export job ---
+
+class _PartitionWriters:
+    """
+    One open Parquet file per partition of the current run. Files are written
+    under a .tmp name and renamed when closed, so readers never see a
+    half-written file.
+    """
+
+    def __init__(self, root, schema, run):
+        self.root = root
+        self.schema = schema
+        self.name = f"part-{run:06d}.parquet"
+        self.writers = {}
+
+    def write(self, partition, table):
+        writer = self.writers.get(partition)
+        if writer is None:
+            directory = os.path.join(self.root, *(f"{key}={quote(str(value), safe='')}" for key, value in partition))
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, self.name)
+            writer = (pq.ParquetWriter(path + ".tmp", self.schema, compression=COMPRESSION), path)
+            self.writers[partition] = writer
+        writer[0].write_table(table)
+
+    def close(self, keep=None):
+        """Close every partition writer (except those for which keep(partition) is true)"""
+        for partition in list(self.writers):
+            if keep is not None and keep(partition):
+                continue
+            writer, path = self.writers.pop(partition)
+            writer.close()
+            os.replace(path + ".tmp", path)
+
+
+def _read_state(export_dir):
+    try:
+        with open(os.path.join(export_dir, STATE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"run": 0}
+
+
+def _write_state(export_dir, state):
+    path = os.path.join(export_dir, STATE_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _discard_unfinished(export_dir, run):
+    """Remove files left by an interrupted run (its state was never saved)"""
+    patterns = ("**/*.parquet.tmp", f"**/part-{run:06d}.parquet")
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(export_dir, pattern), recursive=True):
+            os.remove(path)
+
+
+def _export_snapshot(db, export_dir, table_name, run, batch_rows):
+    model, key_columns = SNAPSHOT_TABLES[table_name]
+    columns = _columns(model)
+    schema = _schema(columns)
+    directory = os.path.join(export_dir, table_name)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"part-{run:06d}.parquet")
+    rows_written = 0
+    with pq.ParquetWriter(path + ".tmp", schema, compression=COMPRESSION) as writer:
+        for rows in _iter_table(db, model, key_columns, batch_rows):
+            writer.write_table(_to_table(rows, columns, schema))
+            rows_written += len(rows)
+    os.replace(path + ".tmp", path)
+    # The new snapshot replaces the previous one
+    for old in glob.glob(os.path.join(directory, "part-*.parquet")):
+        if old != path:
+            os.remove(old)
+    return rows_written
+
+
+def export_corpus(db, export_dir=EXPORT_DIR, batch_rows=BATCH_ROWS):
+    """
+    Export items and entity mentions added since the last run, and a fresh
+    snapshot of entities and entity_edges (scheduled, or python parquet_export.py)
+
+    Layout (hive partitioning, e.g. DuckDB read_parquet(..., hive_partitioning=true)):
+        crawled_items/day=YYYY-MM-DD/category=<category>/part-<run>.parquet
+        entity_mentions/day=YYYY-MM-DD/part-<run>.parquet
+        entities/part-<run>.parquet, entity_edges/part-<run>.parquet
+
+    Each run adds new part files and never rewrites old ones; the position
+    reached is saved in _export_state.json once the run has completed.
+
+    Returns:
+        Dict of rows exported per table
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+    os.makedirs(export_dir, exist_ok=True)
+    state = _read_state(export_dir)
+    run = state.get("run", 0) + 1
+    _discard_unfinished(export_dir, run)
+
+    item_columns = _item_columns(partitioned=True)
+    item_schema = _schema(item_columns)
+    mention_columns = _columns(EntityMention)
+    mention_schema = _schema(mention_columns)
+    items = _PartitionWriters(os.path.join(export_dir, "crawled_items"), item_schema, run)
+    mentions = _PartitionWriters(os.path.join(export_dir, "entity_mentions"), mention_schema, run)
+
+    after = state.get("crawled_items")
+    if after:
+        after = (datetime.fromisoformat(after[0]), after[1])
+    counts = {"crawled_items": 0, "entity_mentions": 0}
+    # Category travels with each row for partitioning but is not stored in the file
+    select_columns = [*item_columns, CrawledItem.category]
+    try:
+        for rows in _iter_items(db, select_columns, after=after, batch_rows=batch_rows):
+            days = {}
+            partitions = {}
+            for row in rows:
+                day = row.timestamp.strftime("%Y-%m-%d")
+                days[row.id] = day
+                partitions.setdefault((("day", day), ("category", row.category or "Unknown")), []).append(row)
+            for partition, partition_rows in partitions.items():
+                items.write(partition, _to_table(partition_rows, item_columns, item_schema))
+
+            by_day = {}
+            for mention in _mentions_of(db, [row.id for row in rows]):
+                by_day.setdefault(days[mention.item_id], []).append(mention)
+            for day, day_rows in by_day.items():
+                mentions.write((("day", day),), _to_table(day_rows, mention_columns, mention_schema))
+
+            counts["crawled_items"] += len(rows)
+            counts["entity_mentions"] += sum(len(day_rows) for day_rows in by_day.values())
+            after = (rows[-1].timestamp, rows[-1].id)
+            # Rows arrive in time order: earlier days are complete
+            current_day = days[rows[-1].id]
+            items.close(keep=lambda partition: partition[0][1] >= current_day)
+            mentions.close(keep=lambda partition: partition[0][1] >= current_day)
+            logger.info(f"[Export] Exported {counts['crawled_items']} items")
+    finally:
+        items.close()
+        mentions.close()
+
+    for table_name in SNAPSHOT_TABLES:
+        counts[table_name] = _export_snapshot(db, export_dir, table_name, run, batch_rows)
+
+    state["run"] = run
+    if after:
+        state["crawled_items"] = [after[0].isoformat(), after[1]]
+    state["exported_at"] = datetime.utcnow().isoformat()
+    state["last_counts"] = counts
+    _write_state(export_dir, state)
+    logger.info(f"[Export] Run {run} written to {export_dir}: {counts}")
+    return counts
+
+
+# --- Streaming export ---
+
+class _ChunkSink:
+    """Write-only file object collecting what the Parquet writer produced since the last drain"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_parquet(db, table, since=None, until=None, category=None, batch_rows=BATCH_ROWS):
+    """
+    Generate one Parquet file of a table as a stream of byte chunks, one row
+    group per batch, so memory stays flat however many rows are exported
+
+    Args:
+        table: One of TABLES
+        since/until: Item timestamp window (crawled_items, entity_mentions)
+        category: Item category (crawled_items, entity_mentions)
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+    if table not in TABLES:
+        raise ValueError(f"table must be one of: {', '.join(TABLES)}")
+
+    if table in SNAPSHOT_TABLES:
+        model, key_columns = SNAPSHOT_TABLES[table]
+        columns = _columns(model)
+        batches = _iter_table(db, model, key_columns, batch_rows)
+    elif table == "crawled_items":
+        columns = _item_columns(partitioned=False)
+        batches = _iter_items(db, columns, since=since, until=until, category=category, batch_rows=batch_rows)
+    else:
+        columns = _columns(EntityMention)
+        item_batches = _iter_items(db, [CrawledItem.id, CrawledItem.timestamp], since=since, until=until,
+                                   category=category, batch_rows=batch_rows)
+        batches = (_mentions_of(db, [row.id for row in rows]) for rows in item_batches)
+
+    schema = _schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression=COMPRESSION)
+    try:
+        for rows in batches:
+            if rows:
+                writer.write_table(_to_table(rows, columns, schema))
+                yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+if __name__ == "__main__":
+    from database_sql import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        print(export_corpus(db))
+    finally:
+        db.close()
@@ -195,8 +195,10 @@ class ReportGenerator:
         Returns:
             Analysis text
         """
+        if not trend_data:
+            return "No significant changes in keyword activity."
         if not self.llm:
-            return "Error: LLM not initialized."
+            return self._fallback_trend_analysis(trend_data)
         
         prompt_template = PromptTemplate(
             input_variables=["trends"],
@@ -223,6 +225,21 @@ class ReportGenerator:
             logger.error(f"[ReportGen] Failed to generate trend analysis: {e}")
             return f"Error: {str(e)}"
 
+    def _fallback_trend_analysis(self, trend_data: Dict) -> str:
+        """Template commentary on the largest keyword moves (no LLM)"""
+        rising = [(k, c) for k, c in trend_data.items() if c > 0]
+        falling = [(k, c) for k, c in trend_data.items() if c < 0]
+        sentences = []
+        if rising:
+            keyword, change = max(rising, key=lambda kc: kc[1])
+            sentences.append(f"Mentions of **{keyword}** rose {change:.1f}%, the sharpest increase in the period.")
+        if falling:
+            keyword, change = min(falling, key=lambda kc: kc[1])
+            sentences.append(f"**{keyword}** activity fell {abs(change):.1f}%.")
+        if not sentences:
+            sentences.append("Keyword activity was stable compared with the previous period.")
+        return " ".join(sentences)
+
 
 # Global instance
 _report_generator = None
@@ -0,0 +1,240 @@
+"""
+Retention and Compaction
+Policies that keep the database bounded in a long-running deployment: old
+low-risk raw HTML is dropped, old items are archived to compressed files and
+deleted, expired rollup rows are pruned, and freed pages are returned to the
+OS (incremental vacuum) with the planner statistics refreshed (ANALYZE)
+"""
+
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, bindparam, text
+
+from database_sql import BASE_DIR
+from item_store import decompress
+from models_sql import CrawledItem, ItemContent
+from stats_rollup import WatchlistCounter, watch_text
+from trend_rollup import MAX_DAYS as TREND_MAX_DAYS
+
+logger = logging.getLogger(__name__)
+
+# Raw HTML of items below this risk is dropped after this many days (0 disables);
+# the main and full text are kept
+RAW_HTML_DAYS = int(os.getenv("RETENTION_RAW_HTML_DAYS", "14"))
+RAW_HTML_MAX_RISK = float(os.getenv("RETENTION_RAW_HTML_MAX_RISK", "0.5"))
+# Items older than this many days are written to ARCHIVE_DIR and deleted (0 disables)
+ARCHIVE_AFTER_DAYS = int(os.getenv("RETENTION_ARCHIVE_AFTER_DAYS", "0"))
+ARCHIVE_DIR = os.getenv("RETENTION_ARCHIVE_DIR") or os.path.join(BASE_DIR, "archive")
+# Freed pages returned to the OS per compaction run
+VACUUM_PAGES = int(os.getenv("VACUUM_PAGES_PER_RUN", "20000"))
+
+ANOMALY_DAYS = 90
+JOB_RUN_DAYS = 30
+BATCH_SIZE = 500
+
+
+def drop_raw_html(db, days=RAW_HTML_DAYS, max_risk=RAW_HTML_MAX_RISK, batch_size=BATCH_SIZE):
+    """
+    Clear the stored raw HTML of items older than days with a risk below max_risk
+
+    Only rows still holding HTML are visited (partial index
+    ix_item_content_raw_html; CROSS JOIN keeps item_content the outer loop),
+    so the cost follows the recent intake rather than the corpus size.
+
+    Returns:
+        Number of items whose HTML was dropped
+    """
+    if days <= 0:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    statement = text("""
+        UPDATE item_content SET raw_html = NULL WHERE item_id IN (
+            SELECT c.item_id FROM item_content c CROSS JOIN crawled_items i ON i.id = c.item_id
+            WHERE c.raw_html IS NOT NULL AND i.timestamp < :cutoff AND COALESCE(i.risk_score, 0) < :max_risk
+            LIMIT :limit
+        )
+    """).bindparams(bindparam("cutoff", type_=DateTime))
+    dropped = 0
+    while True:
+        count = db.execute(statement, {"cutoff": cutoff, "max_risk": max_risk, "limit": batch_size}).rowcount
+        db.commit()
+        dropped += count
+        if count < batch_size:
+            break
+    if dropped:
+        logger.info(f"[Retention] Dropped raw HTML of {dropped} items older than {days} days")
+    return dropped
+
+
+def delete_items(db, item_ids):
+    """
+    Delete items with their content, fingerprints, embeddings and entity
+    mentions (caller commits). FTS rows and /stats counters follow through
+    their triggers; trend buckets, entity edges and FAISS vectors are kept
+    as history (semantic search skips ids that no longer exist).
+    """
+    if not item_ids:
+        return 0
+    ids = {"ids": list(item_ids)}
+    expanding = bindparam("ids", expanding=True)
+    db.execute(text("""
+        UPDATE entities SET item_count = item_count -
+            (SELECT COUNT(*) FROM entity_mentions m WHERE m.entity_id = entities.id AND m.item_id IN :ids)
+        WHERE id IN (SELECT entity_id FROM entity_mentions WHERE item_id IN :ids)
+    """).bindparams(expanding), ids)
+    for table in ("entity_mentions", "item_content", "content_fingerprints", "item_embeddings"):
+        db.execute(text(f"DELETE FROM {table} WHERE item_id IN :ids").bindparams(expanding), ids)
+    return db.execute(text("DELETE FROM crawled_items WHERE id IN :ids").bindparams(expanding), ids).rowcount
+
+
+def _archive_record(item, content):
+    record = {column.name: getattr(item, column.name) for column in CrawledItem.__table__.columns}
+    record["timestamp"] = item.timestamp.isoformat() if item.timestamp else None
+    record["raw_html"] = decompress(content.raw_html) if content else ""
+    record["text"] = decompress(content.text) if content else ""
+    return record
+
+
+def archive_items(db, days=ARCHIVE_AFTER_DAYS, archive_dir=ARCHIVE_DIR, batch_size=BATCH_SIZE):
+    """
+    Move items older than days out of the database into one gzipped JSON
+    Lines file per month (<archive_dir>/items-YYYY-MM.jsonl.gz, appended
+    run after run). A batch is deleted only after its file is flushed to disk,
+    and taken out of the per-user watchlist counters in the same transaction.
+
+    Returns:
+        Number of items archived
+    """
+    if days <= 0:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    os.makedirs(archive_dir, exist_ok=True)
+    watchlists = WatchlistCounter(db)
+    archived = 0
+    while True:
+        items = (
+            db.query(CrawledItem)
+            .filter(CrawledItem.timestamp < cutoff)
+            .order_by(CrawledItem.timestamp, CrawledItem.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not items:
+            break
+        contents = {
+            c.item_id: c for c in
+            db.query(ItemContent).filter(ItemContent.item_id.in_([item.id for item in items]))
+        }
+        by_month = {}
+        for item in items:
+            by_month.setdefault(item.timestamp.strftime("%Y-%m"), []).append(item)
+        for month, month_items in by_month.items():
+            path = os.path.join(archive_dir, f"items-{month}.jsonl.gz")
+            # Each append is a new gzip member; readers see one continuous stream
+            with open(path, "ab") as raw:
+                with gzip.open(raw, "wt", encoding="utf-8") as f:
+                    for item in month_items:
+                        f.write(json.dumps(_archive_record(item, contents.get(item.id)), default=str) + "\n")
+                raw.flush()
+                os.fsync(raw.fileno())
+
+        for item in items:
+            watchlists.forget(watch_text(item.title, item.main_text, item.url), item.risk_score)
+        db.expunge_all()
+        delete_items(db, [item.id for item in items])
+        db.commit()
+        archived += len(items)
+        logger.info(f"[Retention] Archived {archived} items older than {days} days to {archive_dir}")
+
+    return archived
+
+
+def prune_rollups(db):
+    """
+    Delete hourly trend buckets older than the longest hourly query, and old
+    anomalies and job runs
+
+    Returns:
+        Dict of table -> rows deleted
+    """
+    now = datetime.utcnow()
+    policies = {
+        "trend_buckets": ("granularity = 'hour' AND bucket_start < :cutoff", TREND_MAX_DAYS["hour"] + 1),
+        "trend_anomalies": ("detected_at < :cutoff", ANOMALY_DAYS),
+        "job_runs": ("started_at < :cutoff", JOB_RUN_DAYS),
+    }
+    deleted = {}
+    for table, (condition, days) in policies.items():
+        statement = text(f"DELETE FROM {table} WHERE {condition}").bindparams(bindparam("cutoff", type_=DateTime))
+        deleted[table] = db.execute(statement, {"cutoff": now - timedelta(days=days)}).rowcount
+    db.commit()
+    return deleted
+
+
+def apply_retention(db):
+    """
+    Run every retention policy (scheduled daily)
+
+    Returns:
+        Dict of what was removed, recorded with the job run
+    """
+    return {
+        "raw_html_dropped": drop_raw_html(db),
+        "items_archived": archive_items(db),
+        "pruned": prune_rollups(db),
+    }
+
+
+def compact(engine=None, pages=VACUUM_PAGES):
+    """
+    Return up to pages free pages to the OS and refresh planner statistics
+    (scheduled daily, after retention)
+
+    Incremental vacuum needs auto_vacuum=INCREMENTAL, which new databases
+    get at creation; older ones switch with a one-off full
+    'python migrations.py --vacuum'.
+
+    Returns:
+        Dict of page counts before and after
+    """
+    if engine is None:
+        from database_sql import engine
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        def pragma(name):
+            return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+        before = {"pages": pragma("page_count"), "free_pages": pragma("freelist_count")}
+        incremental = pragma("auto_vacuum") == 2
+        if incremental and before["free_pages"]:
+            # The pragma frees one page per step and returns no rows, so
+            # execute() would stop after the first page; executescript runs it out
+            conn.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        # Sampled ANALYZE: bounded cost however large the tables grow
+        conn.execute(text("PRAGMA analysis_limit = 1000"))
+        conn.execute(text("ANALYZE"))
+        after = {"pages": pragma("page_count"), "free_pages": pragma("freelist_count")}
+
+    if not incremental and before["free_pages"]:
+        logger.warning(f"[Retention] {before['free_pages']} free pages not reclaimable: auto_vacuum is off, "
+                       f"run 'python migrations.py --vacuum' once to enable incremental vacuum")
+    logger.info(f"[Retention] Compacted: {before['pages']} -> {after['pages']} pages")
+    return {"before": before, "after": after, "incremental": incremental}
+
+
+if __name__ == "__main__":
+    import sys
+    from database_sql import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        print(apply_retention(db))
+    finally:
+        db.close()
+    if "--compact" in sys.argv:
+        print(compact())
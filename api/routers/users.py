@@ -1,10 +1,11 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Body
 from sqlalchemy.orm import Session
 from database_sql import get_db
 from models_sql import User
 from auth_deps import get_current_user, get_admin_user
 from auth import get_password_hash, validate_password_complexity, verify_password
+from stats_rollup import refresh_user_stats
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 from datetime import datetime
@@ -80,6 +81,7 @@ async def update_user_me(
 
 @router.post("/me/targets")
 async def add_target_domain(
+    background_tasks: BackgroundTasks,
     target: dict = Body(..., embed=False), # Expect {"target": "example.onion"}
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -95,11 +97,13 @@ async def add_target_domain(
     current_assets["monitored_domains"] = list(targets)
     current_user.assets = current_assets
     db.commit()
+    background_tasks.add_task(refresh_user_stats, current_user.id)
     
     return {"status": "success", "message": f"Added target {domain}", "targets": list(targets)}
 
 @router.delete("/me/targets")
 async def remove_target_domain(
+    background_tasks: BackgroundTasks,
     target: dict = Body(..., embed=False), # Expect {"target": "example.onion"}
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -116,6 +120,7 @@ async def remove_target_domain(
         current_assets["monitored_domains"] = list(targets)
         current_user.assets = current_assets
         db.commit()
+        background_tasks.add_task(refresh_user_stats, current_user.id)
         
     return {"status": "success", "message": f"Removed target {domain}", "targets": list(targets)}
 
@@ -4,16 +4,28 @@ Uses APScheduler to run background jobs
 """
 
 import logging
+import os
+import time
 from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy import desc
 from database_sql import SessionLocal
-from models_sql import CrawledItem, DailyReport, SeenURL
+from models_sql import CrawledItem, DailyReport, JobRun, SeenURL
+from item_store import SUMMARY_COLUMNS
 from report_generator import ReportGenerator # Instantiate directly
+from topic_clustering import cluster_topics
+from trend_rollup import trend_changes
+from retention import apply_retention, compact
+import parquet_export
 
 logger = logging.getLogger(__name__)
 
+TOPIC_CLUSTER_HOURS = int(os.getenv("TOPIC_CLUSTER_HOURS", "6"))
+# Incremental Parquet export for analytics (0 disables)
+EXPORT_HOURS = int(os.getenv("EXPORT_HOURS", "24"))
+
 class TaskScheduler:
     """Manages automated background tasks"""
     
@@ -25,7 +37,8 @@ class TaskScheduler:
         try:
             # Job 1: Generate daily report at 9 AM
             self.scheduler.add_job(
-                func=self.generate_daily_report,
+                func=self._run,
+                args=['daily_report', self.generate_daily_report],
                 trigger=CronTrigger(hour=9, minute=0),
                 id='daily_report',
                 name='Generate Daily Intelligence Report',
@@ -34,15 +47,60 @@ class TaskScheduler:
             
             # Job 2: Cleanup old seen_urls (older than 30 days) at 2 AM
             self.scheduler.add_job(
-                func=self.cleanup_old_urls,
+                func=self._run,
+                args=['cleanup_urls', self.cleanup_old_urls],
                 trigger=CronTrigger(hour=2, minute=0),
                 id='cleanup_urls',
                 name='Cleanup Old Seen URLs',
                 replace_existing=True
             )
             
+            # Job 3: Re-cluster recent documents into topics for /trending
+            self.scheduler.add_job(
+                func=self._run,
+                args=['topic_clustering', cluster_topics],
+                trigger=IntervalTrigger(hours=TOPIC_CLUSTER_HOURS),
+                id='topic_clustering',
+                name='Cluster Recent Documents into Topics',
+                next_run_time=datetime.now(),
+                replace_existing=True
+            )
+
+            # Job 4: Retention policies (old raw HTML, archival, rollup pruning) at 3 AM
+            self.scheduler.add_job(
+                func=self._run,
+                args=['retention', self.apply_retention],
+                trigger=CronTrigger(hour=3, minute=0),
+                id='retention',
+                name='Apply Retention Policies',
+                replace_existing=True
+            )
+
+            # Job 5: Incremental vacuum and ANALYZE at 4 AM, once retention has freed pages
+            self.scheduler.add_job(
+                func=self._run,
+                args=['compaction', compact],
+                trigger=CronTrigger(hour=4, minute=0),
+                id='compaction',
+                name='Compact Database',
+                replace_existing=True
+            )
+
+            # Job 6: Incremental Parquet export of new items and the entity tables
+            if EXPORT_HOURS > 0 and parquet_export.available():
+                self.scheduler.add_job(
+                    func=self._run,
+                    args=['parquet_export', self.export_parquet],
+                    trigger=IntervalTrigger(hours=EXPORT_HOURS),
+                    id='parquet_export',
+                    name='Export Corpus to Parquet',
+                    replace_existing=True
+                )
+            elif EXPORT_HOURS > 0:
+                logger.info("[Scheduler] pyarrow not installed, Parquet export job disabled")
+
             self.scheduler.start()
-            logger.info("[Scheduler] Started with 2 jobs")
+            logger.info(f"[Scheduler] Started with {len(self.scheduler.get_jobs())} jobs")
             self._log_next_runs()
             
         except Exception as e:
@@ -55,7 +113,7 @@ class TaskScheduler:
             logger.info("[Scheduler] Starting daily report generation...")
             
             # Query high risk docs
-            high_risk_docs = db.query(CrawledItem).filter(
+            high_risk_docs = db.query(*SUMMARY_COLUMNS).filter(
                 CrawledItem.risk_score >= 0.8
             ).order_by(desc(CrawledItem.timestamp)).limit(50).all()
             
@@ -64,13 +122,16 @@ class TaskScheduler:
                 return
             
             # Convert for ReportGenerator
-            docs_dicts = [item.__dict__ for item in high_risk_docs]
-            for d in docs_dicts:
-                d.pop('_sa_instance_state', None)
+            docs_dicts = [row._asdict() for row in high_risk_docs]
 
             # Generate report
             report_gen = ReportGenerator()
             summary = report_gen.create_executive_summary(docs_dicts)
+
+            # Week-over-week dark-web term movement from the trend rollups
+            changes = trend_changes(db, dimension="term", days=7)
+            if changes:
+                summary += "\n\n### Trend Analysis\n" + report_gen.create_trend_analysis(changes)
             
             # Save to database
             report = DailyReport(
@@ -85,6 +146,7 @@ class TaskScheduler:
             
         except Exception as e:
             logger.error(f"[Scheduler] Daily report failed: {e}")
+            raise  # recorded as a failed run by _run
         finally:
             db.close()
     
@@ -107,9 +169,50 @@ class TaskScheduler:
             
         except Exception as e:
             logger.error(f"[Scheduler] Cleanup failed: {e}")
+            raise  # recorded as a failed run by _run
         finally:
             db.close()
     
+    def apply_retention(self):
+        """Drop old raw HTML, archive old items and prune expired rollup rows"""
+        db = SessionLocal()
+        try:
+            return apply_retention(db)
+        finally:
+            db.close()
+
+    def export_parquet(self):
+        """Write items added since the last export, and entity snapshots, to Parquet"""
+        db = SessionLocal()
+        try:
+            return parquet_export.export_corpus(db)
+        finally:
+            db.close()
+
+    def _run(self, job_id, func):
+        """Run a job and record its duration and outcome in job_runs"""
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        status, detail = "ok", {}
+        try:
+            result = func()
+            if isinstance(result, dict):
+                detail = result
+        except Exception as e:
+            status, detail = "error", {"error": str(e)}
+            logger.error(f"[Scheduler] Job {job_id} failed: {e}")
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        logger.info(f"[Scheduler] Job {job_id} finished in {duration_ms} ms ({status})")
+
+        db = SessionLocal()
+        try:
+            db.add(JobRun(job_id=job_id, started_at=started_at, duration_ms=duration_ms, status=status, detail=detail))
+            db.commit()
+        except Exception as e:
+            logger.error(f"[Scheduler] Failed to record run of {job_id}: {e}")
+        finally:
+            db.close()
+
     def _log_next_runs(self):
         """Log next scheduled run times"""
         jobs = self.scheduler.get_jobs()
@@ -123,6 +226,37 @@ class TaskScheduler:
             logger.info("[Scheduler] Shutdown complete")
 
 
+def job_metrics(db, runs=20):
+    """
+    Duration metrics per scheduled job
+
+    Returns:
+        Dict of job id -> last run, and average/max duration of the last runs
+    """
+    metrics = {}
+    for (job_id,) in db.query(JobRun.job_id).distinct():
+        recent = (
+            db.query(JobRun)
+            .filter(JobRun.job_id == job_id)
+            .order_by(desc(JobRun.started_at))
+            .limit(runs)
+            .all()
+        )
+        durations = [r.duration_ms or 0 for r in recent]
+        last = recent[0]
+        metrics[job_id] = {
+            "last_run": last.started_at.isoformat() if last.started_at else None,
+            "last_status": last.status,
+            "last_duration_ms": last.duration_ms,
+            "last_detail": last.detail,
+            "avg_duration_ms": round(sum(durations) / len(durations)),
+            "max_duration_ms": max(durations),
+            "errors": sum(r.status != "ok" for r in recent),
+            "runs": len(recent),
+        }
+    return metrics
+
+
 # Global scheduler instance
 _scheduler = None
 
@@ -0,0 +1,216 @@
+"""
+Hybrid Search Service
+Runs lexical and semantic retrieval in parallel and merges them with reciprocal rank fusion
+"""
+
+import asyncio
+import html
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, desc, or_
+from sqlalchemy.exc import OperationalError
+
+from database_sql import SessionLocal
+from fts_index import search_fts
+from item_store import summary_only
+from models_sql import CrawledItem
+from semantic_search import get_semantic_search
+
+logger = logging.getLogger(__name__)
+
+# Total time a hybrid query may take; a retriever that misses it is dropped
+SEARCH_BUDGET_MS = int(os.getenv("SEARCH_BUDGET_MS", "400"))
+# Candidates taken from each retriever before fusion
+CANDIDATES_PER_RETRIEVER = 100
+# RRF constant from Cormack et al.; damps the weight of the very top ranks
+RRF_K = 60
+SNIPPET_CHARS = 160
+
+TERM_RE = re.compile(r"\S+")
+
+
+class HybridSearchService:
+    """
+    One ranked result list for exact indicators and fuzzy concepts.
+
+    The lexical retriever matches every query term literally (wallets, handles,
+    onion addresses); the semantic retriever finds pages about the same thing
+    in other words. Both run concurrently in worker threads with their own DB
+    session, and reciprocal rank fusion merges the two rankings without having
+    to calibrate their scores against each other.
+    """
+
+    def __init__(self, budget_ms=SEARCH_BUDGET_MS, rrf_k=RRF_K):
+        """
+        Args:
+            budget_ms: Latency budget for the whole query
+            rrf_k: Reciprocal rank fusion constant
+        """
+        self.budget_ms = budget_ms
+        self.rrf_k = rrf_k
+
+    # --- Retrievers ---
+
+    def _filters(self, query, category, min_risk, since, until):
+        if category and category != "All":
+            query = query.filter(CrawledItem.category == category)
+        if min_risk:
+            query = query.filter(CrawledItem.risk_score >= min_risk)
+        if since:
+            query = query.filter(CrawledItem.timestamp >= since)
+        if until:
+            query = query.filter(CrawledItem.timestamp <= until)
+        return query
+
+    def lexical(self, q, limit=CANDIDATES_PER_RETRIEVER, category=None, min_risk=None, since=None, until=None):
+        """Items containing every query term, BM25-ranked via FTS5 (LIKE fallback)"""
+        terms = TERM_RE.findall(q)
+        if not terms:
+            return []
+        db = SessionLocal()
+        try:
+            try:
+                hits = search_fts(db, q, limit=limit, category=category, min_risk=min_risk,
+                                  since=since, until=until)
+            except OperationalError as e:
+                logger.warning(f"[Search] Full-text index unavailable, falling back to LIKE: {e}")
+                db.rollback()
+            else:
+                items = {
+                    item.id: item for item in
+                    db.query(CrawledItem).options(summary_only(CrawledItem.main_text))
+                    .filter(CrawledItem.id.in_([item_id for item_id, _, _ in hits])).all()
+                }
+                for item_id, _, snippet in hits:
+                    if item_id in items:
+                        items[item_id].fts_snippet = snippet
+                return [items[item_id] for item_id, _, _ in hits if item_id in items]
+
+            query = db.query(CrawledItem).options(summary_only(CrawledItem.main_text))
+            query = query.filter(and_(*(
+                or_(
+                    CrawledItem.title.ilike(f"%{term}%"),
+                    CrawledItem.main_text.ilike(f"%{term}%"),
+                    CrawledItem.url.ilike(f"%{term}%"),
+                )
+                for term in terms
+            )))
+            query = self._filters(query, category, min_risk, since, until)
+            return query.order_by(desc(CrawledItem.timestamp)).limit(limit).all()
+        finally:
+            db.close()
+
+    def semantic(self, q, limit=CANDIDATES_PER_RETRIEVER, category=None, min_risk=None, since=None, until=None):
+        """Items closest to the query embedding"""
+        db = SessionLocal()
+        try:
+            results = get_semantic_search().search_text(
+                db, q, limit=limit, category=category, min_risk=min_risk, since=since, until=until
+            )
+            return [item for item, _ in results]
+        finally:
+            db.close()
+
+    # --- Fusion ---
+
+    def fuse(self, rankings: Dict[str, List[CrawledItem]]):
+        """
+        Reciprocal rank fusion: score(d) = sum over retrievers of 1 / (k + rank)
+
+        Returns:
+            List of (item, score, [retriever names]) sorted by fused score
+        """
+        fused = {}
+        for name, items in rankings.items():
+            for rank, item in enumerate(items, start=1):
+                entry = fused.setdefault(item.id, [item, 0.0, []])
+                entry[1] += 1.0 / (self.rrf_k + rank)
+                entry[2].append(name)
+        return sorted((tuple(e) for e in fused.values()), key=lambda e: e[1], reverse=True)
+
+    async def search(
+        self,
+        q: str,
+        limit: int = 20,
+        category: Optional[str] = None,
+        min_risk: Optional[float] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ):
+        """
+        Run both retrievers concurrently within the latency budget and fuse them
+
+        Returns:
+            (results, partial) where results is a list of (item, score, matched_by)
+            and partial is True if a retriever failed or missed the budget
+        """
+        filters = dict(category=category, min_risk=min_risk, since=since, until=until)
+        retrievers = {"lexical": self.lexical, "semantic": self.semantic}
+        tasks = {
+            name: asyncio.create_task(asyncio.to_thread(fn, q, **filters))
+            for name, fn in retrievers.items()
+        }
+        done, pending = await asyncio.wait(tasks.values(), timeout=self.budget_ms / 1000)
+        for task in pending:
+            task.cancel()  # the thread finishes on its own; its result is ignored
+
+        rankings = {}
+        partial = bool(pending)
+        for name, task in tasks.items():
+            if task not in done:
+                logger.warning(f"[Search] {name} retriever missed the {self.budget_ms}ms budget")
+                continue
+            if task.exception():
+                logger.error(f"[Search] {name} retriever failed: {task.exception()}")
+                partial = True
+                continue
+            rankings[name] = task.result()
+
+        return self.fuse(rankings)[:limit], partial
+
+
+def make_snippet(text: Optional[str], q: str, width: int = SNIPPET_CHARS) -> str:
+    """
+    HTML-escaped window of text around the first query term, with terms
+    wrapped in <mark>
+
+    Falls back to the start of the text when no term occurs literally
+    (semantic-only matches).
+    """
+    if not text:
+        return ""
+    terms = sorted({t for t in TERM_RE.findall(q) if t}, key=len, reverse=True)
+    pattern = re.compile("|".join(re.escape(t) for t in terms), re.I) if terms else None
+
+    match = pattern.search(text) if pattern else None
+    start = max(0, match.start() - width // 3) if match else 0
+    window = text[start:start + width]
+    if pattern:
+        # Page text is untrusted: escape everything but the highlight tags
+        parts, last = [], 0
+        for m in pattern.finditer(window):
+            parts.append(html.escape(window[last:m.start()]))
+            parts.append(f"<mark>{html.escape(m.group(0))}</mark>")
+            last = m.end()
+        parts.append(html.escape(window[last:]))
+        window = "".join(parts)
+    else:
+        window = html.escape(window)
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if start + width < len(text) else ""
+    return f"{prefix}{window}{suffix}"
+
+
+# Global service instance
+_hybrid_search = None
+
+def get_hybrid_search():
+    """Get or create global hybrid search service"""
+    global _hybrid_search
+    if _hybrid_search is None:
+        _hybrid_search = HybridSearchService()
+    return _hybrid_search
@@ -0,0 +1,191 @@
+"""
+Semantic Search Service
+Nearest-neighbour search over the crawler's FAISS shards, hydrated from crawled_items
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from item_store import summary_only
+from models_sql import CrawledItem, ItemEmbedding
+
+# The FAISS shards and the embedding model live in the crawler package, put
+# on sys.path by bootstrap.configure_paths() at startup
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for new checkpoints / log records written by the crawler
+REFRESH_INTERVAL = float(os.getenv("SEMANTIC_REFRESH_SECONDS", "30"))
+# Neighbours fetched per requested result, so filters can drop some and still fill the page
+OVERFETCH = 4
+MAX_CANDIDATES = 1000
+
+
+@lru_cache(maxsize=256)
+def _embed_query(text: str, model: str) -> Tuple[float, ...]:
+    from crawler.ai.sentencetransformer import get_embedding
+    return tuple(get_embedding(text, model_name=model))
+
+
+class SemanticSearchService:
+    """
+    Read-only view of the sharded FAISS index for the API.
+
+    Shards are memory-mapped, so every API worker shares the page cache with
+    the crawler instead of holding its own copy of the vectors. Results are
+    hydrated with a single IN query that also applies the filters; the search
+    over-fetches and widens until the page is full or MAX_CANDIDATES is hit.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._active = None
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+
+    @property
+    def active(self):
+        """Live embedding model / index directory (switched by the re-embedding job)"""
+        from crawler.ai.embedding_registry import active_embedding
+        return active_embedding()
+
+    def _current_index(self):
+        """Open or refresh the index; caller holds self._lock"""
+        active = self.active
+        if self._index is None or active != self._active:
+            from crawler.ai.embedding_registry import open_active_index
+            self._index = open_active_index(read_only=True)
+            self._active = active
+            self._last_refresh = time.monotonic()
+        elif time.monotonic() - self._last_refresh >= REFRESH_INTERVAL:
+            self._index.refresh()
+            self._last_refresh = time.monotonic()
+        return self._index
+
+    @property
+    def index(self):
+        with self._lock:
+            return self._current_index()
+
+    def _search(self, embedding, k, since: Optional[datetime], until: Optional[datetime]):
+        """
+        Nearest neighbours within the time window, read under the lock so a
+        refresh cannot swap a shard's index and id map halfway through a query
+
+        Returns:
+            List of (document_id, score), or None when the embedding does not
+            fit the index (e.g. query embedded just before a model switch)
+        """
+        with self._lock:
+            index = self._current_index()
+            if not embedding or len(embedding) != index.dimension:
+                return None
+            # Skip shards entirely outside the requested time window
+            keys = index.shard_keys()
+            if since:
+                keys = [key for key in keys if key >= index.shard_key(since)]
+            if until:
+                keys = [key for key in keys if key <= index.shard_key(until)]
+            if not keys:
+                return []
+            return index.search_similar(embedding, k=k, threshold=-1.0, shards=keys)
+
+    def search_vector(
+        self,
+        db: Session,
+        embedding,
+        limit: int = 20,
+        category: Optional[str] = None,
+        min_risk: Optional[float] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        exclude_id: Optional[str] = None,
+    ) -> List[Tuple[CrawledItem, float]]:
+        """
+        Find the items closest to an embedding
+
+        Args:
+            db: Database session
+            embedding: Query vector
+            limit: Maximum number of results
+            category: Only items with this category
+            min_risk: Only items with risk_score >= min_risk
+            since / until: Only items crawled in this time window
+            exclude_id: Item to leave out (the query item itself)
+
+        Returns:
+            List of (CrawledItem, cosine similarity), most similar first
+        """
+        k = min(limit * OVERFETCH + 1, MAX_CANDIDATES)
+        while True:
+            hits = self._search(embedding, k, since, until)
+            if not hits:
+                return []
+            scores = {}
+            for doc_id, score in hits:
+                if doc_id != exclude_id and doc_id not in scores:
+                    scores[doc_id] = score
+
+            query = (
+                db.query(CrawledItem)
+                .options(summary_only(CrawledItem.main_text))
+                .filter(CrawledItem.id.in_(list(scores)))
+            )
+            if category and category != "All":
+                query = query.filter(CrawledItem.category == category)
+            if min_risk:
+                query = query.filter(CrawledItem.risk_score >= min_risk)
+            if since:
+                query = query.filter(CrawledItem.timestamp >= since)
+            if until:
+                query = query.filter(CrawledItem.timestamp <= until)
+            items = query.all()
+
+            # Widen the search when filters removed too much of the candidate list
+            if len(items) >= limit or len(hits) < k or k >= MAX_CANDIDATES:
+                break
+            k = min(k * 4, MAX_CANDIDATES)
+
+        ranked = sorted(((item, scores[item.id]) for item in items), key=lambda r: r[1], reverse=True)
+        return ranked[:limit]
+
+    def search_text(self, db: Session, q: str, limit: int = 20, **filters):
+        """Embed a free-text query (cached) and search for it"""
+        embedding = list(_embed_query(q.strip(), self.active["model"]))
+        return self.search_vector(db, embedding, limit=limit, **filters)
+
+    def similar_to_item(self, db: Session, item: CrawledItem, limit: int = 10, **filters):
+        """Find items similar to a stored item (the item itself is excluded)"""
+        from crawler.ai.embedding_registry import embeds_language, from_blob
+        model = self.active["model"]
+        if not embeds_language(model, item.language):
+            return []  # not embedded: outside the model's languages
+        stored = (
+            db.query(ItemEmbedding.vector)
+            .filter(ItemEmbedding.item_id == item.id, ItemEmbedding.model == model, ItemEmbedding.dimension > 0)
+            .scalar()
+        )
+        if stored:
+            embedding = from_blob(stored).tolist()
+        else:
+            from crawler.ai.sentencetransformer import get_embedding
+            embedding = get_embedding(item.main_text or "", model_name=model)
+        return self.search_vector(db, embedding, limit=limit, exclude_id=item.id, **filters)
+
+
+# Global service instance
+_semantic_search = None
+
+def get_semantic_search():
+    """Get or create global semantic search service"""
+    global _semantic_search
+    if _semantic_search is None:
+        _semantic_search = SemanticSearchService()
+    return _semantic_search
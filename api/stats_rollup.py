@@ -0,0 +1,312 @@
+"""
+Stats Rollup
+Dashboard counters kept current at write time: global counts by triggers on
+crawled_items, per-user watchlist counts by the crawler pipeline
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import DateTime, bindparam, literal_column, select, text
+
+from database_sql import SessionLocal
+from keyword_engine import KeywordEngine
+from models_sql import CrawledItem, StatsCounter, User, UserStats
+
+logger = logging.getLogger(__name__)
+
+HIGH_RISK = 0.8
+MEDIUM_RISK = 0.5
+# Pipeline: seconds between re-reading users' watchlists
+WATCHLIST_REFRESH_SECONDS = float(os.getenv("WATCHLIST_REFRESH_SECONDS", "60"))
+
+_RISK_BAND = (
+    "CASE WHEN {row}.risk_score >= {high} THEN 'high' "
+    "WHEN {row}.risk_score >= {medium} THEN 'medium' ELSE 'low' END"
+)
+# scope -> SQL expression of the counter key for a crawled_items row
+_SCOPES = {
+    "total": lambda row: "''",
+    "risk": lambda row: _RISK_BAND.format(row=row, high=HIGH_RISK, medium=MEDIUM_RISK),
+    "category": lambda row: f"COALESCE({row}.category, 'Unknown')",
+    "conn_type": lambda row: f"COALESCE({row}.conn_type, 'Unknown')",
+}
+
+
+def risk_band(risk_score):
+    """high / medium / low, the same bands as the counter triggers"""
+    risk_score = risk_score or 0.0
+    if risk_score >= HIGH_RISK:
+        return "high"
+    return "medium" if risk_score >= MEDIUM_RISK else "low"
+
+
+def _bump(scope, row, delta):
+    key = _SCOPES[scope](row)
+    return (
+        f"INSERT INTO stats_counters (scope, key, value) VALUES ('{scope}', {key}, {delta}) "
+        f"ON CONFLICT(scope, key) DO UPDATE SET value = value + ({delta});"
+    )
+
+
+STATS_DDL = [
+    "CREATE TRIGGER IF NOT EXISTS stats_counters_ai AFTER INSERT ON crawled_items BEGIN\n"
+    + "\n".join(_bump(scope, "new", 1) for scope in _SCOPES)
+    + "\nEND",
+    "CREATE TRIGGER IF NOT EXISTS stats_counters_ad AFTER DELETE ON crawled_items BEGIN\n"
+    + "\n".join(_bump(scope, "old", -1) for scope in _SCOPES)
+    + "\nEND",
+    "CREATE TRIGGER IF NOT EXISTS stats_counters_au AFTER UPDATE OF risk_score, category, conn_type "
+    "ON crawled_items BEGIN\n"
+    + "\n".join(_bump(scope, "old", -1) + "\n" + _bump(scope, "new", 1) for scope in _SCOPES if scope != "total")
+    + "\nEND",
+]
+
+
+def ensure_stats(conn):
+    """Create the counter triggers and fill the counters from the current rows"""
+    for statement in STATS_DDL:
+        conn.execute(text(statement))
+    rebuild_stats(conn)
+
+
+def rebuild_stats(conn):
+    """Recount every counter from crawled_items (one scan)"""
+    conn.execute(text("DELETE FROM stats_counters"))
+    for scope in _SCOPES:
+        key = _SCOPES[scope]("crawled_items")
+        conn.execute(text(
+            f"INSERT INTO stats_counters (scope, key, value) "
+            f"SELECT '{scope}', {key}, COUNT(*) FROM crawled_items GROUP BY 2"
+        ))
+    logger.info("[Stats] Rebuilt stats counters")
+
+
+def read_counters(db):
+    """
+    Returns:
+        Dict of scope -> {key: count} (zeroed keys left out)
+    """
+    counters = {scope: {} for scope in _SCOPES}
+    for scope, key, value in db.query(StatsCounter.scope, StatsCounter.key, StatsCounter.value):
+        if value:
+            counters.setdefault(scope, {})[key] = value
+    return counters
+
+
+# --- Per-user watchlists ---
+
+def watch_terms(user):
+    """Keywords, monitored domains and VIP names a user watches"""
+    assets = user.assets or {}
+    terms = set()
+    for field in ("monitored_keywords", "monitored_domains", "vip_names"):
+        for term in assets.get(field) or []:
+            if isinstance(term, str) and term.strip():
+                terms.add(term.strip().lower())
+    return sorted(terms)
+
+
+def terms_hash(terms):
+    return hashlib.sha1("\n".join(terms).encode("utf-8")).hexdigest()
+
+
+def watch_text(title, main_text, url):
+    """The text of an item matched against watchlists (pipeline and rebuild alike)"""
+    return " ".join(filter(None, (title, main_text, url)))
+
+
+def rebuild_user_stats(db, user, terms=None, batch_size=500):
+    """
+    Count the stored items matching a user's watchlist once and store the
+    result. Items are scanned with the same keyword engine (whole words, case
+    insensitive) as WatchlistCounter, so the counters agree after a rebuild.
+
+    Returns:
+        The UserStats row
+    """
+    terms = watch_terms(user) if terms is None else terms
+    stats = db.get(UserStats, user.id) or UserStats(user_id=user.id)
+    stats.terms_hash = terms_hash(terms)
+    stats.matches = stats.high_risk = stats.medium_risk = 0
+    stats.last_match_at = None
+    if terms:
+        engine = KeywordEngine(lexicon_dir=None)
+        engine.register("watchlist", terms)
+        rowid = literal_column("crawled_items.rowid")
+        last_rowid = 0
+        while True:
+            rows = db.execute(
+                select(rowid.label("rowid"), CrawledItem.title, CrawledItem.main_text, CrawledItem.url,
+                       CrawledItem.risk_score, CrawledItem.timestamp)
+                .where(rowid > last_rowid)
+                .order_by(rowid)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            for row in rows:
+                if not engine.scan(watch_text(row.title, row.main_text, row.url)):
+                    continue
+                band = risk_band(row.risk_score)
+                stats.matches += 1
+                stats.high_risk += band == "high"
+                stats.medium_risk += band == "medium"
+                if row.timestamp and (stats.last_match_at is None or row.timestamp > stats.last_match_at):
+                    stats.last_match_at = row.timestamp
+            last_rowid = rows[-1].rowid
+    db.merge(stats)
+    db.commit()
+    return stats
+
+
+_rebuilding = set()
+_rebuilding_lock = threading.Lock()
+
+
+def refresh_user_stats(user_id):
+    """
+    Rebuild one user's counters in a session of its own (BackgroundTasks
+    after a watchlist change); a rebuild already running for the user is
+    not started twice
+
+    Returns:
+        The user's match count, or None if skipped or failed
+    """
+    with _rebuilding_lock:
+        if user_id in _rebuilding:
+            return None
+        _rebuilding.add(user_id)
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        return rebuild_user_stats(db, user).matches if user is not None else None
+    except Exception as e:
+        logger.error(f"[Stats] Rebuilding watchlist counters of {user_id} failed: {e}")
+        db.rollback()
+        return None
+    finally:
+        db.close()
+        with _rebuilding_lock:
+            _rebuilding.discard(user_id)
+
+
+def get_user_stats(db, user):
+    """
+    The user's stored counters; never scans (the rebuild runs in the
+    background, see refresh_user_stats)
+
+    Returns:
+        (terms, UserStats row or None, stale): stale when the row is missing
+        or was counted for an earlier watchlist
+    """
+    terms = watch_terms(user)
+    stats = db.get(UserStats, user.id)
+    stale = stats is None or stats.terms_hash != terms_hash(terms)
+    return terms, stats, stale
+
+
+class WatchlistCounter:
+    """
+    Pipeline hook: one scan of each ingested item against every user's
+    watchlist, bumping the matching users' counters.
+    """
+
+    def __init__(self, db, refresh_seconds=WATCHLIST_REFRESH_SECONDS):
+        self.db = db
+        self.refresh_seconds = refresh_seconds
+        # (engine holding every watched term, term -> ids of the users watching it)
+        self._watchlists = (KeywordEngine(lexicon_dir=None), {})
+        self._loaded_at = None
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._loaded_at is not None and now - self._loaded_at < self.refresh_seconds:
+            return
+        self._loaded_at = now
+        try:
+            term_users = {}
+            for user in self.db.query(User).filter(User.is_active.is_(True)):
+                for term in watch_terms(user):
+                    term_users.setdefault(term, []).append(user.id)
+            # One lexicon, compiled once, however many users there are
+            engine = KeywordEngine(lexicon_dir=None)
+            engine.register("watchlists", term_users)
+        except Exception as e:
+            logger.error(f"[Stats] Reloading watchlists failed, keeping the previous ones: {e}")
+            return
+        self._watchlists = (engine, term_users)
+
+    def _matching_users(self, item_text):
+        self._refresh()
+        engine, term_users = self._watchlists
+        return sorted({
+            user_id
+            for term in engine.scan(item_text).get("watchlists", [])
+            for user_id in term_users.get(term, ())
+        })
+
+    def record(self, item_text, risk_score, seen_at):
+        """
+        Count one new item for every user whose watchlist it matches (caller commits)
+
+        Returns:
+            Ids of the matched users
+        """
+        user_ids = self._matching_users(item_text)
+        if not user_ids:
+            return []
+        risk_score = risk_score or 0.0
+        self.db.execute(
+            text("""
+                UPDATE user_stats SET
+                    matches = matches + 1,
+                    high_risk = high_risk + :high,
+                    medium_risk = medium_risk + :medium,
+                    last_match_at = MAX(COALESCE(last_match_at, :seen), :seen)
+                WHERE user_id = :user_id
+            """).bindparams(bindparam("seen", type_=DateTime)),
+            [
+                {
+                    "user_id": user_id,
+                    "high": int(risk_score >= HIGH_RISK),
+                    "medium": int(MEDIUM_RISK <= risk_score < HIGH_RISK),
+                    "seen": seen_at,
+                }
+                for user_id in user_ids
+            ],
+        )
+        return user_ids
+
+    def forget(self, item_text, risk_score):
+        """
+        Take one removed item (retention) out of the counters of every user
+        whose watchlist it matches (caller commits). A user left without
+        matches loses last_match_at; otherwise it is kept, since retention
+        removes the oldest items.
+
+        Returns:
+            Ids of the matched users
+        """
+        user_ids = self._matching_users(item_text)
+        if not user_ids:
+            return []
+        band = risk_band(risk_score)
+        self.db.execute(
+            text("""
+                UPDATE user_stats SET
+                    matches = MAX(matches - 1, 0),
+                    high_risk = MAX(high_risk - :high, 0),
+                    medium_risk = MAX(medium_risk - :medium, 0),
+                    last_match_at = CASE WHEN matches <= 1 THEN NULL ELSE last_match_at END
+                WHERE user_id = :user_id
+            """),
+            [
+                {"user_id": user_id, "high": int(band == "high"), "medium": int(band == "medium")}
+                for user_id in user_ids
+            ],
+        )
+        return user_ids
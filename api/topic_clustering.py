@@ -0,0 +1,260 @@
+"""
+Topic Clustering Job
+Clusters recent document embeddings with FAISS k-means and stores labelled
+clusters with their daily sizes for the /trending and /historical-trends endpoints
+"""
+
+import logging
+import math
+import os
+import re
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import desc
+
+from database_sql import SessionLocal
+from models_sql import CrawledItem, ItemEmbedding, TopicCluster
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+TOPIC_WINDOW_DAYS = int(os.getenv("TOPIC_WINDOW_DAYS", "7"))
+# 0 = pick k from the corpus size
+TOPIC_CLUSTERS = int(os.getenv("TOPIC_CLUSTERS", "0"))
+TOPIC_MAX_DOCS = int(os.getenv("TOPIC_MAX_DOCS", "300000"))
+TOPIC_KEEP_RUNS = int(os.getenv("TOPIC_KEEP_RUNS", "28"))
+KMEANS_ITERATIONS = 20
+# Documents nearest to each centroid used for labelling
+LABEL_SAMPLE = 200
+LABEL_TERMS = 8
+MIN_CLUSTER_SIZE = 5
+
+TOKEN_RE = re.compile(r"[^\W\d_][\w\-]{2,}")
+# Web/marketplace chrome that says nothing about the topic
+EXTRA_STOPWORDS = {
+    "the", "and", "for", "with", "you", "your", "this", "that", "are", "from", "have",
+    "has", "was", "were", "will", "can", "all", "our", "not", "but", "any", "more",
+    "http", "https", "www", "onion", "com", "html", "php", "click", "here", "page",
+    "home", "login", "register", "search", "contact", "about", "menu", "price", "buy",
+}
+
+
+def _stopwords():
+    from crawler.ai.language import STOPWORDS
+    words = set(EXTRA_STOPWORDS)
+    for lang_words in STOPWORDS.values():
+        words.update(lang_words)
+    return words
+
+
+def _choose_k(n):
+    if TOPIC_CLUSTERS:
+        return min(TOPIC_CLUSTERS, n // MIN_CLUSTER_SIZE)
+    # ~sqrt(n/2), capped so labels stay readable
+    return max(2, min(100, int(math.sqrt(n / 2))))
+
+
+def _load_vectors(db, model, since):
+    rows = (
+        db.query(ItemEmbedding.item_id, ItemEmbedding.vector, CrawledItem.timestamp,
+                 CrawledItem.risk_score, CrawledItem.category)
+        .join(CrawledItem, CrawledItem.id == ItemEmbedding.item_id)
+        .filter(ItemEmbedding.model == model, ItemEmbedding.dimension > 0, CrawledItem.timestamp >= since)
+        .order_by(desc(CrawledItem.timestamp))
+        .limit(TOPIC_MAX_DOCS)
+        .all()
+    )
+    if not rows:
+        return rows, None
+    vectors = np.vstack([np.frombuffer(r.vector, dtype=np.float16) for r in rows]).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return rows, vectors
+
+
+def _label_clusters(db, members, stopwords):
+    """
+    Top terms per cluster by class-based TF-IDF: frequent in the cluster,
+    rare across the other clusters.
+    """
+    sample_ids = {item_id for ids in members.values() for item_id in ids}
+    texts = {}
+    query = db.query(CrawledItem.id, CrawledItem.title, CrawledItem.main_text)
+    id_list = list(sample_ids)
+    for start in range(0, len(id_list), 900):  # SQLite variable limit
+        for item_id, title, main_text in query.filter(CrawledItem.id.in_(id_list[start:start + 900])):
+            texts[item_id] = f"{title or ''} {(main_text or '')[:3000]}"
+
+    term_counts = {}
+    doc_freq = Counter()
+    for cluster, ids in members.items():
+        counts = Counter()
+        for item_id in ids:
+            tokens = {t for t in TOKEN_RE.findall(texts.get(item_id, "").lower()) if t not in stopwords}
+            counts.update(tokens)  # document frequency within the cluster
+        term_counts[cluster] = counts
+        doc_freq.update(counts.keys())
+
+    n_clusters = len(members)
+    labels = {}
+    for cluster, counts in term_counts.items():
+        size = max(1, len(members[cluster]))
+        scored = {
+            term: (count / size) * math.log(1 + n_clusters / doc_freq[term])
+            for term, count in counts.items() if count >= 2
+        }
+        labels[cluster] = [t for t, _ in sorted(scored.items(), key=lambda kv: kv[1], reverse=True)[:LABEL_TERMS]]
+    return labels
+
+
+def cluster_topics(window_days=TOPIC_WINDOW_DAYS):
+    """
+    Cluster the embeddings of the last window_days and store the result as a new run
+
+    Returns:
+        Run id, or None if there was nothing to cluster
+    """
+    if faiss is None:
+        logger.error("[Topics] faiss is not installed; topic clustering disabled")
+        return None
+
+    from crawler.ai.embedding_registry import active_embedding
+
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        since = now - timedelta(days=window_days)
+        model = active_embedding()["model"]
+        rows, vectors = _load_vectors(db, model, since)
+        if vectors is None or len(rows) < MIN_CLUSTER_SIZE * 2:
+            logger.info(f"[Topics] Only {len(rows)} embedded documents in the window; skipping")
+            return None
+
+        k = _choose_k(len(rows))
+        kmeans = faiss.Kmeans(vectors.shape[1], k, niter=KMEANS_ITERATIONS, spherical=True, seed=1234)
+        kmeans.train(vectors)
+        similarity, assignment = kmeans.index.search(vectors, 1)
+        similarity, assignment = similarity[:, 0], assignment[:, 0]
+
+        # Per cluster: members, daily sizes and the documents nearest the centroid
+        days = [(since + timedelta(days=i)).date() for i in range(window_days + 1)]
+        clusters = {}
+        for idx, cluster in enumerate(assignment):
+            clusters.setdefault(int(cluster), []).append(idx)
+
+        members = {}
+        for cluster, idxs in clusters.items():
+            nearest = sorted(idxs, key=lambda i: similarity[i], reverse=True)[:LABEL_SAMPLE]
+            members[cluster] = [rows[i].item_id for i in nearest]
+        labels = _label_clusters(db, members, _stopwords())
+
+        run_id = str(uuid.uuid4())
+        for cluster, idxs in clusters.items():
+            if len(idxs) < MIN_CLUSTER_SIZE:
+                continue
+            daily = Counter(rows[i].timestamp.date() for i in idxs)
+            categories = Counter(rows[i].category for i in idxs if rows[i].category)
+            db.add(TopicCluster(
+                run_id=run_id,
+                computed_at=now,
+                window_start=since,
+                window_end=now,
+                cluster_no=cluster,
+                label=", ".join(labels.get(cluster, [])[:3]) or f"Topic {cluster}",
+                terms=labels.get(cluster, []),
+                size=len(idxs),
+                daily_counts={d.isoformat(): daily.get(d, 0) for d in days},
+                avg_risk=float(np.mean([rows[i].risk_score or 0.0 for i in idxs])),
+                top_category=categories.most_common(1)[0][0] if categories else None,
+                sample_item_ids=members[cluster][:10],
+            ))
+
+        # Keep a bounded history of runs
+        old_runs = [
+            r for (r,) in db.query(TopicCluster.run_id)
+            .group_by(TopicCluster.run_id)
+            .order_by(desc(TopicCluster.computed_at))
+            .offset(TOPIC_KEEP_RUNS - 1)
+        ]
+        if old_runs:
+            db.query(TopicCluster).filter(TopicCluster.run_id.in_(old_runs)).delete(synchronize_session=False)
+        db.commit()
+        logger.info(f"[Topics] Clustered {len(rows)} documents into {k} topics (run {run_id})")
+        return run_id
+    except Exception as e:
+        logger.error(f"[Topics] Clustering failed: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _growth(daily_counts, window_start=None, window_end=None):
+    """
+    Last complete day's volume relative to the average of the earlier
+    complete days (smoothed). The first and last days of the window are
+    partial (the window starts and ends mid-day) and are left out, so a run
+    early in the day does not read as a drop.
+    """
+    first = window_start.date().isoformat() if window_start else None
+    last = window_end.date().isoformat() if window_end else None
+    counts = [n for day, n in sorted(daily_counts.items()) if day != first and day != last]
+    if not counts:
+        return 0.0
+    latest, earlier = counts[-1], counts[:-1]
+    baseline = (sum(earlier) / len(earlier)) if earlier else 0.0
+    return (latest + 1) / (baseline + 1)
+
+
+def _serialize(cluster):
+    return {
+        "cluster": cluster.cluster_no,
+        "label": cluster.label,
+        "terms": cluster.terms,
+        "size": cluster.size,
+        "growth": round(_growth(cluster.daily_counts or {}, cluster.window_start, cluster.window_end), 3),
+        "daily_counts": cluster.daily_counts,
+        "avg_risk": round(cluster.avg_risk or 0.0, 3),
+        "top_category": cluster.top_category,
+        "sample_item_ids": cluster.sample_item_ids,
+    }
+
+
+def get_trending_topics(db, limit=10):
+    """Clusters of the latest run, fastest growing first"""
+    latest = db.query(TopicCluster.run_id, TopicCluster.computed_at).order_by(desc(TopicCluster.computed_at)).first()
+    if not latest:
+        return {"computed_at": None, "trends": []}
+    clusters = db.query(TopicCluster).filter(TopicCluster.run_id == latest.run_id).all()
+    trends = sorted((_serialize(c) for c in clusters), key=lambda c: (c["growth"], c["size"]), reverse=True)
+    return {"computed_at": latest.computed_at, "trends": trends[:limit]}
+
+
+def get_historical_topics(db, runs=TOPIC_KEEP_RUNS):
+    """Size of every stored cluster per run, oldest run first"""
+    clusters = (
+        db.query(TopicCluster)
+        .order_by(desc(TopicCluster.computed_at))
+        .limit(runs * 100)
+        .all()
+    )
+    history = {}
+    for c in clusters:
+        run = history.setdefault(c.run_id, {"computed_at": c.computed_at, "topics": []})
+        run["topics"].append({"label": c.label, "size": c.size, "avg_risk": round(c.avg_risk or 0.0, 3)})
+    ordered = sorted(history.values(), key=lambda r: r["computed_at"])[-runs:]
+    return {"trends": ordered}
+
+
+if __name__ == "__main__":
+    import bootstrap
+
+    bootstrap.configure_paths()
+    logging.basicConfig(level=logging.INFO)
+    cluster_topics()
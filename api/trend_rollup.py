@@ -0,0 +1,222 @@
+"""
+Trend Rollups
+Hourly and daily item counts by category, risk band, host, entity type and
+dark-web term (trend_buckets), updated at ingest so trend charts read a few
+hundred pre-aggregated rows instead of scanning crawled_items
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from sqlalchemy import literal_column, select, text
+from sqlalchemy.dialects.sqlite import insert
+
+from models_sql import CrawledItem, TrendBucket
+from stats_rollup import risk_band
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+DIMENSIONS = ("category", "risk", "host", "entity_type", "term")
+# Longest window a query may ask for, per granularity
+MAX_DAYS = {"hour": 14, "day": 365}
+# Entity type holding the dark-web lexicon hits (nlp_spacy)
+TERM_TYPE = "DARKWEB_TERMS"
+MAX_KEY_LENGTH = 200
+
+
+def bucket_start(timestamp, granularity):
+    """Start of the hour or day bucket holding timestamp"""
+    timestamp = timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0) if granularity == "day" else timestamp
+
+
+def _host(url):
+    try:
+        return (urlsplit(url or "").hostname or "").lower() or None
+    except ValueError:
+        return None
+
+
+def item_keys(url, category, risk_score, entities):
+    """
+    Returns:
+        Set of (dimension, key) an item is counted under
+    """
+    keys = {("category", category or "Unknown"), ("risk", risk_band(risk_score))}
+    host = _host(url)
+    if host:
+        keys.add(("host", host[:MAX_KEY_LENGTH]))
+    if isinstance(entities, dict):
+        for entity_type, values in entities.items():
+            if values:
+                keys.add(("entity_type", entity_type))
+        for term in entities.get(TERM_TYPE) or []:
+            if isinstance(term, str) and term.strip():
+                keys.add(("term", " ".join(term.lower().split())[:MAX_KEY_LENGTH]))
+    return keys
+
+
+def _add_counts(conn, counts):
+    """Add {(granularity, dimension, bucket_start, key): n} to the stored buckets"""
+    if not counts:
+        return
+    statement = insert(TrendBucket)
+    statement = statement.on_conflict_do_update(
+        index_elements=[TrendBucket.granularity, TrendBucket.dimension, TrendBucket.bucket_start, TrendBucket.key],
+        set_={"count": TrendBucket.count + statement.excluded.count},
+    )
+    conn.execute(statement, [
+        {"granularity": granularity, "dimension": dimension, "bucket_start": start, "key": key, "count": n}
+        for (granularity, dimension, start, key), n in counts.items()
+    ])
+
+
+def record_item(conn, seen_at, url, category, risk_score, entities):
+    """
+    Count one new item in its hourly and daily buckets (caller commits)
+
+    Returns:
+        Set of (dimension, key) the item was counted under
+    """
+    seen_at = seen_at or datetime.utcnow()
+    keys = item_keys(url, category, risk_score, entities)
+    _add_counts(conn, {
+        (granularity, dimension, bucket_start(seen_at, granularity), key): 1
+        for granularity in GRANULARITIES
+        for dimension, key in keys
+    })
+    return keys
+
+
+def rebuild_trends(conn, batch_size=2000):
+    """
+    Recount every bucket from crawled_items (migration, or after a change of
+    the bucketing rules: python trend_rollup.py --rebuild)
+
+    Returns:
+        Number of items counted
+    """
+    conn.execute(text("DELETE FROM trend_buckets"))
+    done = 0
+    last_rowid = 0
+    rowid = literal_column("crawled_items.rowid")
+    while True:
+        rows = conn.execute(
+            select(rowid.label("rowid"), CrawledItem.timestamp, CrawledItem.url, CrawledItem.category,
+                   CrawledItem.risk_score, CrawledItem.entities)
+            .where(rowid > last_rowid)
+            .order_by(rowid)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        counts = Counter()
+        for row in rows:
+            seen_at = row.timestamp or datetime.utcnow()
+            for dimension, key in item_keys(row.url, row.category, row.risk_score, row.entities):
+                for granularity in GRANULARITIES:
+                    counts[(granularity, dimension, bucket_start(seen_at, granularity), key)] += 1
+        _add_counts(conn, counts)
+        last_rowid = rows[-1].rowid
+        done += len(rows)
+        logger.info(f"[Trends] Counted {done} items")
+    return done
+
+
+def _window(granularity, periods, now=None):
+    step = GRANULARITIES[granularity]
+    end = bucket_start(now or datetime.utcnow(), granularity)
+    return [end - step * i for i in range(periods - 1, -1, -1)]
+
+
+def trend_series(db, dimension, days=90, granularity="day", keys=None, top=10, now=None):
+    """
+    Bucketed counts of the top keys of a dimension over the last days
+
+    Args:
+        dimension: One of DIMENSIONS
+        days: Window length (capped per granularity by MAX_DAYS)
+        granularity: "hour" or "day"
+        keys: Only these keys (default: the top keys by total in the window)
+        top: Number of keys returned when keys is not given
+
+    Returns:
+        {"dimension", "granularity", "buckets": [iso start], "series": [{"key", "total", "counts"}]}
+    """
+    days = max(1, min(days, MAX_DAYS[granularity]))
+    periods = days * 24 if granularity == "hour" else days
+    buckets = _window(granularity, periods, now)
+
+    query = db.query(TrendBucket.key, TrendBucket.bucket_start, TrendBucket.count).filter(
+        TrendBucket.granularity == granularity,
+        TrendBucket.dimension == dimension,
+        TrendBucket.bucket_start >= buckets[0],
+    )
+    if keys:
+        query = query.filter(TrendBucket.key.in_(keys))
+
+    index = {start: i for i, start in enumerate(buckets)}
+    series = {}
+    for key, start, count in query:
+        if start in index:
+            series.setdefault(key, [0] * periods)[index[start]] += count or 0
+    ranked = sorted(series.items(), key=lambda kv: sum(kv[1]), reverse=True)
+    if not keys:
+        ranked = ranked[:top]
+    return {
+        "dimension": dimension,
+        "granularity": granularity,
+        "buckets": [start.isoformat() for start in buckets],
+        "series": [{"key": key, "total": sum(counts), "counts": counts} for key, counts in ranked],
+    }
+
+
+def trend_changes(db, dimension="term", days=7, top=10, min_count=5, now=None):
+    """
+    Percentage change of each key's count in the last complete days against
+    the days before. Today is left out: a partial day compared with full
+    ones would read as a drop early in the (UTC) day.
+
+    Keys seen fewer than min_count times over both windows, or not at all in
+    the earlier one (no baseline), are left out.
+
+    Returns:
+        Dict of key -> percentage change, largest moves first (the input of
+        ReportGenerator.create_trend_analysis)
+    """
+    days = max(1, min(days, MAX_DAYS["day"] // 2))
+    today = bucket_start(now or datetime.utcnow(), "day")
+    buckets = _window("day", days * 2, today - GRANULARITIES["day"])
+    split = buckets[days]
+    current, previous = Counter(), Counter()
+    rows = db.query(TrendBucket.key, TrendBucket.bucket_start, TrendBucket.count).filter(
+        TrendBucket.granularity == "day",
+        TrendBucket.dimension == dimension,
+        TrendBucket.bucket_start >= buckets[0],
+        TrendBucket.bucket_start < today,
+    )
+    for key, start, count in rows:
+        (current if start >= split else previous)[key] += count or 0
+
+    changes = {
+        key: 100.0 * (current[key] - before) / before
+        for key, before in previous.items()
+        if before and current[key] + before >= min_count
+    }
+    ranked = sorted(changes.items(), key=lambda kv: abs(kv[1]), reverse=True)[:top]
+    return dict(ranked)
+
+
+if __name__ == "__main__":
+    import sys
+    from database_sql import engine
+    from migrations import migrate
+
+    logging.basicConfig(level=logging.INFO)
+    migrate(engine)
+    if "--rebuild" in sys.argv:
+        with engine.begin() as conn:
+            print(f"Recounted trend buckets of {rebuild_trends(conn)} items")
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Shared modules (database_sql, models_sql, keyword_engine, ...) live in the
+# api directory next to this project; make them importable from any crawler
+# module, not just the pipeline.
+api_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "api"))
+if api_path not in sys.path:
+    sys.path.append(api_path)
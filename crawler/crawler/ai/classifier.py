@@ -1,5 +1,8 @@
 from transformers import pipeline
 import logging
+import os
+from keyword_engine import get_keyword_engine
+from crawler.ai.language import ENGLISH_LANGUAGES
 
 # Initialize Zero-Shot Classifier (Lazy loading recommended in production, but global for now)
 # Using a smaller model for speed if available, or default 'facebook/bart-large-mnli'
@@ -31,30 +34,136 @@ SAFE_LABELS = [
 
 ALL_LABELS = THREAT_LABELS + SAFE_LABELS
 
-def classify_document(text):
+# Optional multilingual NLI model for pages outside ENGLISH_LANGUAGES (without
+# one they take the lexicon-only path), e.g.
+# "MoritzLaurer/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7". Loaded lazily.
+MULTILINGUAL_CLASSIFIER_MODEL = os.getenv("MULTILINGUAL_CLASSIFIER_MODEL", "")
+_multilingual_classifier = None
+_multilingual_failed = False
+
+# Cheap multilingual fallback: indicative terms per threat label
+# (English, Russian, German, Spanish, French, Portuguese, Chinese)
+LABEL_LEXICONS = {
+    "illicit narcotics trading": [
+        "cocaine", "heroin", "mdma", "fentanyl", "meth", "lsd", "cannabis",
+        "кокаин", "героин", "мефедрон", "закладки", "наркотики", "амфетамин",
+        "kokain", "drogen", "cocaína", "heroína", "drogas", "marihuana",
+        "drogues", "cocaïne", "maconha", "毒品", "可卡因", "海洛因", "冰毒",
+    ],
+    "illegal weapons trafficking": [
+        "firearms", "pistol", "rifle", "glock", "ak-47", "ammunition",
+        "оружие", "пистолет", "автомат", "патроны", "waffen", "pistole", "munition",
+        "armas", "pistola", "fusil", "munición", "armes", "枪支", "手枪", "弹药",
+    ],
+    "stolen credit card fraud": [
+        "cvv", "fullz", "dumps", "carding", "cc shop", "bank logs",
+        "кардинг", "дампы", "кредитки", "kreditkarten", "tarjetas clonadas",
+        "cartes bancaires", "cartões clonados", "信用卡", "盗刷", "料子",
+    ],
+    "cybercrime & hacking exploits": [
+        "exploit", "0day", "botnet", "ransomware", "malware", "stealer", "rat",
+        "эксплойт", "ботнет", "взлом", "малварь", "шифровальщик", "стиллер",
+        "schadsoftware", "hackeo", "logiciel malveillant", "漏洞", "木马", "黑客", "勒索软件",
+    ],
+    "human trafficking & exploitation": [
+        "human trafficking", "торговля людьми", "menschenhandel", "trata de personas",
+        "traite des êtres humains", "tráfico humano", "人口贩卖",
+    ],
+    "counterfeit documents & id": [
+        "fake passport", "counterfeit", "fake id", "driver license", "forged documents",
+        "поддельные документы", "паспорт", "gefälschte ausweise",
+        "pasaporte falso", "documentos falsos", "faux papiers", "假护照", "假证",
+    ],
+}
+
+keyword_engine = get_keyword_engine()
+for _label, _terms in LABEL_LEXICONS.items():
+    keyword_engine.register(f"label:{_label}", _terms)
+
+
+def get_multilingual_classifier():
+    """Lazily load the multilingual zero-shot model; None when not configured"""
+    global _multilingual_classifier, _multilingual_failed
+    if _multilingual_classifier is None and MULTILINGUAL_CLASSIFIER_MODEL and not _multilingual_failed:
+        try:
+            _multilingual_classifier = pipeline("zero-shot-classification", model=MULTILINGUAL_CLASSIFIER_MODEL)
+            logging.info(f"[AI] Multilingual classifier '{MULTILINGUAL_CLASSIFIER_MODEL}' loaded.")
+        except Exception as e:
+            logging.error(f"[AI] Failed to load multilingual classifier: {e}")
+            _multilingual_failed = True
+    return _multilingual_classifier
+
+
+def classify_by_lexicon(keyword_hits):
+    """
+    Lexicon-only classification for languages no loaded model understands.
+
+    Scores are deliberately capped below the high-risk threshold (0.8) since
+    a term count is much weaker evidence than an NLI model.
+    """
+    counts = {
+        label: len(keyword_hits.get(f"label:{label}", []))
+        for label in THREAT_LABELS
+    }
+    best_label = max(THREAT_LABELS, key=lambda l: counts[l])
+    hits = counts[best_label]
+
+    if hits >= 2:
+        return {
+            "label": best_label,
+            "score": min(0.5 + 0.1 * hits, 0.79),
+            "is_threat": True,
+            "raw_scores": counts,
+            "method": "lexicon"
+        }
+    return {
+        "label": "uncertain" if hits else "unknown",
+        "score": 0.3 if hits else 0.0,
+        "is_threat": False,
+        "raw_scores": counts,
+        "method": "lexicon"
+    }
+
+def classify_document(text, language="en", keyword_hits=None):
     """
     Classifies text using Zero-Shot Classification with Contextual Disambiguation.
+
+    English text goes to the English NLI model; other languages go to the
+    multilingual model when MULTILINGUAL_CLASSIFIER_MODEL is set, otherwise to
+    the lexicon-only path (which needs keyword_hits, or scans the text itself).
+
     Returns:
         {
             "label": str,
             "score": float,
             "is_threat": bool,
-            "raw_scores": dict
+            "raw_scores": dict,
+            "method": "english" | "multilingual" | "lexicon"
         }
     """
-    if not classifier or not text.strip():
+    if language in ENGLISH_LANGUAGES:
+        model, method = classifier, "english"
+    else:
+        model, method = get_multilingual_classifier(), "multilingual"
+        if model is None:
+            if keyword_hits is None:
+                keyword_hits = keyword_engine.scan(text)
+            return classify_by_lexicon(keyword_hits)
+
+    if not model or not text.strip():
         return {
             "label": "unknown",
             "score": 0.0,
             "is_threat": False,
-            "raw_scores": {}
+            "raw_scores": {},
+            "method": method
         }
 
     try:
         # Run classification
         # multi_label=True allows independent scoring, but we want to pick the best fit here.
         # multi_label=False (default) forces scores to sum to 1.
-        result = classifier(text, ALL_LABELS, multi_label=True)
+        result = model(text, ALL_LABELS, multi_label=True)
         
         scores = dict(zip(result['labels'], result['scores']))
         
@@ -87,7 +196,8 @@ def classify_document(text):
             "label": final_label,
             "score": final_score,
             "is_threat": is_threat,
-            "raw_scores": scores
+            "raw_scores": scores,
+            "method": method
         }
 
     except Exception as e:
@@ -96,5 +206,6 @@ def classify_document(text):
             "label": "error",
             "score": 0.0,
             "is_threat": False,
-            "raw_scores": {}
+            "raw_scores": {},
+            "method": method
         }
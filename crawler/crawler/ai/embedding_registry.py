@@ -0,0 +1,85 @@
+import json
+import logging
+import os
+
+import numpy as np
+
+from crawler.ai.faiss_shards import SHARD_DIR, ShardedFAISSIndex
+from crawler.ai.language import ENGLISH_LANGUAGES
+
+logger = logging.getLogger(__name__)
+
+# Model used until a re-embedding job activates another one
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "384"))
+
+# Which model + FAISS shard directory is live. Written atomically by the
+# re-embedding job once the new index has caught up; readers re-check it
+# cheaply by mtime.
+ACTIVE_POINTER = os.path.join(SHARD_DIR, "active.json")
+
+_cache = {"mtime": None, "active": None}
+
+
+def active_embedding():
+    """
+    Return the live embedding configuration
+
+    Returns:
+        Dict with "model", "dimension" and "shard_dir"
+    """
+    try:
+        mtime = os.path.getmtime(ACTIVE_POINTER)
+    except OSError:
+        mtime = None
+    if _cache["active"] is None or mtime != _cache["mtime"]:
+        active = {"model": EMBEDDING_MODEL, "dimension": EMBEDDING_DIMENSION, "shard_dir": SHARD_DIR}
+        if mtime is not None:
+            try:
+                with open(ACTIVE_POINTER, "r", encoding="utf-8") as f:
+                    active.update(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.error(f"[Embeddings] Failed to read {ACTIVE_POINTER}: {e}")
+        _cache.update(mtime=mtime, active=active)
+    return _cache["active"]
+
+
+def activate_embedding(model, dimension, shard_dir):
+    """Atomically switch every reader and the pipeline to a new model + index"""
+    os.makedirs(os.path.dirname(ACTIVE_POINTER), exist_ok=True)
+    tmp_path = ACTIVE_POINTER + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"model": model, "dimension": dimension, "shard_dir": shard_dir}, f)
+    os.replace(tmp_path, ACTIVE_POINTER)
+    logger.info(f"[Embeddings] Activated {model} ({dimension}d) with index {shard_dir}")
+
+
+def open_active_index(read_only=False):
+    """Open the sharded FAISS index of the active model"""
+    active = active_embedding()
+    return ShardedFAISSIndex(dimension=active["dimension"], shard_dir=active["shard_dir"], read_only=read_only)
+
+
+def embeds_language(model, language):
+    """
+    Whether a model's vectors are meaningful for text in language: English
+    models only embed English (or undetected) text, multilingual
+    sentence-transformers ("...multilingual...", LaBSE) embed every language
+    """
+    name = (model or "").lower()
+    return (language or "unknown") in ENGLISH_LANGUAGES or "multilingual" in name or "labse" in name
+
+
+def shard_dir_for(model):
+    """Side-by-side index directory for a model"""
+    slug = "".join(ch if ch.isalnum() else "_" for ch in model).strip("_")
+    return os.path.join(SHARD_DIR, "models", slug)
+
+
+def to_blob(embedding):
+    """Compact float16 storage (half the size of float32, ample for cosine search)"""
+    return np.asarray(embedding, dtype=np.float16).tobytes()
+
+
+def from_blob(blob):
+    return np.frombuffer(blob, dtype=np.float16).astype(np.float32)
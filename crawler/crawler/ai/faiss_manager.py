@@ -1,142 +1,555 @@
 import faiss
 import numpy as np
 import logging
+import json
 import os
+import struct
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process writer lock
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+# crawler/faiss_index.bin, independent of the working directory, so the API and
+# every crawler process resolve the same index
+DEFAULT_INDEX_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "faiss_index.bin")
+)
+
+# flat: exact search, fine up to a few hundred thousand vectors
+# hnsw: graph index, sub-millisecond lookups at millions of vectors, no training
+# ivf:  inverted lists, smallest memory per vector, trained once enough data exists
+INDEX_TYPES = ("flat", "hnsw", "ivf")
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat").lower()
+HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+IVF_NLIST = int(os.getenv("FAISS_IVF_NLIST", "1024"))
+IVF_NPROBE = int(os.getenv("FAISS_IVF_NPROBE", "16"))
+
+# Crash safety: every add is appended to <index>.wal; a checkpoint atomically
+# rewrites the index + id map and starts a new generation of the log
+CHECKPOINT_EVERY = int(os.getenv("FAISS_CHECKPOINT_EVERY", "500"))
+CHECKPOINT_SECONDS = float(os.getenv("FAISS_CHECKPOINT_SECONDS", "300"))
+WAL_FSYNC = os.getenv("FAISS_WAL_FSYNC", "false").lower() == "true"
+_WAL_HEADER = struct.Struct("<qH")  # faiss id, document id length
+# Log file header: magic, generation (bumped by every checkpoint, which
+# rewrites the log), so a reader notices the log was replaced under it even
+# when it has already grown past the reader's offset again
+_WAL_FILE_HEADER = struct.Struct("<8sQ")
+_WAL_MAGIC = b"FAISSWAL"
+
+# Compaction of cold indexes into IVF-PQ: FAISS_PQ_M sub-quantizers of 8 bits,
+# i.e. 48 bytes per 384-d vector instead of 1536
+PQ_M = int(os.getenv("FAISS_PQ_M", "48"))
+COMPACT_MIN_VECTORS = int(os.getenv("FAISS_COMPACT_MIN_VECTORS", "10000"))
+
+
+def acquire_writer_lock(path):
+    """
+    Take an exclusive lock on path without waiting
+
+    Returns:
+        The open lock file (close it to release), or None when another
+        process holds the lock
+    """
+    lock_file = open(path, "a+")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
 
 class FAISSIndexManager:
     """
     Manages FAISS index for semantic deduplication.
     Stores and searches document embeddings to detect duplicate content.
+
+    Vectors are L2-normalized and compared by inner product, so scores are
+    cosine similarities in [-1, 1]. Every vector is stored under an int64 id;
+    the id -> document id mapping is persisted next to the index.
+
+    One writer process appends every new vector to a write-ahead log and
+    checkpoints periodically (write to temp file + rename), so a killed crawl
+    loses nothing. The writer holds an exclusive lock on <index>.lock; a
+    second process asking to write gets a read-only manager instead. Read-only
+    managers (the API, other crawlers) memory-map the checkpoint instead of
+    holding a private copy and tail the log via refresh().
     """
-    
-    def __init__(self, dimension=384, index_path="faiss_index.bin"):
+
+    def __init__(self, dimension=384, index_path=DEFAULT_INDEX_PATH, index_type=FAISS_INDEX_TYPE,
+                 read_only=False):
         """
         Args:
             dimension: Dimension of embeddings (384 for all-MiniLM-L6-v2)
             index_path: Path to save/load FAISS index
+            index_type: "flat", "hnsw" or "ivf" (used when creating a new index)
+            read_only: Memory-map the index and never write to disk (also the
+                outcome when another process holds the writer lock)
         """
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown FAISS index type '{index_type}', expected one of {INDEX_TYPES}")
+
         self.dimension = dimension
         self.index_path = index_path
+        self.ids_path = index_path + ".ids.json"
+        self.wal_path = index_path + ".wal"
+        self.lock_path = index_path + ".lock"
+        self._lock_file = None
+        if not read_only:
+            self._lock_file = acquire_writer_lock(self.lock_path)
+            if self._lock_file is None:
+                logger.warning(f"[FAISS] {index_path} is being written by another process; opened read-only")
+                read_only = True
+        self.read_only = read_only
+        self.index_type = index_type
         self.index = None
-        self.id_map = []  # Maps FAISS index position to document URL/ID
-        
+        self.id_map = {}  # Maps FAISS int64 id to document URL/ID
+        self.next_id = 0
+        self._staging = None
+        self._overlay = None      # read-only mode: vectors replayed from the log
+        self._wal = None
+        self._wal_offset = 0
+        self._wal_generation = None   # generation of the log being tailed
+        self._generation = 0          # generation of the loaded checkpoint
+        self._checkpoint_mtime = None
+        self._pending = 0
+        self._last_checkpoint = time.monotonic()
+
         # Initialize or load index
         if os.path.exists(index_path):
             self.load_index()
         else:
             self.create_index()
-    
+        self._replay_wal()
+
+    def _build_index(self, index_type):
+        if index_type == "hnsw":
+            base = faiss.IndexHNSWFlat(self.dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            base.hnsw.efSearch = HNSW_EF_SEARCH
+            return faiss.IndexIDMap2(base)
+        if index_type == "ivf":
+            # Untrained until enough vectors are staged; see _maybe_train_ivf()
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            ivf = faiss.IndexIVFFlat(quantizer, self.dimension, IVF_NLIST, faiss.METRIC_INNER_PRODUCT)
+            ivf.nprobe = IVF_NPROBE
+            return ivf
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(self.dimension))
+
     def create_index(self):
-        """Create a new FAISS index using L2 distance"""
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.id_map = []
-        logger.info(f"[FAISS] Created new index with dimension {self.dimension}")
-    
+        """Create a new, empty inner-product index of the configured type"""
+        self.index = self._build_index(self.index_type)
+        self._staging = None
+        if self.index_type == "ivf":
+            # IVF needs training data; vectors wait in an exact index until then
+            self._staging = self._build_index("flat")
+        self.id_map = {}
+        self.next_id = 0
+        self._generation = 0
+        logger.info(f"[FAISS] Created new {self.index_type} index with dimension {self.dimension}")
+
     def load_index(self):
-        """Load existing FAISS index from disk"""
+        """Load existing FAISS index and its id mapping from disk"""
         try:
-            self.index = faiss.read_index(self.index_path)
-            logger.info(f"[FAISS] Loaded index from {self.index_path}")
+            if not os.path.exists(self.ids_path):
+                # Indexes written before ids were persisted (plain L2, unnormalized)
+                # cannot be mapped back to documents; start over rather than
+                # silently never matching.
+                logger.warning(f"[FAISS] {self.ids_path} missing, legacy index ignored; creating a new one")
+                self.create_index()
+                return
+
+            self._checkpoint_mtime = os.path.getmtime(self.ids_path)
+            with open(self.ids_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+            self.index = self._read_index(self.index_path)
+            self.index_type = meta.get("index_type", self.index_type)
+            self.next_id = meta.get("next_id", 0)
+            self._generation = meta.get("wal_generation", 0)
+            self.id_map = {int(k): v for k, v in meta.get("ids", [])}
+            self._staging = None
+            if self.index_type == "ivf" and not self.index.is_trained:
+                self._staging = self._build_index("flat")
+                staging_path = self.index_path + ".staging"
+                if os.path.exists(staging_path):
+                    self._staging = self._read_index(staging_path)
+            self._tune()
+            logger.info(f"[FAISS] Loaded {self.index_type} index from {self.index_path} ({len(self.id_map)} documents)")
         except Exception as e:
             logger.error(f"[FAISS] Failed to load index: {e}")
             self.create_index()
-    
+
+    def _read_index(self, path):
+        if self.read_only:
+            try:
+                return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            except Exception as e:
+                logger.warning(f"[FAISS] Memory-mapped load not supported ({e}), reading into RAM")
+        return faiss.read_index(path)
+
+    def _tune(self):
+        """Re-apply search-time parameters, which are not serialized"""
+        ivf = faiss.try_extract_index_ivf(self.index) if self.index_type in ("ivf", "ivfpq") else None
+        if ivf is not None:
+            ivf.nprobe = IVF_NPROBE
+        if self.index_type == "hnsw":
+            hnsw = faiss.downcast_index(self.index.index)
+            hnsw.hnsw.efSearch = HNSW_EF_SEARCH
+
+    def _atomic_write(self, write, path):
+        """Write via a temp file and rename so readers never see a partial file"""
+        tmp_path = path + ".tmp"
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
     def save_index(self):
-        """Save FAISS index to disk"""
+        """
+        Checkpoint the index and id mapping to disk, then truncate the log.
+
+        The index is replaced before the id map; on load, log records beyond
+        the vectors actually present in the index are replayed, so a crash at
+        any point between the two renames is recovered exactly.
+        """
+        if self.read_only:
+            logger.warning("[FAISS] save_index() called on a read-only manager; ignored")
+            return
         try:
-            faiss.write_index(self.index, self.index_path)
-            logger.info(f"[FAISS] Saved index to {self.index_path}")
+            self._atomic_write(lambda p: faiss.write_index(self.index, p), self.index_path)
+            staging_path = self.index_path + ".staging"
+            if self._staging is not None:
+                self._atomic_write(lambda p: faiss.write_index(self._staging, p), staging_path)
+            elif os.path.exists(staging_path):
+                os.remove(staging_path)
+
+            generation = self._generation + 1
+
+            def write_ids(path):
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump({
+                        "dimension": self.dimension,
+                        "index_type": self.index_type,
+                        "metric": "inner_product",
+                        "next_id": self.next_id,
+                        "wal_generation": generation,
+                        "ids": list(self.id_map.items()),
+                    }, f)
+            self._atomic_write(write_ids, self.ids_path)
+            self._generation = generation
+
+            # Everything in the log is now part of the checkpoint: start a new
+            # generation of it
+            header = _WAL_FILE_HEADER.pack(_WAL_MAGIC, generation)
+            if self._wal is not None and not self._wal.closed:
+                self._wal.truncate(0)
+                self._wal.write(header)
+                self._wal.flush()
+            elif os.path.exists(self.wal_path):
+                with open(self.wal_path, "wb") as f:
+                    f.write(header)
+
+            self._pending = 0
+            self._last_checkpoint = time.monotonic()
+            logger.info(f"[FAISS] Checkpointed index to {self.index_path} ({self.get_total_documents()} vectors)")
         except Exception as e:
             logger.error(f"[FAISS] Failed to save index: {e}")
-    
+
+    def maybe_checkpoint(self):
+        """Checkpoint after CHECKPOINT_EVERY adds or CHECKPOINT_SECONDS, whichever comes first"""
+        if not self._pending:
+            return
+        if self._pending >= CHECKPOINT_EVERY or time.monotonic() - self._last_checkpoint >= CHECKPOINT_SECONDS:
+            self.save_index()
+
+    # --- Write-ahead log ---
+
+    def _append_wal(self, faiss_id, document_id, vector):
+        if self._wal is None or self._wal.closed:
+            self._wal = open(self.wal_path, "ab")
+            if self._wal.tell() == 0:
+                self._wal.write(_WAL_FILE_HEADER.pack(_WAL_MAGIC, self._generation))
+        doc = str(document_id).encode("utf-8")
+        self._wal.write(_WAL_HEADER.pack(faiss_id, len(doc)) + doc + vector.tobytes())
+        self._wal.flush()
+        if WAL_FSYNC:
+            os.fsync(self._wal.fileno())
+
+    def _read_wal_header(self, f):
+        """
+        Returns:
+            (generation, offset of the first record); generation is None for
+            a missing log or one written before logs had a header
+        """
+        header = f.read(_WAL_FILE_HEADER.size)
+        if len(header) == _WAL_FILE_HEADER.size:
+            magic, generation = _WAL_FILE_HEADER.unpack(header)
+            if magic == _WAL_MAGIC:
+                return generation, _WAL_FILE_HEADER.size
+        return None, 0
+
+    def _wal_file_generation(self):
+        if not os.path.exists(self.wal_path):
+            return None
+        with open(self.wal_path, "rb") as f:
+            return self._read_wal_header(f)[0]
+
+    def _read_wal(self, offset=0):
+        """Yield (faiss_id, document_id, vector, end_offset); stops at a torn tail record"""
+        if not os.path.exists(self.wal_path):
+            return
+        vector_bytes = self.dimension * 4
+        with open(self.wal_path, "rb") as f:
+            self._wal_generation, start = self._read_wal_header(f)
+            f.seek(max(offset, start))
+            while True:
+                header = f.read(_WAL_HEADER.size)
+                if len(header) < _WAL_HEADER.size:
+                    return
+                faiss_id, doc_len = _WAL_HEADER.unpack(header)
+                doc = f.read(doc_len)
+                raw = f.read(vector_bytes)
+                if len(doc) < doc_len or len(raw) < vector_bytes:
+                    return
+                vector = np.frombuffer(raw, dtype='float32').reshape(1, -1)
+                yield faiss_id, doc.decode("utf-8"), vector, f.tell()
+
+    def _replay_wal(self, offset=0):
+        """Re-apply log records that are not yet part of the loaded checkpoint"""
+        present = self.index.ntotal + (self._staging.ntotal if self._staging is not None else 0)
+        replayed = 0
+        for faiss_id, document_id, vector, end in self._read_wal(offset):
+            self._wal_offset = end
+            self.id_map[faiss_id] = document_id
+            self.next_id = max(self.next_id, faiss_id + 1)
+            if faiss_id < present:
+                continue
+            ids = np.array([faiss_id], dtype='int64')
+            if self.read_only:
+                if self._overlay is None:
+                    self._overlay = self._build_index("flat")
+                self._overlay.add_with_ids(vector, ids)
+            else:
+                target = self._staging if self._staging is not None else self.index
+                target.add_with_ids(vector, ids)
+                self._pending += 1
+            replayed += 1
+        if replayed:
+            logger.info(f"[FAISS] Replayed {replayed} embeddings from {self.wal_path}")
+
+    def refresh(self):
+        """
+        Pick up a writer's progress (read-only managers): reload when a new
+        checkpoint was written, then apply any log records appended since.
+
+        The tail offset is only kept while the log is the same generation
+        as when it was last read; a checkpoint rewrites the log, and the
+        new one may already have grown past the old offset.
+        """
+        try:
+            mtime = os.path.getmtime(self.ids_path) if os.path.exists(self.ids_path) else None
+            generation = self._wal_file_generation()
+            log_replaced = generation != self._wal_generation
+            if (mtime != self._checkpoint_mtime or (log_replaced and generation != self._generation)) \
+                    and os.path.exists(self.index_path):
+                self.load_index()
+                self._overlay = None
+                self._wal_offset = 0
+            elif log_replaced:
+                self._wal_offset = 0  # rewritten by a checkpoint we already loaded
+            elif os.path.exists(self.wal_path) and os.path.getsize(self.wal_path) < self._wal_offset:
+                self._wal_offset = 0  # truncated (log without a generation header)
+            self._replay_wal(self._wal_offset)
+        except Exception as e:
+            logger.error(f"[FAISS] Refresh failed: {e}")
+
+    def _prepare(self, embedding):
+        """Return a contiguous, L2-normalized float32 matrix of shape (n, d)"""
+        vectors = np.array(embedding, dtype='float32', copy=True)
+        # FAISS expects 2D array
+        if len(vectors.shape) == 1:
+            vectors = vectors.reshape(1, -1)
+        vectors = np.ascontiguousarray(vectors)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def _maybe_train_ivf(self):
+        """Train the IVF index once enough vectors are staged, then move them over"""
+        if self._staging is None or self._staging.ntotal < IVF_NLIST * 39:
+            return
+        ids = faiss.vector_to_array(self._staging.id_map).astype('int64')
+        vectors = self._staging.index.reconstruct_n(0, self._staging.ntotal)
+        self.index.train(vectors)
+        self.index.add_with_ids(vectors, ids)
+        self._staging = None
+        logger.info(f"[FAISS] Trained IVF index on {len(ids)} vectors")
+
     def add_embedding(self, embedding, document_id):
         """
         Add a new embedding to the index
-        
+
         Args:
             embedding: List or numpy array of floats (dimension must match index)
-            document_id: Unique identifier for this document (URL or MongoDB _id)
+            document_id: Unique identifier for this document (CrawledItem id)
         """
-        if not isinstance(embedding, np.ndarray):
-            embedding = np.array(embedding, dtype='float32')
-        
-        # FAISS expects 2D array
-        if len(embedding.shape) == 1:
-            embedding = embedding.reshape(1, -1)
-        
-        self.index.add(embedding)
-        self.id_map.append(document_id)
+        if self.read_only:
+            raise RuntimeError("FAISS index was opened read-only")
+
+        vectors = self._prepare(embedding)
+        faiss_id = self.next_id
+        self.next_id += 1
+
+        # Log first: once the record is on disk the add survives a crash
+        self._append_wal(faiss_id, document_id, vectors)
+
+        target = self._staging if self._staging is not None else self.index
+        target.add_with_ids(vectors, np.array([faiss_id], dtype='int64'))
+        self.id_map[faiss_id] = document_id
+        self._pending += 1
+        self._maybe_train_ivf()
         logger.debug(f"[FAISS] Added embedding for {document_id}")
-    
+
+        self.maybe_checkpoint()
+        return faiss_id
+
+    def _search(self, vectors, k):
+        """Search the live index (plus IVF staging / log overlay) and merge results"""
+        results = []
+        for index in (self.index, self._staging, self._overlay):
+            if index is None or index.ntotal == 0 or not index.is_trained:
+                continue
+            scores, ids = index.search(vectors, min(k, index.ntotal))
+            results.extend(zip(ids[0], scores[0]))
+        results.sort(key=lambda r: r[1], reverse=True)
+        return results[:k]
+
     def search_similar(self, embedding, k=1, threshold=0.95):
         """
         Search for similar embeddings in the index
-        
+
         Args:
             embedding: Query embedding
             k: Number of nearest neighbors to return
-            threshold: Similarity threshold (0-1), default 0.95 for 95% similarity
-        
+            threshold: Cosine similarity threshold, default 0.95
+
         Returns:
             List of (document_id, similarity_score) tuples for matches above threshold
             Empty list if no duplicates found
         """
-        if self.index.ntotal == 0:
+        if self.get_total_documents() == 0:
             # Index is empty, no duplicates possible
             return []
-        
-        if not isinstance(embedding, np.ndarray):
-            embedding = np.array(embedding, dtype='float32')
-        
-        if len(embedding.shape) == 1:
-            embedding = embedding.reshape(1, -1)
-        
-        # Search for k nearest neighbors
-        distances, indices = self.index.search(embedding, k)
-        
-        # Convert L2 distance to similarity score (1 - normalized distance)
-        # For L2 distance: similarity = 1 / (1 + distance)
-        # Alternatively: cosine similarity conversion
-        similarities = 1.0 / (1.0 + distances[0])
-        
-        # Filter results above threshold
+
+        # Inner product of normalized vectors == cosine similarity
         results = []
-        for idx, similarity in zip(indices[0], similarities):
-            if similarity >= threshold and idx < len(self.id_map):
-                results.append((self.id_map[idx], float(similarity)))
-        
+        for faiss_id, similarity in self._search(self._prepare(embedding), k):
+            if faiss_id == -1 or similarity < threshold:
+                continue
+            document_id = self.id_map.get(int(faiss_id))
+            if document_id is not None:
+                results.append((document_id, float(similarity)))
+
         return results
-    
+
     def is_duplicate(self, embedding, threshold=0.95):
         """
         Check if embedding is a duplicate of existing content
-        
+
         Returns:
             (is_duplicate, matched_id, similarity_score)
         """
         similar = self.search_similar(embedding, k=1, threshold=threshold)
-        
+
         if similar:
             matched_id, similarity = similar[0]
             logger.info(f"[FAISS] Duplicate detected! Similarity {similarity:.3f} with {matched_id}")
             return True, matched_id, similarity
         else:
             return False, None, 0.0
-    
+
+    def _export_vectors(self):
+        """Return (ids, vectors) of every stored vector, for flat/HNSW/IVF-Flat indexes"""
+        all_ids, all_vectors = [], []
+        for index in (self.index, self._staging, self._overlay):
+            if index is None or index.ntotal == 0:
+                continue
+            if isinstance(index, faiss.IndexIDMap2):
+                all_ids.append(faiss.vector_to_array(index.id_map).astype('int64'))
+                all_vectors.append(index.index.reconstruct_n(0, index.ntotal))
+                continue
+            ivf = faiss.extract_index_ivf(index)
+            invlists = ivf.invlists
+            for list_no in range(ivf.nlist):
+                size = invlists.list_size(list_no)
+                if not size:
+                    continue
+                ids = faiss.rev_swig_ptr(invlists.get_ids(list_no), size).copy()
+                codes = faiss.rev_swig_ptr(invlists.get_codes(list_no), size * ivf.code_size).copy()
+                all_ids.append(ids.astype('int64'))
+                all_vectors.append(codes.view('float32').reshape(size, self.dimension))
+        if not all_ids:
+            return np.empty(0, dtype='int64'), np.empty((0, self.dimension), dtype='float32')
+        return np.concatenate(all_ids), np.vstack(all_vectors)
+
+    def compact(self, pq_m=PQ_M, min_vectors=COMPACT_MIN_VECTORS):
+        """
+        Re-encode the index as IVF-PQ to cut its memory footprint ~30x.
+
+        Meant for cold indexes that are searched rarely; PQ scores are
+        approximate. Ids and the id mapping are preserved.
+
+        Returns:
+            True if the index was compacted
+        """
+        if self.read_only or self.index_type == "ivfpq":
+            return False
+        ids, vectors = self._export_vectors()
+        if len(ids) < min_vectors:
+            return False
+
+        while self.dimension % pq_m:
+            pq_m -= 1
+        nlist = max(1, min(IVF_NLIST, len(ids) // 39))
+        quantizer = faiss.IndexFlatIP(self.dimension)
+        index = faiss.IndexIVFPQ(quantizer, self.dimension, nlist, pq_m, 8, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        index.add_with_ids(vectors, ids)
+        index.nprobe = IVF_NPROBE
+
+        self.index = index
+        self._staging = None
+        self._overlay = None
+        self.index_type = "ivfpq"
+        self.save_index()
+        logger.info(f"[FAISS] Compacted {self.index_path} to IVF-PQ ({len(ids)} vectors, m={pq_m})")
+        return True
+
+    def close(self):
+        """Close the log and release the writer lock (checkpoint first with save_index)"""
+        if self._wal is not None and not self._wal.closed:
+            self._wal.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
     def get_total_documents(self):
         """Return total number of documents in index"""
-        return self.index.ntotal
+        staged = self._staging.ntotal if self._staging is not None else 0
+        overlay = self._overlay.ntotal if self._overlay is not None else 0
+        return self.index.ntotal + staged + overlay
 
 
 # Global instance for use in pipeline
 faiss_manager = None
 
-def get_faiss_manager(dimension=384):
+def get_faiss_manager(dimension=384, read_only=False):
     """Get or create global FAISS manager instance"""
     global faiss_manager
     if faiss_manager is None:
-        faiss_manager = FAISSIndexManager(dimension=dimension)
+        faiss_manager = FAISSIndexManager(dimension=dimension, read_only=read_only)
     return faiss_manager
@@ -0,0 +1,275 @@
+import glob
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+from crawler.ai.faiss_manager import DEFAULT_INDEX_PATH, FAISS_INDEX_TYPE, FAISSIndexManager, acquire_writer_lock
+
+logger = logging.getLogger(__name__)
+
+# One FAISS index per time period under crawler/faiss_shards/<period>.bin
+DEFAULT_SHARD_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "faiss_shards")
+)
+SHARD_DIR = os.getenv("FAISS_SHARD_DIR", DEFAULT_SHARD_DIR)
+
+# month -> "2025-01", week -> "2025-W03"
+SHARD_PERIODS = {"month": "%Y-%m", "week": "%G-W%V"}
+SHARD_PERIOD = os.getenv("FAISS_SHARD_PERIOD", "month").lower()
+
+# Ingest dedup only searches the newest N shards (current period included)
+DEDUP_HORIZON = int(os.getenv("FAISS_DEDUP_HORIZON", "2"))
+# Shards older than the newest N are compacted to IVF-PQ
+COMPACT_AFTER = int(os.getenv("FAISS_COMPACT_AFTER", "3"))
+# Shards already checked by compact_old_shards(): shard key -> checkpoint mtime
+COMPACTION_MANIFEST = "compaction.json"
+# Held by the one process writing (and compacting) a shard directory
+WRITER_LOCK = "writer.lock"
+
+
+class ShardedFAISSIndex:
+    """
+    Time-partitioned vector store with the FAISSIndexManager interface.
+
+    New embeddings go to the shard of the current period. Dedup on ingest
+    only searches the last DEDUP_HORIZON shards, so its cost is bounded by
+    the crawl rate rather than by the size of the whole history; analysts
+    search every shard through search_similar(). Past shards are frozen:
+    they are opened read-only (memory-mapped) and compacted to IVF-PQ once
+    they fall out of the COMPACT_AFTER window.
+
+    Writing and compaction belong to the process holding the directory's
+    writer lock for the life of the object; other crawlers asking to write
+    get a read-only view and only dedup against it.
+    """
+
+    def __init__(self, dimension=384, shard_dir=SHARD_DIR, index_type=FAISS_INDEX_TYPE,
+                 period=SHARD_PERIOD, dedup_horizon=DEDUP_HORIZON, read_only=False, backfill=False):
+        """
+        Args:
+            dimension: Dimension of embeddings
+            shard_dir: Directory holding one <period>.bin index per shard
+            index_type: Index type for newly created shards
+            period: "month" or "week"
+            dedup_horizon: Number of newest shards searched by is_duplicate()
+            read_only: Never write (API / analyst processes; also the outcome
+                when another process holds the writer lock)
+            backfill: Allow adds to past shards (index rebuilds, items in time order)
+        """
+        if period not in SHARD_PERIODS:
+            raise ValueError(f"Unknown shard period '{period}', expected one of {tuple(SHARD_PERIODS)}")
+
+        self.dimension = dimension
+        self.shard_dir = shard_dir
+        self.index_type = index_type
+        self.period = period
+        self.dedup_horizon = max(1, dedup_horizon)
+        self.backfill = backfill
+        self.shards = {}  # shard key -> FAISSIndexManager, loaded lazily
+        self._lock_file = None
+
+        if not read_only:
+            os.makedirs(shard_dir, exist_ok=True)
+            self._lock_file = acquire_writer_lock(os.path.join(shard_dir, WRITER_LOCK))
+            if self._lock_file is None:
+                logger.warning(f"[FAISS] {shard_dir} is being written by another process; opened read-only")
+                read_only = True
+        self.read_only = read_only
+        if not read_only and shard_dir == SHARD_DIR:
+            self._adopt_legacy_index()
+
+    def shard_key(self, when=None):
+        """Return the shard key for a timestamp (default: now, UTC)"""
+        when = when or datetime.now(timezone.utc)
+        return when.strftime(SHARD_PERIODS[self.period])
+
+    def shard_keys(self):
+        """All shard keys on disk (plus loaded ones), oldest first"""
+        keys = set(self.shards)
+        # A shard that has not been checkpointed yet only exists as its log
+        for pattern in ("*.bin", "*.bin.wal"):
+            for path in glob.glob(os.path.join(self.shard_dir, pattern)):
+                keys.add(os.path.basename(path).split(".bin")[0])
+        return sorted(keys)
+
+    def _shard_path(self, key):
+        return os.path.join(self.shard_dir, f"{key}.bin")
+
+    def _adopt_legacy_index(self):
+        """Move a pre-sharding faiss_index.bin into the current shard"""
+        if self.shard_keys() or not os.path.exists(DEFAULT_INDEX_PATH + ".ids.json"):
+            return
+        target = self._shard_path(self.shard_key())
+        for suffix in ("", ".ids.json", ".wal", ".staging"):
+            if os.path.exists(DEFAULT_INDEX_PATH + suffix):
+                os.replace(DEFAULT_INDEX_PATH + suffix, target + suffix)
+        logger.info(f"[FAISS] Moved legacy index into shard {os.path.basename(target)}")
+
+    def _get_shard(self, key):
+        shard = self.shards.get(key)
+        if shard is None:
+            # Only the current period is writable; past shards are frozen
+            writable = not self.read_only and (self.backfill or key == self.shard_key())
+            shard = FAISSIndexManager(
+                dimension=self.dimension,
+                index_path=self._shard_path(key),
+                index_type=self.index_type,
+                read_only=not writable,
+            )
+            self.shards[key] = shard
+        return shard
+
+    def _release(self, key):
+        shard = self.shards.pop(key, None)
+        if shard is not None:
+            shard.close()
+
+    def _rollover(self, current):
+        """Checkpoint and release writable shards other than the one being written"""
+        for key, shard in list(self.shards.items()):
+            if key != current and not shard.read_only:
+                shard.save_index()
+                self._release(key)
+
+    def add_embedding(self, embedding, document_id, when=None):
+        """
+        Add an embedding to the shard of its period (default: current)
+
+        Returns:
+            (shard_key, faiss_id)
+        """
+        if self.read_only:
+            raise RuntimeError("Sharded FAISS index was opened read-only")
+        key = self.shard_key(when)
+        current = self.shard_key()
+        if key != current and not self.backfill:
+            raise ValueError(f"Shard {key} is frozen; only {current} accepts new embeddings")
+        shard = self.shards.get(key)
+        if shard is not None and shard.read_only:
+            self._release(key)  # opened for search earlier; reopen writable
+        self._rollover(key)
+        return key, self._get_shard(key).add_embedding(embedding, document_id)
+
+    def search_similar(self, embedding, k=1, threshold=0.95, shards=None):
+        """
+        Search shards and merge the results by similarity
+
+        Args:
+            embedding: Query embedding
+            k: Number of nearest neighbors to return
+            threshold: Cosine similarity threshold
+            shards: Shard keys to search (default: all)
+
+        Returns:
+            List of (document_id, similarity_score) tuples, best first
+        """
+        keys = self.shard_keys() if shards is None else shards
+        results = []
+        for key in keys:
+            path = self._shard_path(key)
+            if key not in self.shards and not (os.path.exists(path) or os.path.exists(path + ".wal")):
+                continue
+            results.extend(self._get_shard(key).search_similar(embedding, k=k, threshold=threshold))
+        results.sort(key=lambda r: r[1], reverse=True)
+        return results[:k]
+
+    def is_duplicate(self, embedding, threshold=0.95):
+        """
+        Check an embedding against the dedup horizon (newest shards only)
+
+        Returns:
+            (is_duplicate, matched_id, similarity_score)
+        """
+        current = self.shard_key()
+        keys = [k for k in self.shard_keys() if k < current] + [current]
+        similar = self.search_similar(embedding, k=1, threshold=threshold,
+                                     shards=keys[-self.dedup_horizon:])
+
+        if similar:
+            matched_id, similarity = similar[0]
+            logger.info(f"[FAISS] Duplicate detected! Similarity {similarity:.3f} with {matched_id}")
+            return True, matched_id, similarity
+        return False, None, 0.0
+
+    def save_index(self):
+        """Checkpoint every writable shard"""
+        for shard in self.shards.values():
+            if not shard.read_only:
+                shard.save_index()
+
+    def refresh(self):
+        """Pick up new checkpoints and log records written by the crawler"""
+        for shard in self.shards.values():
+            if shard.read_only:
+                shard.refresh()
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.shard_dir, COMPACTION_MANIFEST), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, manifest):
+        path = os.path.join(self.shard_dir, COMPACTION_MANIFEST)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(path + ".tmp", path)
+
+    def _checkpoint_mtime(self, key):
+        path = self._shard_path(key) + ".ids.json"
+        return os.path.getmtime(path) if os.path.exists(path) else None
+
+    def compact_old_shards(self, keep_recent=COMPACT_AFTER):
+        """
+        Compact shards older than the newest keep_recent into IVF-PQ (writer
+        only: runs under the directory's writer lock)
+
+        Every shard checked (compacted, or too small to be) is recorded in
+        the compaction manifest with its checkpoint time and skipped on later
+        runs until it is written again (backfill), so a run only opens the
+        shards that fell out of the window since the last one.
+
+        Returns:
+            List of shard keys that were compacted
+        """
+        if self.read_only:
+            return []
+        current = self.shard_key()
+        manifest = self._read_manifest()
+        compacted = []
+        checked = False
+        for key in self.shard_keys()[:-keep_recent or None]:
+            if key == current:
+                continue
+            mtime = self._checkpoint_mtime(key)
+            if mtime is not None and manifest.get(key) == mtime:
+                continue
+            self._release(key)
+            shard = FAISSIndexManager(dimension=self.dimension, index_path=self._shard_path(key))
+            try:
+                if shard.read_only:
+                    continue  # shard held by a writer outside this directory lock
+                if shard.compact():
+                    compacted.append(key)
+            finally:
+                shard.close()
+            manifest[key] = self._checkpoint_mtime(key)
+            checked = True
+        if checked:
+            self._write_manifest(manifest)
+        return compacted
+
+    def close(self):
+        """Release every shard and the writer lock (checkpoint first with save_index)"""
+        for key in list(self.shards):
+            self._release(key)
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def get_total_documents(self):
+        """Return total number of documents across all shards"""
+        return sum(self._get_shard(key).get_total_documents() for key in self.shard_keys())
+
@@ -0,0 +1,198 @@
+import hashlib
+import re
+from collections import namedtuple
+
+Indicator = namedtuple("Indicator", ["type", "value"])
+
+# Public XMPP servers popular on dark web forums; addresses on these domains
+# are reported as JABBER handles rather than email addresses.
+JABBER_DOMAINS = {
+    "jabber.org", "jabber.ru", "jabber.de", "jabber.cz", "jabb.im",
+    "exploit.im", "xmpp.jp", "xmpp.is", "thesecure.biz", "dukgo.com",
+    "creep.im", "jabber.calyxinstitute.org", "404.city", "yourdata.forsale",
+    "jabber.ccc.de", "xmpp.cz", "conversations.im", "jabbim.com",
+}
+
+_BASE58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_BASE58_INDEX = {ch: i for i, ch in enumerate(_BASE58)}
+_BECH32 = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+_BECH32_INDEX = {ch: i for i, ch in enumerate(_BECH32)}
+
+# Base58Check version byte -> coin
+_BASE58_VERSIONS = {0x00: "BTC", 0x05: "BTC", 0x30: "LTC", 0x32: "LTC"}
+_BECH32_HRPS = {"bc": "BTC", "ltc": "LTC"}
+
+# Issuer prefixes used to reject Luhn-valid digit runs that are not cards
+_CARD_PREFIX = re.compile(r"^(?:4|5[1-5]|2[2-7]|3[47]|3(?:0[0-5]|[68])|6(?:011|5|4[4-9]|2)|35)")
+
+# One alternation, one pass. Alternatives are ordered so the more specific
+# shapes (URLs, handles, wallets) win over the generic ones at a position.
+IOC_PATTERN = re.compile(
+    r"(?P<telegram>(?i:(?:https?://)?(?:t|telegram)\.(?:me|dog)/|\b(?:telegram|tg)\s*[:\-]?\s*@)"
+    r"(?P<tg_handle>[A-Za-z][A-Za-z0-9_]{4,31})\b)"
+    r"|(?P<email>(?<![\w.%+\-])(?P<email_prefix>(?i:(?:jabber|xmpp|jid)\s*[:\-]?\s*))?"
+    r"(?P<address>[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}))\b"
+    r"|(?P<onion>(?i:\b(?:[a-z2-7]{56}|[a-z2-7]{16})\.onion)\b)"
+    r"|(?P<eth>\b0x[0-9a-fA-F]{40}\b)"
+    r"|(?P<bech32>\b(?:bc1|ltc1|BC1|LTC1)[02-9ac-hj-np-zAC-HJ-NP-Z]{6,87}\b)"
+    r"|(?P<xmr>\b(?:4[0-9AB][1-9A-HJ-NP-Za-km-z]{93}|8[1-9A-HJ-NP-Za-km-z]{94})\b)"
+    r"|(?P<base58>\b[13LM][1-9A-HJ-NP-Za-km-z]{25,34}\b)"
+    r"|(?P<phone>(?<![\w+])\+\d{1,3}[\s.\-]?(?:\(\d{1,4}\)[\s.\-]?)?\d{2,4}(?:[\s.\-]?\d{2,4}){1,4}(?![\d\-]))"
+    r"|(?P<ipv4>(?<![\d.])(?:\d{1,3}\.){3}\d{1,3}(?!\.?\d))"
+    r"|(?P<card>(?<![\d\-])\d(?:[ \-]?\d){12,18}(?![\d\-]))"
+)
+
+
+def _base58check_version(address):
+    """Return the version byte of a valid Base58Check string, else None"""
+    num = 0
+    for ch in address:
+        num = num * 58 + _BASE58_INDEX[ch]
+    pad = len(address) - len(address.lstrip("1"))
+    raw = b"\x00" * pad + num.to_bytes((num.bit_length() + 7) // 8, "big")
+    if len(raw) != 25:
+        return None
+    payload, checksum = raw[:-4], raw[-4:]
+    if hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4] != checksum:
+        return None
+    return payload[0]
+
+
+def _bech32_hrp(address):
+    """Return the human-readable part of a valid bech32/bech32m string, else None"""
+    if address.lower() != address and address.upper() != address:
+        return None
+    address = address.lower()
+    hrp, _, data = address.rpartition("1")
+    if not hrp or len(data) < 6:
+        return None
+
+    values = [ord(ch) >> 5 for ch in hrp] + [0] + [ord(ch) & 31 for ch in hrp]
+    values += [_BECH32_INDEX[ch] for ch in data]
+    generator = (0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3)
+    chk = 1
+    for value in values:
+        top = chk >> 25
+        chk = (chk & 0x1FFFFFF) << 5 ^ value
+        for i in range(5):
+            if (top >> i) & 1:
+                chk ^= generator[i]
+    # bech32 (segwit v0) or bech32m (taproot)
+    if chk not in (1, 0x2BC830A3):
+        return None
+    return hrp
+
+
+def _luhn_valid(digits):
+    total = 0
+    for i, ch in enumerate(reversed(digits)):
+        d = ord(ch) - 48
+        if i % 2:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return total % 10 == 0
+
+
+def _valid_ipv4(address):
+    octets = address.split(".")
+    return all(o == "0" or (o[0] != "0" and int(o) <= 255) for o in octets)
+
+
+def _classify(match):
+    """Turn one regex match into an Indicator, or None if validation fails"""
+    kind = match.lastgroup
+    value = match.group(kind)
+
+    if kind == "telegram":
+        return Indicator("TELEGRAM", "@" + match.group("tg_handle").lower())
+
+    if kind == "email":
+        address = match.group("address").lower().strip(".")
+        domain = address.rsplit("@", 1)[-1]
+        if match.group("email_prefix") or domain in JABBER_DOMAINS:
+            return Indicator("JABBER", address)
+        return Indicator("EMAIL", address)
+
+    if kind == "onion":
+        return Indicator("ONION", value.lower())
+
+    if kind == "eth":
+        # EIP-55 needs keccak-256 (not in hashlib); the shape check is kept cheap
+        return Indicator("ETH", value.lower())
+
+    if kind == "bech32":
+        hrp = _bech32_hrp(value)
+        if hrp in _BECH32_HRPS:
+            return Indicator(_BECH32_HRPS[hrp], value.lower())
+        return None
+
+    if kind == "xmr":
+        return Indicator("XMR", value)
+
+    if kind == "base58":
+        coin = _BASE58_VERSIONS.get(_base58check_version(value))
+        return Indicator(coin, value) if coin else None
+
+    if kind == "phone":
+        digits = re.sub(r"\D", "", value)
+        if 8 <= len(digits) <= 15:
+            return Indicator("PHONE", "+" + digits)
+        return None
+
+    if kind == "ipv4":
+        return Indicator("IP_ADDRESS", value) if _valid_ipv4(value) else None
+
+    if kind == "card":
+        digits = value.replace(" ", "").replace("-", "")
+        if 13 <= len(digits) <= 19 and _CARD_PREFIX.match(digits) and _luhn_valid(digits):
+            # Never keep the full PAN; the issuer BIN is the useful pivot
+            return Indicator("CARD_BIN", digits[:6])
+        return None
+
+    return None
+
+
+def extract_iocs(text):
+    """
+    Extract indicators of compromise in a single pass over the text.
+
+    Candidates are validated cheaply before being reported: Base58Check and
+    bech32 checksums for BTC/LTC, Luhn plus issuer prefix for cards, octet
+    ranges for IPv4 and an E.164 length check for phone numbers.
+
+    Returns:
+        List of unique Indicator(type, value) tuples in order of appearance
+    """
+    if not text:
+        return []
+
+    seen = set()
+    indicators = []
+    for match in IOC_PATTERN.finditer(text):
+        indicator = _classify(match)
+        if indicator and indicator not in seen:
+            seen.add(indicator)
+            indicators.append(indicator)
+    return indicators
+
+
+# Indicator types folded into the CRYPTO entity list as "<COIN>_<address>"
+CRYPTO_TYPES = ("BTC", "LTC", "ETH", "XMR")
+
+
+def group_iocs(indicators):
+    """
+    Group indicators into the entity dict layout stored on CrawledItem.
+
+    Returns:
+        Dict of entity key -> list of values, e.g. {"EMAIL": [...], "CRYPTO": ["BTC_..."]}
+    """
+    grouped = {}
+    for ind in indicators:
+        if ind.type in CRYPTO_TYPES:
+            grouped.setdefault("CRYPTO", []).append(f"{ind.type}_{ind.value}")
+        else:
+            grouped.setdefault(ind.type, []).append(ind.value)
+    return grouped
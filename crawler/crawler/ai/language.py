@@ -0,0 +1,108 @@
+import logging
+import os
+import re
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Optional fastText language-ID model (lid.176.ftz); much more accurate on
+# short or mixed pages than the built-in heuristic below
+FASTTEXT_LID_MODEL = os.getenv("FASTTEXT_LID_MODEL")
+
+try:
+    import fasttext
+except ImportError:
+    fasttext = None
+
+_lid_model = None
+if fasttext and FASTTEXT_LID_MODEL and os.path.exists(FASTTEXT_LID_MODEL):
+    try:
+        _lid_model = fasttext.load_model(FASTTEXT_LID_MODEL)
+        logger.info(f"[Lang] Loaded fastText language model from {FASTTEXT_LID_MODEL}")
+    except Exception as e:
+        logger.error(f"[Lang] Failed to load fastText model: {e}")
+
+# Languages the English-only models (NLI classifier, spaCy NER, default
+# sentence embedding) are used for; other languages are routed to multilingual
+# models or skip the model
+ENGLISH_LANGUAGES = {"en", "unknown"}
+
+# Only a prefix of the page is needed to identify its language
+SAMPLE_CHARS = 2000
+MIN_WORDS = 5
+
+# Non-Latin scripts identify the language (or family) directly
+SCRIPT_RANGES = [
+    ("ja", re.compile("[\u3040-\u30ff]")),   # Hiragana / Katakana
+    ("ko", re.compile("[\uac00-\ud7af]")),   # Hangul
+    ("zh", re.compile("[\u4e00-\u9fff]")),   # CJK ideographs
+    ("ru", re.compile("[\u0400-\u04ff]")),   # Cyrillic
+    ("ar", re.compile("[\u0600-\u06ff]")),   # Arabic / Persian
+    ("he", re.compile("[\u0590-\u05ff]")),
+    ("el", re.compile("[\u0370-\u03ff]")),
+    ("hi", re.compile("[\u0900-\u097f]")),   # Devanagari
+    ("th", re.compile("[\u0e00-\u0e7f]")),
+]
+UKRAINIAN_LETTERS = re.compile("[\u0456\u0457\u0454\u0491]")   # і ї є ґ
+
+# Most frequent function words for the Latin-script languages seen on onion sites
+STOPWORDS = {
+    "en": {"the", "and", "of", "to", "is", "in", "for", "with", "you", "this", "that", "are", "on", "your"},
+    "de": {"der", "die", "und", "das", "ist", "nicht", "mit", "sie", "ein", "eine", "für", "auf", "wir", "ich"},
+    "es": {"el", "la", "de", "que", "y", "en", "los", "las", "por", "para", "con", "una", "es", "del"},
+    "fr": {"le", "la", "les", "de", "et", "des", "est", "pour", "dans", "une", "que", "vous", "sur", "avec"},
+    "pt": {"o", "a", "de", "que", "e", "do", "da", "em", "para", "com", "não", "uma", "os", "você"},
+    "it": {"il", "di", "che", "e", "la", "per", "un", "non", "sono", "con", "del", "della", "una", "gli"},
+    "nl": {"de", "het", "een", "en", "van", "is", "dat", "niet", "voor", "met", "op", "zijn", "je", "wij"},
+    "pl": {"i", "w", "na", "nie", "z", "się", "jest", "do", "że", "to", "jak", "dla", "po", "oraz"},
+    "tr": {"ve", "bir", "bu", "için", "ile", "da", "de", "çok", "ne", "olarak", "daha", "gibi", "ama", "var"},
+}
+
+WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def detect_language(text):
+    """
+    Identify the language of a document cheaply.
+
+    Uses the fastText LID model when FASTTEXT_LID_MODEL is configured,
+    otherwise a script check followed by stopword voting for Latin text.
+
+    Returns:
+        (language_code, confidence) where language_code is an ISO 639-1 code,
+        or "unknown" when the text is too short or ambiguous
+    """
+    sample = (text or "")[:SAMPLE_CHARS]
+    if not sample.strip():
+        return "unknown", 0.0
+
+    if _lid_model is not None:
+        labels, probs = _lid_model.predict(sample.replace("\n", " "))
+        return labels[0].replace("__label__", ""), float(probs[0])
+
+    # Script detection: a non-Latin script covering a fair share of the letters wins
+    total_chars = sum(1 for ch in sample if ch.isalpha())
+    if not total_chars:
+        return "unknown", 0.0
+    for lang, pattern in SCRIPT_RANGES:
+        count = len(pattern.findall(sample))
+        if count / total_chars > 0.3:
+            if lang == "ru" and UKRAINIAN_LETTERS.search(sample.lower()):
+                return "uk", 0.8
+            return lang, min(1.0, count / total_chars)
+
+    letters = WORD_RE.findall(sample)
+    if len(letters) < MIN_WORDS:
+        return "unknown", 0.0
+
+    words = [w.lower() for w in letters]
+    votes = Counter()
+    for word in words:
+        for lang, stopwords in STOPWORDS.items():
+            if word in stopwords:
+                votes[lang] += 1
+
+    if not votes:
+        return "unknown", 0.0
+    lang, hits = votes.most_common(1)[0]
+    return lang, min(1.0, hits / max(1, len(words)) * 4)
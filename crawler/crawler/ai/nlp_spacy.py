@@ -1,37 +1,125 @@
 import spacy
-import re
+import os
+import logging
+from keyword_engine import get_keyword_engine
+from crawler.ai.ioc_extractor import extract_iocs, group_iocs
+from crawler.ai.language import ENGLISH_LANGUAGES
+
+logger = logging.getLogger(__name__)
 
 # FALLBACK TO SMALLER MODEL IF TRANSFORMER FAILS
 try:
     nlp = spacy.load("en_core_web_trf")
+    NLP_MODEL_NAME = "en_core_web_trf"
 except OSError:
-    print("[!] Transformer model not found. Using 'en_core_web_sm' fallback.")
+    logger.warning("[NLP] Transformer model 'en_core_web_trf' not found. Using 'en_core_web_sm' fallback.")
     nlp = spacy.load("en_core_web_sm")
-
-STOP_PATTERNS = [
-    r"\b(function|var|let|const|document|window)\b",
-    r"\b(cookie|accept|privacy|subscribe|Sign up)\b",
+    NLP_MODEL_NAME = "en_core_web_sm"
+
+# Only doc.ents is consumed, so everything except NER (and the embedding
+# layer it may listen to) is switched off during batch processing.
+NER_DEPENDENCIES = ("ner", "transformer", "tok2vec")
+
+# Very long pages blow up memory in the parser/transformer; NER quality past
+# this point is not worth the cost, so texts are truncated before batching.
+MAX_TEXT_LENGTH = int(os.getenv("NLP_MAX_TEXT_LENGTH", "100000"))
+NLP_BATCH_SIZE = int(os.getenv("NLP_BATCH_SIZE", "32"))
+NLP_N_PROCESS = int(os.getenv("NLP_N_PROCESS", "1"))
+
+# Non-English pages use a multilingual NER model when one is installed
+# (python -m spacy download xx_ent_wiki_sm); otherwise NER is skipped for them
+# and only the language-independent keyword/indicator extraction runs.
+MULTILINGUAL_NLP_MODEL = os.getenv("MULTILINGUAL_NLP_MODEL", "xx_ent_wiki_sm")
+_multilingual_nlp = None
+_multilingual_failed = False
+
+
+def get_multilingual_nlp():
+    """Lazily load the multilingual NER model; None when it is not installed"""
+    global _multilingual_nlp, _multilingual_failed
+    if _multilingual_nlp is None and MULTILINGUAL_NLP_MODEL and not _multilingual_failed:
+        try:
+            _multilingual_nlp = spacy.load(MULTILINGUAL_NLP_MODEL)
+            logger.info(f"[NLP] Multilingual model '{MULTILINGUAL_NLP_MODEL}' loaded.")
+        except OSError:
+            logger.warning(f"[NLP] Multilingual model '{MULTILINGUAL_NLP_MODEL}' not found. Non-English NER disabled.")
+            _multilingual_failed = True
+    return _multilingual_nlp
+
+DARK_TERMS = [
+    "bitcoin", "btc", "wallet", "opsec", "market", "vendor",
+    "exploit", "0day", "botnet", "hack", "malware", "ransomware",
+    "carding", "cvv", "fullz", "counterfeit", "drugs", "fentanyl",
+    "heroin", "cocaine", "mdma", "firearms", "pistol", "rifle",
+    "passport", "ssn", "dox", "doxxing", "phishing", "ddos",
+    "keylogger", "rat", "stealer", "cryptolocker", "escrow",
+    "monero", "xmr", "darknet", "tor", "onion", "pgp"
 ]
 
-def clean_text(text):
-    if not text:
-        return ""
-
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"\[.*?]", " ", text)
-    text = re.sub(r"{.*?}", " ", text)
-
-    for pat in STOP_PATTERNS:
-        text = re.sub(pat, " ", text, flags=re.I)
-
-    return text.strip()
-
-
-def analyze_entities(text):
+keyword_engine = get_keyword_engine()
+keyword_engine.register("dark_terms", DARK_TERMS)
+
+
+def analyze_entities(text, keyword_hits=None, full_text=None, language="en"):
+    hits = [keyword_hits] if keyword_hits is not None else None
+    full_texts = [full_text] if full_text is not None else None
+    return analyze_entities_batch(
+        [text], n_process=1, keyword_hits=hits, full_texts=full_texts, language=language
+    )[0]
+
+
+def analyze_entities_batch(texts, batch_size=None, n_process=None, keyword_hits=None,
+                           full_texts=None, language="en"):
+    """
+    Extract entities for many documents in one nlp.pipe() pass.
+
+    Only the NER component (plus the embedding layer it depends on) runs;
+    tagger, parser, lemmatizer etc. are disabled since only doc.ents is used.
+
+    Args:
+        texts: Iterable of document texts (main content from
+            crawler.html_cleaner.extract_text)
+        batch_size: Documents per spaCy batch (default NLP_BATCH_SIZE)
+        n_process: Worker processes for nlp.pipe (default NLP_N_PROCESS)
+        keyword_hits: Optional per-text KeywordEngine.scan() results, so a
+            caller that already scanned the text doesn't pay for a second pass
+        full_texts: Optional full-page texts for indicator extraction when
+            texts only hold the main content (wallets and contacts often
+            sit in footers)
+        language: Language of the batch; non-English text is routed to the
+            multilingual NER model, or skips NER when none is installed
+
+    Returns:
+        List of entity dicts, in the same order as texts
+    """
+    cleaned = [text or "" for text in texts]
+
+    model = nlp if language in ENGLISH_LANGUAGES else get_multilingual_nlp()
+
+    # Indicator extraction still sees the full text; only NER is capped.
+    if model is not None:
+        docs = model.pipe(
+            (text[:MAX_TEXT_LENGTH] for text in cleaned),
+            batch_size=batch_size or NLP_BATCH_SIZE,
+            n_process=n_process or NLP_N_PROCESS,
+            disable=[name for name in model.pipe_names if name not in NER_DEPENDENCIES],
+        )
+    else:
+        docs = [None] * len(cleaned)
+
+    if full_texts is None:
+        full_texts = cleaned
+
+    if keyword_hits is None:
+        keyword_hits = [keyword_engine.scan(text, lexicons=("dark_terms",)) for text in full_texts]
+
+    return [
+        _collect_entities(doc, text or "", hits)
+        for doc, text, hits in zip(docs, full_texts, keyword_hits)
+    ]
 
-    text = clean_text(text)
 
-    doc = nlp(text)
+def _collect_entities(doc, text, keyword_hits):
 
     result = {
         "PERSON": [],
@@ -43,63 +131,21 @@ def analyze_entities(text):
         "DARKWEB_TERMS": [],
     }
 
-    dark_terms = [
-        "bitcoin", "btc", "wallet", "opsec", "market", "vendor",
-        "exploit", "0day", "botnet", "hack", "malware", "ransomware",
-        "carding", "cvv", "fullz", "counterfeit", "drugs", "fentanyl",
-        "heroin", "cocaine", "mdma", "firearms", "pistol", "rifle",
-        "passport", "ssn", "dox", "doxxing", "phishing", "ddos",
-        "keylogger", "rat", "stealer", "cryptolocker", "escrow",
-        "monero", "xmr", "darknet", "tor", "onion", "pgp"
-    ]
+    # xx_ent_wiki_sm uses PER/LOC/ORG/MISC labels
+    for ent in (doc.ents if doc is not None else ()):
+        label = "PERSON" if ent.label_ == "PER" else ent.label_
+        if label in result:
+            result[label].append(ent.text)
 
-    for ent in doc.ents:
-        if ent.label_ in result:
-            result[ent.label_].append(ent.text)
-
-    for term in dark_terms:
-        if term in text.lower():
-            result["DARKWEB_TERMS"].append(term)
-
-    # --- Regex-based Critical Entity Extraction ---
-
-    # Email Addresses
-    email_matches = re.findall(
-        r'\b[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}\b', text
-    )
-    if email_matches:
-        result["EMAIL"] = list(set(email_matches))
-
-    # IP Addresses (IPv4)
-    ip_matches = re.findall(
-        r'\b(?:\d{1,3}\.){3}\d{1,3}\b', text
-    )
-    ip_matches = [ip for ip in ip_matches if all(0 <= int(o) <= 255 for o in ip.split('.'))]
-    if ip_matches:
-        result["IP_ADDRESS"] = list(set(ip_matches))
-
-    # Phone Numbers (international formats)
-    phone_matches = re.findall(
-        r'(?:\+?\d[\d\s\-\(\)]{7,}\d)', text
-    )
-    if phone_matches:
-        result["PHONE"] = list(set([p.strip() for p in phone_matches]))
+    result["DARKWEB_TERMS"].extend(keyword_hits.get("dark_terms", []))
+
+    # --- Critical Indicator Extraction (single validated pass) ---
+    result.update(group_iocs(extract_iocs(text)))
 
     # PGP Public Key blocks
     if "BEGIN PGP PUBLIC KEY" in text or "BEGIN PGP MESSAGE" in text:
         result["PGP_KEY"] = ["PGP Key Block Detected"]
 
-    # Crypto Wallet Extraction
-    btc_matches = re.findall(r'\b([13][a-km-zA-HJ-NP-Z1-9]{25,34}|bc1[qzprya9x8gf2tvdw0s3jn54khce6mua7l]{39,59})\b', text)
-    xmr_matches = re.findall(r'\b(4[0-9AB][1-9A-HJ-NP-Za-km-z]{93})\b', text)
-
-    if btc_matches or xmr_matches:
-        result["CRYPTO"] = []
-        if btc_matches:
-            result["CRYPTO"].extend([f"BTC_{w}" for w in btc_matches])
-        if xmr_matches:
-            result["CRYPTO"].extend([f"XMR_{w}" for w in xmr_matches])
-
     # Remove duplicates and delete empty keys to keep DB clean
     for key in list(result.keys()):
         result[key] = list(set(result[key]))
@@ -1,11 +1,28 @@
 from sentence_transformers import SentenceTransformer
 import re
+import threading
 
-model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+from crawler.ai.embedding_registry import active_embedding
 
-def get_embedding(text):
+_models = {}
+_models_lock = threading.Lock()
+
+def get_model(model_name=None):
+    """Load (once) and return a SentenceTransformer; defaults to the active model"""
+    model_name = model_name or active_embedding()["model"]
+    with _models_lock:
+        if model_name not in _models:
+            _models[model_name] = SentenceTransformer(model_name)
+        return _models[model_name]
+
+def get_embedding(text, model_name=None):
     if not text:
         return []
     text = re.sub(r"\s+", " ", text).strip()
-    embedding = model.encode(text).tolist()
+    embedding = get_model(model_name).encode(text).tolist()
     return embedding
+
+def get_embeddings(texts, model_name=None, batch_size=32):
+    """Embed many texts in batches; returns a float32 array (one row per text)"""
+    texts = [re.sub(r"\s+", " ", t or "").strip() for t in texts]
+    return get_model(model_name).encode(texts, batch_size=batch_size, convert_to_numpy=True)
@@ -0,0 +1,206 @@
+import logging
+import re
+from collections import namedtuple
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# Elements whose content is never rendered as page text
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "head", "title",
+    "svg", "math", "iframe", "object", "embed", "canvas", "select",
+}
+
+# Elements that break the text flow; a separator is emitted at their edges so
+# "<p>a</p><p>b</p>" becomes "a b" instead of "ab"
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "body", "br", "dd", "div",
+    "dl", "dt", "fieldset", "figcaption", "figure", "footer", "form", "h1",
+    "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol",
+    "p", "pre", "section", "table", "td", "th", "tr", "ul",
+}
+
+# Containers that hold navigation/chrome rather than page content
+BOILERPLATE_TAGS = {"nav", "header", "footer", "aside", "menu"}
+BOILERPLATE_HINTS = re.compile(
+    r"(?<![a-z])(?:nav|navbar|navigation|menu|footer|header|sidebar|breadcrumbs?|categor(?:y|ies)"
+    r"|widget|banner|cookies?|pagination|social|share)(?![a-z])",
+    re.I,
+)
+# Page-level containers often carry layout classes like "has-navbar"; never
+# treat them as chrome
+CONTENT_ROOT_TAGS = {"html", "body", "main", "article"}
+
+# Block scoring (text-density heuristics in the spirit of jusText/readability)
+MIN_BLOCK_WORDS = 10        # shorter blocks are only kept next to good blocks
+MAX_LINK_DENSITY = 0.33     # share of a block's characters inside <a>
+MIN_MAIN_WORDS = 30         # below this the page is treated as all-content
+
+CHUNK_SIZE = 64 * 1024
+
+CleanedDocument = namedtuple("CleanedDocument", ["full_text", "main_text"])
+
+
+def _is_hidden(attrib):
+    """True for elements that the browser would not display"""
+    if "hidden" in attrib or attrib.get("aria-hidden") == "true":
+        return True
+    if attrib.get("type") == "hidden":
+        return True
+    style = attrib.get("style")
+    if style:
+        style = style.replace(" ", "").lower()
+        return "display:none" in style or "visibility:hidden" in style
+    return False
+
+
+class _Block:
+    __slots__ = ("text", "words", "link_chars", "boilerplate")
+
+    def __init__(self, text, link_chars, boilerplate):
+        self.text = text
+        self.words = text.count(" ") + 1
+        self.link_chars = link_chars
+        self.boilerplate = boilerplate
+
+    @property
+    def link_density(self):
+        return self.link_chars / len(self.text)
+
+
+class _VisibleTextTarget:
+    """
+    lxml parser target that keeps only visible text, split into blocks.
+
+    Receives start/end/data events as the document is fed in, so no tree is
+    built and no intermediate copies of the HTML are made. Each block records
+    how much of it is link text and whether it sits inside navigation chrome,
+    which is all the main-content scoring needs.
+    """
+
+    def __init__(self):
+        self.blocks = []
+        self.pieces = []
+        self.link_chars = 0
+        self.skip_depth = 0
+        self.link_depth = 0
+        self.boilerplate_depth = 0
+        self.stack = []
+
+    def _flush(self):
+        text = " ".join("".join(self.pieces).split())
+        if text:
+            self.blocks.append(_Block(text, min(self.link_chars, len(text)), self.boilerplate_depth > 0))
+        self.pieces = []
+        self.link_chars = 0
+
+    def start(self, tag, attrib):
+        if self.skip_depth or tag in SKIP_TAGS or _is_hidden(attrib):
+            self.skip_depth += 1
+            return
+
+        if tag in BLOCK_TAGS:
+            self._flush()
+
+        is_boilerplate = tag in BOILERPLATE_TAGS
+        if not is_boilerplate and tag not in CONTENT_ROOT_TAGS:
+            hints = " ".join(filter(None, (attrib.get("class"), attrib.get("id"), attrib.get("role"))))
+            is_boilerplate = bool(hints) and bool(BOILERPLATE_HINTS.search(hints))
+        is_link = tag == "a"
+        self.stack.append((is_boilerplate, is_link))
+        self.boilerplate_depth += is_boilerplate
+        self.link_depth += is_link
+
+    def end(self, tag):
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return
+
+        if tag in BLOCK_TAGS:
+            self._flush()
+
+        if self.stack:
+            is_boilerplate, is_link = self.stack.pop()
+            self.boilerplate_depth -= is_boilerplate
+            self.link_depth -= is_link
+
+    def data(self, data):
+        if not self.skip_depth:
+            self.pieces.append(data)
+            if self.link_depth:
+                self.link_chars += len(data.strip())
+
+    def close(self):
+        self._flush()
+        return self.blocks
+
+
+def _select_main_blocks(blocks):
+    """
+    Keep content blocks: long, link-poor blocks outside navigation chrome,
+    plus short link-poor blocks directly next to one (headings, prices).
+    """
+    good = [
+        not b.boilerplate and b.words >= MIN_BLOCK_WORDS and b.link_density <= MAX_LINK_DENSITY
+        for b in blocks
+    ]
+    main = []
+    for i, block in enumerate(blocks):
+        if good[i]:
+            main.append(block)
+        elif (
+            not block.boilerplate
+            and block.link_density <= MAX_LINK_DENSITY
+            and any(good[max(0, i - 1):i + 2])
+        ):
+            main.append(block)
+    return main
+
+
+def extract_text(html, chunk_size=CHUNK_SIZE):
+    """
+    Clean raw HTML and separate the page's main content from its boilerplate.
+
+    Args:
+        html: Raw HTML string (plain text is passed through whitespace-normalized)
+        chunk_size: Number of characters fed to the parser at a time
+
+    Returns:
+        CleanedDocument(full_text, main_text). main_text falls back to the full
+        text when too little content survives scoring (e.g. pure listing pages).
+    """
+    if not html:
+        return CleanedDocument("", "")
+    if "<" not in html:
+        text = " ".join(html.split())
+        return CleanedDocument(text, text)
+
+    target = _VisibleTextTarget()
+    parser = etree.HTMLParser(target=target, recover=True, no_network=True)
+    try:
+        for start in range(0, len(html), chunk_size):
+            parser.feed(html[start:start + chunk_size])
+        blocks = parser.close()
+    except Exception as e:
+        # Keep whatever was extracted before the parser gave up
+        logger.warning(f"[Cleaner] HTML parse error, using partial text: {e}")
+        blocks = target.close()
+
+    full_text = " ".join(b.text for b in blocks)
+    main_blocks = _select_main_blocks(blocks)
+    if sum(b.words for b in main_blocks) < MIN_MAIN_WORDS:
+        return CleanedDocument(full_text, full_text)
+    return CleanedDocument(full_text, " ".join(b.text for b in main_blocks))
+
+
+def html_to_text(html, chunk_size=CHUNK_SIZE):
+    """
+    Convert raw HTML into the canonical page text used by every downstream stage.
+
+    Script, style and other non-rendered elements as well as hidden elements are
+    dropped, block elements are separated by a space and whitespace is collapsed.
+
+    Returns:
+        Cleaned full-page text string
+    """
+    return extract_text(html, chunk_size).full_text
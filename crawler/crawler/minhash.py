@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import os
+import re
+
+import numpy as np
+from sqlalchemy import or_
+
+logger = logging.getLogger(__name__)
+
+# MinHash signature of NUM_PERM values split into BANDS bands of ROWS rows.
+# Two pages land in the same bucket of some band with probability
+# 1 - (1 - J^ROWS)^BANDS; with 8x8 that is ~0.97 at Jaccard 0.9 and ~0.01 at 0.5.
+NUM_PERM = 64
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# Candidates are confirmed by the Jaccard estimate from the full signatures
+THRESHOLD = float(os.getenv("MINHASH_THRESHOLD", "0.8"))
+# Very short pages share most shingles by accident; don't fingerprint them
+MIN_WORDS = int(os.getenv("MINHASH_MIN_WORDS", "20"))
+
+WORD_RE = re.compile(r"\w+")
+
+# Fixed seed: signatures stored by one crawl must be comparable in the next
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 2 ** 32, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.randint(0, 2 ** 32, size=NUM_PERM, dtype=np.uint64)
+
+
+def minhash(text, shingle_size=SHINGLE_SIZE):
+    """
+    MinHash signature over word shingles of the text.
+
+    Shingles are hashed with blake2b (stable across processes, unlike hash());
+    the permutations are h * a + b in 64-bit arithmetic, keeping the high 32 bits.
+
+    Returns:
+        uint32 numpy array of NUM_PERM values, or None if the text has fewer
+        than MIN_WORDS words
+    """
+    words = WORD_RE.findall((text or "").lower())
+    if len(words) < MIN_WORDS:
+        return None
+
+    shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    digests = b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest() for s in shingles)
+    hashes = np.frombuffer(digests, dtype=np.uint32).astype(np.uint64)
+    permuted = (hashes[:, None] * _PERM_A + _PERM_B) >> np.uint64(32)
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def jaccard(a, b):
+    """Estimate the Jaccard similarity of two pages from their signatures"""
+    return float(np.mean(a == b))
+
+
+def band_keys(signature):
+    """One signed 64-bit LSH key per band (SQLite INTEGER is signed)"""
+    keys = []
+    for i in range(BANDS):
+        digest = hashlib.blake2b(signature[i * ROWS:(i + 1) * ROWS].tobytes(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+class NearDuplicateIndex:
+    """
+    MinHash-LSH index of page content, persisted in the content_fingerprints
+    table so every crawl run (and every crawler process) shares it.
+
+    A lookup is one indexed query on the band columns; the few candidates it
+    returns are confirmed with the Jaccard estimate from their signatures.
+    """
+
+    def __init__(self, db, threshold=THRESHOLD):
+        """
+        Args:
+            db: SQLAlchemy session
+            threshold: Minimum estimated Jaccard similarity of a near-duplicate
+        """
+        from models_sql import ContentFingerprint
+
+        self.db = db
+        self.model = ContentFingerprint
+        self.threshold = threshold
+
+    def find(self, signature):
+        """
+        Look up a stored near-duplicate
+
+        Returns:
+            (item_id, similarity) of the most similar stored page, or (None, None)
+        """
+        if signature is None:
+            return None, None
+        model = self.model
+        columns = [getattr(model, f"band{i}") for i in range(BANDS)]
+        candidates = (
+            self.db.query(model.item_id, model.signature)
+            .filter(or_(*(col == key for col, key in zip(columns, band_keys(signature)))))
+            .all()
+        )
+        best = (None, None)
+        for item_id, stored in candidates:
+            similarity = jaccard(signature, np.frombuffer(stored, dtype=np.uint32))
+            if similarity >= self.threshold and (best[1] is None or similarity > best[1]):
+                best = (item_id, similarity)
+        return best
+
+    def add(self, signature, item_id):
+        """Stage a signature for item_id in the current session (caller commits)"""
+        if signature is None:
+            return
+        bands = {f"band{i}": key for i, key in enumerate(band_keys(signature))}
+        self.db.add(self.model(item_id=item_id, signature=signature.tobytes(), **bands))
@@ -1,33 +1,42 @@
 
 import logging
-import re
+from collections import Counter
 from itemadapter import ItemAdapter
-from w3lib.html import remove_tags
-import sys
-import os
 from scrapy.exceptions import DropItem
 
-# Ensure API directory matches for imports
-# Scrapy runs from project root usually? 
-# We need to find the api directory relative to this file
-# c:\Users\WAZIR\Desktop\fyp\scrapy\crawler\crawler\pipelines.py
-# api is at c:\Users\WAZIR\Desktop\fyp\scrapy\api
-api_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "api"))
-if api_path not in sys.path:
-    sys.path.append(api_path)
-
-from database_sql import SessionLocal
-from models_sql import CrawledItem
-from crawler.ai.nlp_spacy import analyze_entities, clean_text as nlp_clean_text
+# api directory is put on sys.path by crawler/__init__.py
+from database_sql import SessionLocal, ensure_schema
+from models_sql import CrawledItem, ItemEmbedding
+from item_store import save_content
+from entity_index import index_entities
+from entity_graph import link_entities
+from stats_rollup import WatchlistCounter, watch_text
+from trend_rollup import record_item
+from burst_detector import burst_keys, observe
+from crawler.ai.nlp_spacy import analyze_entities
 from crawler.ai.classifier import classify_document
 from crawler.ai.sentencetransformer import get_embedding
-from crawler.ai.faiss_manager import get_faiss_manager
+from crawler.ai.embedding_registry import active_embedding, embeds_language, open_active_index, to_blob
+from crawler.reembed import embed_missing
+from crawler.ai.language import detect_language
+from crawler.html_cleaner import extract_text
+from crawler.minhash import NearDuplicateIndex, minhash
+from keyword_engine import get_keyword_engine
 
 class SQLitePipeline:
 
     def __init__(self):
         self.db = None
         self.faiss_manager = None
+        self.embedding_model = None
+        self.near_duplicates = None
+        self.watchlists = None
+        self.keywords = get_keyword_engine()
+        self.language_counts = Counter()  # documents per detected language
+        self.route_counts = Counter()     # documents per classification path
+        self.keywords.register("safe_domains", self.SAFE_DOMAINS)
+        self.keywords.register("boilerplate_titles", self.BOILERPLATE_TITLES)
+        self.keywords.register("protective_phrases", self.PROTECTIVE_PHRASES)
 
     @classmethod
     def from_crawler(cls, crawler):
@@ -35,10 +44,14 @@ class SQLitePipeline:
 
     def open_spider(self, spider):
         try:
+            ensure_schema()
             self.db = SessionLocal()
+            self.near_duplicates = NearDuplicateIndex(self.db)
+            self.watchlists = WatchlistCounter(self.db)
             logging.info(f"[SQLite] Connected to darkweb.db")
             
-            self.faiss_manager = get_faiss_manager(dimension=384)
+            self.embedding_model = active_embedding()["model"]
+            self.faiss_manager = open_active_index()
             # logging.info(f"[FAISS] Initialized")
         except Exception as e:
             logging.error(f"[SQLite] Connection failed: {e}")
@@ -50,15 +63,12 @@ class SQLitePipeline:
         
         if self.faiss_manager:
             self.faiss_manager.save_index()
+            self.faiss_manager.compact_old_shards()
+            self.faiss_manager.close()
 
-    def clean_html(self, html):
-        if not html:
-            return ""
-        html = re.sub(r"<script.*?>.*?</script>", "", html, flags=re.DOTALL)
-        html = re.sub(r"<style.*?>.*?</style>", "", html, flags=re.DOTALL)
-        text = remove_tags(html)
-        text = re.sub(r"\s+", " ", text)
-        return text.strip()
+        if self.language_counts:
+            logging.info(f"[Lang] Documents per language: {dict(self.language_counts)}")
+            logging.info(f"[Lang] Documents per model route: {dict(self.route_counts)}")
 
     # Known safe/legitimate dark web services & indexers — never threat intel
     SAFE_DOMAINS = [
@@ -87,6 +97,23 @@ class SQLitePipeline:
         "checksum from an onion address", "md5 sum of the onion domain",
     ]
 
+    def _sync_embedding_model(self):
+        """Follow a model switch made by the re-embedding job without restarting"""
+        active = active_embedding()
+        if active["model"] == self.embedding_model:
+            return
+        logging.info(f"[Embeddings] Switching from {self.embedding_model} to {active['model']}")
+        if self.faiss_manager:
+            self.faiss_manager.save_index()
+            self.faiss_manager.close()
+        self.faiss_manager = open_active_index()
+        self.embedding_model = active["model"]
+        if self.faiss_manager.read_only:
+            return  # another crawler writes the index and catches up
+        # Items stored after the job's last batch but before the switch
+        caught_up = embed_missing(self.db, self.faiss_manager, self.embedding_model)
+        logging.info(f"[Embeddings] Embedded {caught_up} items ingested during the switch")
+
     def process_item(self, item, spider):
         try:
             data = ItemAdapter(item).asdict()
@@ -95,44 +122,73 @@ class SQLitePipeline:
 
             # 1. Exact URL Deduplication (Fast)
             if self.db:
-                existing_item = self.db.query(CrawledItem).filter(CrawledItem.url == url).first()
+                existing_item = self.db.query(CrawledItem.id).filter(CrawledItem.url == url).first()
                 if existing_item:
                     raise DropItem(f"Duplicate URL already exists in database: {url}")
 
             # 2. Pre-filter: Drop known safe indexers immediately (no AI needed)
             from urllib.parse import urlparse
+            # (plain substring checks, as before: "login" also drops "login-page",
+            # "error" also drops "errors"; the terms still come from the engine
+            # so lexicon override files apply)
             host = (urlparse(url).hostname or "").lower()
-            if any(safe in host for safe in self.SAFE_DOMAINS):
+            if any(domain in host for domain in self.keywords.lexicon("safe_domains")):
                 raise DropItem(f"Dropping known safe indexer/search service: {url}")
 
             # 3. Pre-filter: Drop boilerplate/admin page titles
-            if any(bp in title for bp in self.BOILERPLATE_TITLES):
+            if any(phrase in title for phrase in self.keywords.lexicon("boilerplate_titles")):
                 raise DropItem(f"Dropping boilerplate page by title: '{title}'")
 
-            raw_html = data.get("text") or data.get("content") or ""
-            clean_text = self.clean_html(raw_html)
+            # Canonical text: produced once from the raw HTML, shared by every later stage.
+            # Models only see the main content; menus, category lists and footers
+            # stay in the full text for keyword/indicator extraction and storage.
+            raw_html = data.get("raw_html") or data.get("content") or data.get("text") or ""
+            document = extract_text(raw_html)
+            clean_text = document.full_text
+            main_text = document.main_text
+            item["text"] = clean_text  # Feed exports see the cleaned text too
+
+            # Near-duplicate check (MinHash-LSH): re-skinned listings and mirrors
+            # are dropped here, before any model runs
+            fingerprint = minhash(main_text)
+            if self.near_duplicates:
+                matched_id, similarity = self.near_duplicates.find(fingerprint)
+                if matched_id:
+                    raise DropItem(f"Near-duplicate of item {matched_id} (MinHash Jaccard {similarity:.2f})")
 
             # 4. Pre-filter: Drop pages with protective/informational language
-            clean_lower = clean_text.lower()
-            if any(phrase in clean_lower for phrase in self.PROTECTIVE_PHRASES):
+            # (one scan yields hits for every lexicon, reused by the NLP stage)
+            keyword_hits = self.keywords.scan(clean_text)
+            if keyword_hits.get("protective_phrases"):
                 raise DropItem(f"Dropping informational/protective-context page: {url}")
 
+            # Language routing: English models only see text they can handle
+            language, _ = detect_language(main_text)
+            self.language_counts[language] += 1
+
             # NLP
-            nlp_cleaned = nlp_clean_text(clean_text)
-            entities = analyze_entities(nlp_cleaned)
+            entities = analyze_entities(
+                main_text, keyword_hits=keyword_hits, full_text=clean_text, language=language
+            )
 
             # Forensics (Stego - Simple check on raw html for demo)
             stego_hidden = None
             stego_image = None
 
             # Classification
-            classification = classify_document(nlp_cleaned)
+            classification = classify_document(main_text, language=language, keyword_hits=keyword_hits)
+            self.route_counts[classification.get("method", "english")] += 1
 
-            # Embedding
-            embedding = get_embedding(nlp_cleaned)
+            # Embedding: an English model's vectors of other languages are
+            # noise, so those pages skip embedding and semantic dedup
+            self._sync_embedding_model()
+            embedded_language = embeds_language(self.embedding_model, language)
+            embedding = get_embedding(main_text, model_name=self.embedding_model) if embedded_language else []
 
             # Deduplication
             if self.faiss_manager and embedding:
+                if self.faiss_manager.read_only:
+                    self.faiss_manager.refresh()  # pick up the writing crawler's vectors
                 is_dup, matched_id, _ = self.faiss_manager.is_duplicate(embedding, threshold=0.95)
                 if is_dup:
                     raise DropItem(f"Semantic duplicate of item {matched_id} (FAISS Threshold > 0.95)")
@@ -147,8 +203,8 @@ class SQLitePipeline:
             crawled_item = CrawledItem(
                 url=data.get("url"),
                 title=data.get("title"),
-                text=nlp_cleaned,  # No text size limit
-                raw_html=raw_html, # Store raw HTML for frontend rendering
+                main_text=main_text,
+                language=language,
                 risk_score=risk_score,
                 conn_type=data.get("conn_type"),
                 depth=data.get("depth"),
@@ -161,10 +217,32 @@ class SQLitePipeline:
             )
             
             self.db.add(crawled_item)
+            self.db.flush()  # assigns crawled_item.id
+            # Raw HTML (for frontend rendering) and the full text go to cold storage
+            save_content(self.db, crawled_item.id, raw_html, clean_text)
+            entity_ids = index_entities(self.db, crawled_item.id, entities, crawled_item.timestamp)
+            link_entities(self.db, entity_ids, crawled_item.timestamp)
+            trend_keys = record_item(self.db, crawled_item.timestamp, crawled_item.url,
+                                     crawled_item.category, risk_score, entities)
+            observe(self.db, burst_keys(trend_keys, entities), crawled_item.timestamp)
+            self.near_duplicates.add(fingerprint, crawled_item.id)
+            # Per-user /stats counters (global ones are kept by triggers)
+            self.watchlists.record(
+                watch_text(crawled_item.title, main_text, crawled_item.url),
+                risk_score, crawled_item.timestamp,
+            )
+            if embedding:
+                self.db.add(ItemEmbedding(
+                    item_id=crawled_item.id, model=self.embedding_model,
+                    dimension=len(embedding), vector=to_blob(embedding)
+                ))
+            elif not embedded_language:
+                # Marker row so the catch-up does not embed it after all
+                self.db.add(ItemEmbedding(item_id=crawled_item.id, model=self.embedding_model, dimension=0, vector=b""))
             self.db.commit()
             
-            # Add to FAISS
-            if self.faiss_manager and embedding:
+            # Add to FAISS (the crawler holding the index's writer lock only)
+            if self.faiss_manager and embedding and not self.faiss_manager.read_only:
                 self.faiss_manager.add_embedding(embedding, str(crawled_item.id))
             
             logging.info(f"[SQLite] Usage Saved: {data.get('url')} | Risk: {risk_score:.2f}")
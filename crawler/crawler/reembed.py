@@ -0,0 +1,191 @@
+"""
+Background re-embedding job.
+
+Builds a FAISS index for a new embedding model next to the live one while the
+crawler keeps ingesting with the old model, then switches over atomically:
+
+    python -m crawler.reembed --model sentence-transformers/all-mpnet-base-v2
+
+Every committed batch is a checkpoint: items that already have an embedding
+for the target model are never picked up again, so a killed job resumes
+where it stopped. The loop also catches up with items ingested meanwhile;
+the pipeline embeds the few that arrive between the last batch and the switch.
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import and_
+
+from database_sql import SessionLocal, ensure_schema
+from models_sql import CrawledItem, ItemEmbedding
+from crawler.ai.embedding_registry import (
+    active_embedding, activate_embedding, embeds_language, from_blob, shard_dir_for, to_blob,
+)
+from crawler.ai.faiss_shards import ShardedFAISSIndex
+from crawler.ai.sentencetransformer import get_embeddings, get_model
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("REEMBED_BATCH_SIZE", "64"))
+STATE_FILE = "reembed_state.json"
+
+
+def missing_items(db, model, limit):
+    """Oldest items without an embedding for model"""
+    return (
+        db.query(CrawledItem.id, CrawledItem.main_text, CrawledItem.language, CrawledItem.timestamp)
+        .outerjoin(ItemEmbedding, and_(ItemEmbedding.item_id == CrawledItem.id, ItemEmbedding.model == model))
+        .filter(ItemEmbedding.item_id.is_(None))
+        .order_by(CrawledItem.timestamp, CrawledItem.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def embed_missing(db, index, model, batch_size=BATCH_SIZE, progress=None):
+    """
+    Embed every item that lacks a model embedding, store it and add it to index
+
+    Each batch is committed before its vectors go into the index: the
+    committed rows are what marks an item done, so a job killed in between
+    never adds the same item twice on resume (at worst the vectors of that
+    one batch are missing until the index is rebuilt from the stored rows).
+
+    Args:
+        db: Database session
+        index: ShardedFAISSIndex for the model (backfill mode files items by crawl time)
+        model: Embedding model name
+        batch_size: Items per batch (and per commit)
+        progress: Optional callback receiving the running count
+
+    Returns:
+        Number of items embedded
+    """
+    done = 0
+    while True:
+        rows = missing_items(db, model, batch_size)
+        if not rows:
+            return done
+
+        # Pages in languages the model does not cover get a marker row, as at ingest
+        texts = [(row.main_text or "") if embeds_language(model, row.language) else "" for row in rows]
+        vectors = get_embeddings(texts, model_name=model, batch_size=batch_size)
+        embedded = []
+        for row, text, vector in zip(rows, texts, vectors):
+            if text.strip():
+                db.add(ItemEmbedding(item_id=row.id, model=model, dimension=len(vector), vector=to_blob(vector)))
+                embedded.append((row, vector))
+            else:
+                # Marker row so empty and uncovered pages are not picked up again
+                db.add(ItemEmbedding(item_id=row.id, model=model, dimension=0, vector=b""))
+        db.commit()
+        for row, vector in embedded:
+            index.add_embedding(vector, str(row.id), when=row.timestamp if index.backfill else None)
+
+        done += len(rows)
+        if progress:
+            progress(done)
+
+
+def load_stored(db, index, model, batch_size=1000):
+    """Rebuild an index from embeddings already stored for model; returns the count"""
+    count = 0
+    query = (
+        db.query(ItemEmbedding.item_id, ItemEmbedding.vector, CrawledItem.timestamp)
+        .join(CrawledItem, CrawledItem.id == ItemEmbedding.item_id)
+        .filter(ItemEmbedding.model == model, ItemEmbedding.dimension > 0)
+        .order_by(CrawledItem.timestamp, CrawledItem.id)
+    )
+    for item_id, blob, timestamp in query.yield_per(batch_size):
+        index.add_embedding(from_blob(blob), str(item_id), when=timestamp)
+        count += 1
+    return count
+
+
+def _write_state(path, state):
+    state["updated_at"] = datetime.utcnow().isoformat()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def read_state(model=None):
+    """Progress of the last (or given model's) re-embedding job, or None"""
+    model = model or active_embedding()["model"]
+    path = os.path.join(shard_dir_for(model), STATE_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def run(model, batch_size=BATCH_SIZE):
+    """Re-embed the corpus with model, build its index and make it active"""
+    if active_embedding()["model"] == model:
+        logger.info(f"[Reembed] {model} is already the active embedding model")
+        return
+
+    ensure_schema()
+    shard_dir = shard_dir_for(model)
+    dimension = get_model(model).get_sentence_embedding_dimension()
+    state_path = os.path.join(shard_dir, STATE_FILE)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    previous = read_state(model) or {}
+    if "restored" not in previous:
+        # No completed restore yet: drop any partial index and start clean
+        for name in os.listdir(shard_dir):
+            if ".bin" in name:
+                os.remove(os.path.join(shard_dir, name))
+    index = ShardedFAISSIndex(dimension=dimension, shard_dir=shard_dir, backfill=True)
+    if index.read_only:
+        raise RuntimeError(f"Another re-embedding job is already writing {shard_dir}")
+    state = {"model": model, "status": "running", "processed": 0, "started_at": datetime.utcnow().isoformat()}
+    _write_state(state_path, state)
+    started = time.monotonic()
+
+    db = SessionLocal()
+    try:
+        if "restored" in previous:
+            state["restored"] = previous["restored"]  # resuming an interrupted run
+        else:
+            # Embeddings stored by an earlier run (or earlier use of this model)
+            state["restored"] = load_stored(db, index, model)
+            _write_state(state_path, state)
+
+        def progress(done):
+            state["processed"] = done
+            state["items_per_second"] = round(done / max(time.monotonic() - started, 1e-6), 1)
+            _write_state(state_path, state)
+            logger.info(f"[Reembed] {done} items embedded with {model}")
+
+        embed_missing(db, index, model, batch_size, progress=progress)
+        index.save_index()
+        # Hand the writer lock over to the crawler before it switches
+        index.close()
+        activate_embedding(model, dimension, shard_dir)
+        state["status"] = "active"
+    except Exception as e:
+        state.update(status="failed", error=str(e))
+        logger.error(f"[Reembed] Failed: {e}")
+        raise
+    finally:
+        _write_state(state_path, state)
+        index.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Re-embed the corpus and switch the FAISS index")
+    parser.add_argument("--model", required=True, help="sentence-transformers model name")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    run(args.model, args.batch_size)
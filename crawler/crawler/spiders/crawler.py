@@ -2,6 +2,7 @@ import scrapy
 import socket
 from urllib.parse import urljoin
 from scrapy_playwright.page import PageMethod
+from keyword_engine import get_keyword_engine
 
 
 def detect_tor_port():
@@ -55,6 +56,8 @@ class HybridSpider(scrapy.Spider):
     def __init__(self, scope="hybrid", *args, **kwargs):
         super(HybridSpider, self).__init__(*args, **kwargs)
         self.scope = scope
+        self.keywords = get_keyword_engine()
+        self.keywords.register("boilerplate_links", self.BOILERPLATE_LINK_TERMS)
         print(f"[Spider] Initialized with scope: {self.scope}")
 
     def start_requests(self):
@@ -116,6 +119,9 @@ class HybridSpider(scrapy.Spider):
         except Exception:
             return False
 
+    # Link path terms that mark irrelevant boilerplate pages
+    BOILERPLATE_LINK_TERMS = ["about", "contact", "privacy", "terms", "faq", "help", "login", "register"]
+
     # Skip binary/asset URLs — only crawl HTML pages
     SKIP_EXTENSIONS = (
         '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.webp',
@@ -143,19 +149,18 @@ class HybridSpider(scrapy.Spider):
 
         conn_type = "Tor" if response.meta.get("use_tor") else "Direct"
         title = response.xpath("//title/text()").get(default="No Title").strip()
-        # Unlimited character capture
-        text = " ".join(response.xpath("//body//text()").getall()).strip().replace("\n", " ")
-        text = " ".join(text.split())
+        # Visible text is extracted once from raw_html by the pipeline (after its
+        # cheap pre-filters), which also fills "text" for the feed export.
 
         safe_title = title.encode("ascii", "ignore").decode()
         print(f"\n[+] Crawled: {url}")
         print(f"    [{conn_type}] Title: {safe_title}")
-        print(f"    Text length: {len(text)} chars")
+        print(f"    HTML length: {len(response.text)} chars")
 
         yield {
             "url": url,
             "title": title,
-            "text": text,
+            "text": "",
             "conn_type": conn_type,
             "depth": response.meta.get("depth", 0),
             "raw_html": response.text
@@ -176,8 +181,7 @@ class HybridSpider(scrapy.Spider):
         
         for link in abs_links_filtered:
             # Skip irrelevant boilerplate pages
-            lower_link = link.lower()
-            if any(term in lower_link for term in ["about", "contact", "privacy", "terms", "faq", "help", "login", "register"]):
+            if self.keywords.scan(link, lexicons=("boilerplate_links",)):
                 continue
 
             meta = {
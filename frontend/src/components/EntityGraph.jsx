@@ -7,49 +7,75 @@ import { api } from '../api/apiClient';
  * 
  * Goal: Visualize connections between .onion sites and entities.
  * Logic: Uses vis-network directly fetching from /entity-graph.
+ * Starts around initialEntity (or the corpus overview) and expands a node's
+ * neighbourhood on double-click.
  */
-const EntityGraph = () => {
+const EntityGraph = ({ initialEntity }) => {
     const containerRef = useRef(null);
     const networkRef = useRef(null);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState('');
 
     useEffect(() => {
-        const fetchGraph = async () => {
-            try {
-                const res = await api.get('/entity-graph');
-                const { nodes: rawNodes, edges: rawEdges } = res.data;
+        // Map backend nodes to vis-network format
+        const toVisNodes = (rawNodes) => rawNodes.map(n => {
+            let groupStyle = {};
+            if (n.group === 'DOCUMENT') {
+                groupStyle = { color: '#10b981', shape: 'box', font: { color: '#000' } };
+            } else if (n.group === 'PERSON') {
+                groupStyle = { color: '#3b82f6', shape: 'dot', size: 25 };
+            } else if (n.group === 'ORG') {
+                groupStyle = { color: '#f59e0b', shape: 'triangle', size: 25 };
+            } else if (n.group === 'LOC') {
+                groupStyle = { color: '#8b5cf6', shape: 'diamond', size: 25 };
+            } else if (n.group === 'CRYPTO') {
+                groupStyle = { color: '#fcd34d', shape: 'hexagon', size: 30 };
+            }
 
-                // Map backend nodes to vis-network format
-                const nodes = rawNodes.map(n => {
-                    let groupStyle = {};
-                    if (n.group === 'DOCUMENT') {
-                        groupStyle = { color: '#10b981', shape: 'box', font: { color: '#000' } };
-                    } else if (n.group === 'PERSON') {
-                        groupStyle = { color: '#3b82f6', shape: 'dot', size: 25 };
-                    } else if (n.group === 'ORG') {
-                        groupStyle = { color: '#f59e0b', shape: 'triangle', size: 25 };
-                    } else if (n.group === 'LOC') {
-                        groupStyle = { color: '#8b5cf6', shape: 'diamond', size: 25 };
-                    } else if (n.group === 'CRYPTO') {
-                        groupStyle = { color: '#fcd34d', shape: 'hexagon', size: 30 };
-                    }
+            return {
+                id: n.id,
+                label: n.name,
+                title: n.group === 'DOCUMENT' ? n.url : `Type: ${n.group} | Pages: ${n.item_count} | Links: ${n.degree}`,
+                ...groupStyle
+            };
+        });
+
+        // Map backend edges (co-occurrence weight drives the width)
+        const toVisEdges = (rawEdges) => rawEdges.map(e => ({
+            id: `${e.source}|${e.target}`,
+            from: e.source,
+            to: e.target,
+            title: `${e.label} (${e.weight})`,
+            value: e.weight,
+            color: { color: '#475569' }
+        }));
 
-                    return {
-                        id: n.id,
-                        label: n.name,
-                        title: `Type: ${n.group}`,
-                        ...groupStyle
-                    };
+        // Double-click on an entity: merge its 1-hop neighbourhood into the view
+        const expandNode = async (nodeId) => {
+            if (!nodeId || !nodeId.startsWith('ent_') || !networkRef.current) return;
+            try {
+                const res = await api.get('/entity-graph', {
+                    params: { seed: nodeId.slice(4), hops: 1, per_node: 20, documents: 3 }
                 });
+                const { nodes: visNodes, edges: visEdges } = networkRef.current.body.data;
+                visNodes.update(toVisNodes(res.data.nodes));
+                visEdges.update(toVisEdges(res.data.edges));
+            } catch (err) {
+                console.error(err);
+            }
+        };
 
-                // Map backend edges
-                const edges = rawEdges.map(e => ({
-                    from: e.source,
-                    to: e.target,
-                    label: e.label,
-                    color: { color: '#475569' }
-                }));
+        const fetchGraph = async () => {
+            try {
+                let res = initialEntity
+                    ? await api.get('/entity-graph', { params: { value: initialEntity, hops: 2 } })
+                    : null;
+                if (!res || res.data.nodes.length === 0) {
+                    res = await api.get('/entity-graph', { params: { max_nodes: 150 } });
+                }
+                const { nodes: rawNodes, edges: rawEdges } = res.data;
+                const nodes = toVisNodes(rawNodes);
+                const edges = toVisEdges(rawEdges);
 
                 const data = { nodes, edges };
 
@@ -59,7 +85,7 @@ const EntityGraph = () => {
                         borderWidth: 2,
                     },
                     edges: {
-                        width: 1,
+                        scaling: { min: 1, max: 8 },
                         font: { color: '#94a3b8', size: 10, align: 'middle' },
                         smooth: { type: 'continuous' },
                     },
@@ -80,6 +106,7 @@ const EntityGraph = () => {
                         networkRef.current.destroy();
                     }
                     networkRef.current = new Network(containerRef.current, data, options);
+                    networkRef.current.on('doubleClick', (params) => expandNode(params.nodes[0]));
                 }
                 setLoading(false);
             } catch (err) {
@@ -96,7 +123,7 @@ const EntityGraph = () => {
                 networkRef.current.destroy();
             }
         };
-    }, []);
+    }, [initialEntity]);
 
     return (
         <div className="h-full flex flex-col animate-fadeIn">
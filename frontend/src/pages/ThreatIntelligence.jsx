@@ -4,6 +4,7 @@ import MitreHeatmap from '../components/MitreHeatmap';
 import { Database, FileJson, AlertTriangle, Search, Filter, Cpu, Globe, AlertCircle, Maximize2 } from 'lucide-react';
 import { api } from '../api/apiClient';
 import ItemModal from '../components/ItemModal';
+import SafeHTML from '../components/SafeHTML';
 
 const ThreatIntelligence = () => {
     const [activeTab, setActiveTab] = useState('explorer'); // 'dashboard' or 'explorer'
@@ -196,9 +197,9 @@ const ThreatIntelligence = () => {
                                                 </div>
                                             </div>
 
-                                            <p className="text-zinc-400 text-sm mb-4 line-clamp-3 font-mono bg-black/50 p-3 rounded border border-zinc-800/50">
-                                                {item.text || "No text content extracted."}
-                                            </p>
+                                            <div className="text-zinc-400 text-sm mb-4 line-clamp-3 font-mono bg-black/50 p-3 rounded border border-zinc-800/50">
+                                                {item.snippet ? <SafeHTML html={item.snippet} /> : "No text content extracted."}
+                                            </div>
 
                                             <div className="flex justify-between items-center mb-4">
                                                 <button
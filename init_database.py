@@ -8,13 +8,13 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'api'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'api'))
 
 # Import directly as if inside api package to match app behavior
-from database_sql import engine, Base
+from database_sql import engine, Base, ensure_schema
 from models_sql import User, CrawledItem, DailyReport, SeenURL
 from auth import get_password_hash
 
 def init_db():
     print("Creating tables...")
-    Base.metadata.create_all(bind=engine)
+    ensure_schema()
     print("Tables created.")
     
     from sqlalchemy.orm import sessionmaker
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Same import layout as the API and the crawler: api modules at top level,
+# crawler/crawler as the 'crawler' package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+
+import bootstrap  # noqa: E402
+
+bootstrap.configure_paths()
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+
+from burst_detector import ALPHA, HOUR, MAX_GAP_HOURS, _fold, _new_state, _step, zscore
+
+START = datetime(2025, 1, 6, 12)
+
+
+@pytest.fixture()
+def state():
+    return _new_state("term", "fullz")
+
+
+def test_counts_accumulate_within_the_hour(state):
+    assert _step(state, START)
+    assert _step(state, START, n=2)
+    assert state["bucket_start"] == START and state["count"] == 3
+    # Nothing folded into the baseline until the hour closes
+    assert state["mean"] == 0.0 and state["var"] == 0.0
+
+
+def test_next_hour_folds_the_closed_count(state):
+    _step(state, START, n=10)
+    _step(state, START + HOUR)
+    assert state["mean"] == pytest.approx(ALPHA * 10)
+    assert state["count"] == 1
+
+
+def test_late_item_is_rejected(state):
+    _step(state, START + HOUR, n=4)
+    before = dict(state)
+    assert _step(state, START) is False
+    assert state == before
+
+
+def test_gap_folds_empty_hours(state):
+    _step(state, START, n=10)
+    _step(state, START + 5 * HOUR)
+
+    mean, var = _fold(0.0, 0.0, 10)
+    for _ in range(4):  # hours +1..+4 had no items
+        mean, var = _fold(mean, var, 0)
+    assert state["mean"] == pytest.approx(mean)
+    assert state["var"] == pytest.approx(var)
+    assert state["mean"] < ALPHA * 10
+
+
+def test_long_gap_resets_the_baseline(state):
+    _step(state, START, n=10)
+    _step(state, START + (MAX_GAP_HOURS + 1) * HOUR)
+    assert state["mean"] == 0.0 and state["var"] == 0.0
+    assert state["count"] == 1
+
+
+def test_gap_just_under_the_limit_still_decays(state):
+    _step(state, START, n=10)
+    _step(state, START + MAX_GAP_HOURS * HOUR)
+    assert 0.0 < state["mean"] < ALPHA * 10
+
+
+def test_zscore_uses_minimum_deviation():
+    assert zscore(5, 1.0, 0.0) == 4.0
+    assert zscore(5, 1.0, 4.0) == 2.0
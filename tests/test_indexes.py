@@ -0,0 +1,78 @@
+"""
+The hot crawled_items queries must be served by the indexes from migrations.py:
+EXPLAIN QUERY PLAN names the expected index, with no table scan and no
+temporary b-tree for the ORDER BY.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, desc, tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from migrations import migrate
+from models_sql import CrawledItem
+
+
+def hot_queries(db):
+    """(description, query, expected index) for the queries the API runs on every request"""
+    since = datetime.utcnow() - timedelta(days=1)
+    items = db.query(CrawledItem)
+    newest = (desc(CrawledItem.timestamp), desc(CrawledItem.id))
+    # Same row-value filter as pagination.keyset_after()
+    after_cursor = tuple_(CrawledItem.timestamp, CrawledItem.id) < tuple_(since, "id")
+    return [
+        ("/ws history, /entity-graph: newest first",
+         items.order_by(desc(CrawledItem.timestamp)).limit(50),
+         "ix_crawled_items_timestamp_id"),
+        ("/items: first page",
+         items.order_by(*newest).limit(50),
+         "ix_crawled_items_timestamp_id"),
+        ("/items?cursor=: next page",
+         items.filter(after_cursor).order_by(*newest).limit(50),
+         "ix_crawled_items_timestamp_id"),
+        ("/items?category=&cursor=",
+         items.filter(CrawledItem.category == "Drugs", after_cursor).order_by(*newest).limit(50),
+         "ix_crawled_items_category_timestamp_id"),
+        ("/items?risk_score=0.8, /generate-report, daily report: high risk newest first",
+         items.filter(CrawledItem.risk_score >= 0.8).order_by(*newest).limit(50),
+         "ix_crawled_items_high_risk_timestamp_id"),
+        ("chat trending context: risk > 0.7 newest first",
+         items.filter(CrawledItem.risk_score > 0.7).order_by(desc(CrawledItem.timestamp)).limit(10),
+         "ix_crawled_items_timestamp_id"),
+        ("/ws polling: items since the last check",
+         items.filter(CrawledItem.timestamp > since).order_by(CrawledItem.timestamp.asc()),
+         "ix_crawled_items_timestamp_id"),
+    ]
+
+
+def explain(db, query):
+    """EXPLAIN QUERY PLAN of an ORM query, one detail string per step"""
+    statement = query.statement.compile(dialect=db.bind.dialect)
+    params = statement.construct_params()
+    processors = statement._bind_processors
+    args = tuple(
+        processors[name](params[name]) if name in processors else params[name]
+        for name in statement.positiontup
+    )
+    rows = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + str(statement), args).all()
+    return [row[-1] for row in rows]
+
+
+@pytest.fixture(scope="module")
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    migrate(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.mark.parametrize("index", range(7))
+def test_hot_query_uses_index(db, index):
+    description, query, expected = hot_queries(db)[index]
+    plan = explain(db, query)
+
+    assert any(expected in step for step in plan), f"{description}: {plan}"
+    assert not any(step.startswith("SCAN") and "INDEX" not in step for step in plan), f"{description}: {plan}"
+    assert not any("TEMP B-TREE" in step for step in plan), f"{description}: {plan}"
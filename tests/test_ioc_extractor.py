@@ -0,0 +1,59 @@
+import pytest
+
+from crawler.ai.ioc_extractor import Indicator, _luhn_valid, extract_iocs, group_iocs
+
+BASE58_BTC = "1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN2"
+BECH32_BTC = "bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq"
+
+
+def test_base58check_address():
+    assert extract_iocs(f"pay to {BASE58_BTC} now") == [Indicator("BTC", BASE58_BTC)]
+
+
+def test_base58check_bad_checksum_rejected():
+    assert extract_iocs(f"pay to {BASE58_BTC[:-1]}3 now") == []
+
+
+def test_bech32_address():
+    assert extract_iocs(f"send to {BECH32_BTC}") == [Indicator("BTC", BECH32_BTC)]
+
+
+def test_bech32_uppercase_is_normalized():
+    assert extract_iocs(f"send to {BECH32_BTC.upper()}") == [Indicator("BTC", BECH32_BTC)]
+
+
+def test_bech32_bad_checksum_rejected():
+    assert extract_iocs(f"send to {BECH32_BTC[:-1]}p") == []
+
+
+@pytest.mark.parametrize("text", ["card 4111 1111 1111 1111 exp", "card 4111-1111-1111-1111 exp",
+                                  "card 4111111111111111 exp"])
+def test_card_reported_as_bin(text):
+    assert extract_iocs(text) == [Indicator("CARD_BIN", "411111")]
+
+
+def test_card_failing_luhn_rejected():
+    assert extract_iocs("card 4111 1111 1111 1112 exp") == []
+
+
+def test_luhn_valid_digit_run_without_issuer_prefix_rejected():
+    # Luhn-valid, but no card network starts with 1
+    assert _luhn_valid("1234567890128")
+    assert extract_iocs("order 1234567890128 ref") == []
+
+
+@pytest.mark.parametrize("digits, valid", [
+    ("4111111111111111", True),
+    ("5555555555554444", True),
+    ("378282246310005", True),
+    ("4111111111111112", False),
+    ("79927398710", False),
+    ("79927398713", True),
+])
+def test_luhn(digits, valid):
+    assert _luhn_valid(digits) is valid
+
+
+def test_group_iocs():
+    grouped = group_iocs(extract_iocs(f"{BASE58_BTC} 4111111111111111"))
+    assert grouped == {"CRYPTO": [f"BTC_{BASE58_BTC}"], "CARD_BIN": ["411111"]}
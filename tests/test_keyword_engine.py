@@ -0,0 +1,63 @@
+import pytest
+
+import keyword_engine
+from keyword_engine import KeywordEngine
+
+
+@pytest.fixture(params=["automaton", "regex"])
+def engine(request, monkeypatch):
+    # Both matchers must agree: pyahocorasick when installed, the trie regex otherwise
+    if request.param == "automaton" and keyword_engine.ahocorasick is None:
+        pytest.skip("pyahocorasick not installed")
+    if request.param == "regex":
+        monkeypatch.setattr(keyword_engine, "ahocorasick", None)
+    engine = KeywordEngine(lexicon_dir=None)
+    engine.register("dark_terms", ["rat", "dark", "dark web", "0day", "c++"])
+    engine.register("other", ["rat", "web"])
+    return engine
+
+
+@pytest.mark.parametrize("text", ["separate", "pirate bay", "rats", "ratio"])
+def test_no_match_inside_words(engine, text):
+    assert "rat" not in engine.scan(text).get("dark_terms", [])
+
+
+def test_match_is_case_insensitive(engine):
+    assert engine.scan("A RAT for sale") == {"dark_terms": ["rat"], "other": ["rat"]}
+
+
+def test_punctuation_is_a_boundary(engine):
+    assert engine.scan("rat, 0day!")["dark_terms"] == ["rat", "0day"]
+    assert engine.scan("dark-web") == {"dark_terms": ["dark"], "other": ["web"]}
+
+
+def test_overlapping_terms_all_reported(engine):
+    hits = engine.scan("the dark web market")
+    assert sorted(hits["dark_terms"]) == ["dark", "dark web"]
+    assert hits["other"] == ["web"]
+
+
+def test_terms_ending_in_symbols(engine):
+    assert engine.scan("learn c++ now") == {"dark_terms": ["c++"]}
+
+
+def test_unspaced_scripts_match_anywhere(engine):
+    assert engine.scan("暗网rat暗网")["dark_terms"] == ["rat"]
+
+
+def test_lexicon_subset(engine):
+    assert engine.scan("rat on the dark web", lexicons=("other",)) == {"other": ["rat", "web"]}
+
+
+def test_empty_text(engine):
+    assert engine.scan("") == {}
+    assert engine.scan(None) == {}
+
+
+def test_lexicon_file_overrides_defaults(tmp_path):
+    (tmp_path / "dark_terms.txt").write_text("# one term per line\nFullz\n\ncvv\n", encoding="utf-8")
+    engine = KeywordEngine(lexicon_dir=str(tmp_path))
+    engine.register("dark_terms", ["rat"])
+
+    assert engine.lexicon("dark_terms") == ["cvv", "fullz"]
+    assert engine.scan("fresh fullz, no rat") == {"dark_terms": ["fullz"]}
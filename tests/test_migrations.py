@@ -0,0 +1,140 @@
+"""
+Migrations 1-10 on a database created by the original schema, with page text
+and HTML still stored inline in crawled_items
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from fts_index import search_fts
+from item_store import load_content
+from migrations import LATEST_VERSION, MIGRATIONS, current_version, migrate
+from stats_rollup import read_counters
+
+# Tables as created by models_sql before the first migration
+BASELINE_DDL = [
+    """CREATE TABLE users (
+        id VARCHAR NOT NULL PRIMARY KEY, username VARCHAR, email VARCHAR, hashed_password VARCHAR,
+        organization_name VARCHAR, role VARCHAR, is_active BOOLEAN, created_at DATETIME,
+        assets JSON, preferences JSON
+    )""",
+    "CREATE UNIQUE INDEX ix_users_username ON users (username)",
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    """CREATE TABLE crawled_items (
+        id VARCHAR NOT NULL PRIMARY KEY, url VARCHAR, title VARCHAR, text TEXT, raw_html TEXT,
+        risk_score FLOAT, conn_type VARCHAR, depth INTEGER, timestamp DATETIME,
+        stego_hidden_text VARCHAR, stego_image_url VARCHAR, category VARCHAR, entities JSON,
+        sentiment VARCHAR, csam_flag BOOLEAN
+    )""",
+    "CREATE INDEX ix_crawled_items_url ON crawled_items (url)",
+    """CREATE TABLE daily_reports (
+        id VARCHAR NOT NULL PRIMARY KEY, timestamp DATETIME, findings_count INTEGER,
+        summary TEXT, period VARCHAR
+    )""",
+    "CREATE TABLE seen_urls (url_hash VARCHAR NOT NULL PRIMARY KEY, url VARCHAR, timestamp DATETIME)",
+    """CREATE TABLE audit_logs (
+        id VARCHAR NOT NULL PRIMARY KEY, timestamp DATETIME, actor_username VARCHAR,
+        action VARCHAR, details JSON, severity VARCHAR
+    )""",
+]
+
+NOW = datetime.utcnow().replace(microsecond=0)
+ITEMS = [
+    {
+        "id": "item-1", "url": "http://marketabc.onion/listing", "title": "Fresh fullz and cvv",
+        "text": "Vendor sells fullz and cvv dumps, escrow accepted. Contact via jabber.",
+        "raw_html": "<html><body><p>Vendor sells fullz and cvv dumps</p></body></html>",
+        "risk_score": 0.9, "conn_type": "Tor", "category": "Fraud",
+        "entities": {"DARKWEB_TERMS": ["fullz", "cvv", "escrow"],
+                     "CRYPTO": ["BTC_1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN2"], "EMAIL": ["seller@example.com"]},
+        "timestamp": NOW - timedelta(hours=2),
+    },
+    {
+        "id": "item-2", "url": "http://forumxyz.onion/thread/7", "title": "Ransomware affiliate program",
+        "text": "New ransomware affiliate program recruiting pentesters.",
+        "raw_html": "<html><body><h1>Ransomware affiliate program</h1></body></html>",
+        "risk_score": 0.6, "conn_type": "Tor", "category": "Malware",
+        "entities": {"DARKWEB_TERMS": ["ransomware", "escrow"],
+                     "CRYPTO": ["BTC_1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN2"]},
+        "timestamp": NOW - timedelta(hours=1),
+    },
+    {
+        "id": "item-3", "url": "http://wiki.onion/", "title": "Hidden wiki",
+        "text": "Links to onion services.", "raw_html": None,
+        "risk_score": 0.1, "conn_type": "Direct", "category": None,
+        "entities": {}, "timestamp": NOW - timedelta(days=3),
+    },
+]
+
+
+@pytest.fixture()
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        for statement in BASELINE_DDL:
+            conn.execute(text(statement))
+        for item in ITEMS:
+            conn.execute(text(
+                "INSERT INTO crawled_items (id, url, title, text, raw_html, risk_score, conn_type, depth, "
+                "timestamp, category, entities, csam_flag) VALUES (:id, :url, :title, :text, :raw_html, "
+                ":risk_score, :conn_type, 1, :timestamp, :category, :entities, 0)"
+            ), {**item, "entities": json.dumps(item["entities"]),
+                "timestamp": item["timestamp"].strftime("%Y-%m-%d %H:%M:%S.%f")})
+    return engine
+
+
+def test_migrates_baseline_to_latest(engine):
+    assert LATEST_VERSION == len(MIGRATIONS)
+    assert migrate(engine) == LATEST_VERSION
+    with engine.connect() as conn:
+        assert current_version(conn) == LATEST_VERSION
+
+
+def test_inline_content_moved_to_item_content(engine):
+    migrate(engine)
+    with Session(engine) as db:
+        content = load_content(db, "item-1")
+        assert content["raw_html"] == ITEMS[0]["raw_html"]
+        assert content["text"] == ITEMS[0]["text"]
+        row = db.execute(text("SELECT main_text, text, raw_html FROM crawled_items WHERE id = 'item-1'")).one()
+        assert row.main_text == ITEMS[0]["text"]
+        assert row.text is None and row.raw_html is None
+
+
+def test_fts_finds_migrated_items(engine):
+    migrate(engine)
+    with Session(engine) as db:
+        assert [hit[0] for hit in search_fts(db, "ransomware")] == ["item-2"]
+        assert [hit[0] for hit in search_fts(db, "fullz")] == ["item-1"]
+
+
+def test_counters_and_indexes_backfilled(engine):
+    migrate(engine)
+    with Session(engine) as db:
+        counters = read_counters(db)
+        assert counters["total"] == {"": 3}
+        assert counters["risk"] == {"high": 1, "medium": 1, "low": 1}
+        assert counters["category"] == {"Fraud": 1, "Malware": 1, "Unknown": 1}
+
+        # Both items mention the same wallet: one entity, one mention per item
+        mentions = db.execute(text(
+            "SELECT COUNT(DISTINCT m.item_id) FROM entity_mentions m JOIN entities e ON e.id = m.entity_id "
+            "WHERE e.entity_type = 'CRYPTO'"
+        )).scalar()
+        assert mentions == 2
+        # Wallet and email on item-1: one co-occurrence edge
+        assert db.execute(text("SELECT COUNT(*) FROM entity_edges")).scalar() == 1
+        assert db.execute(text("SELECT COUNT(*) FROM trend_buckets")).scalar() > 0
+
+
+def test_migrate_is_idempotent(engine):
+    migrate(engine)
+    assert migrate(engine) == LATEST_VERSION
+    with Session(engine) as db:
+        assert read_counters(db)["total"] == {"": 3}
+        assert db.execute(text("SELECT COUNT(*) FROM item_content")).scalar() == 3
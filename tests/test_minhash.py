@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from crawler.minhash import MIN_WORDS, NUM_PERM, NearDuplicateIndex, band_keys, jaccard, minhash
+from migrations import migrate
+
+LISTING = (
+    "Premium fullz with SSN DOB and bank login for sale, fresh every week. "
+    "Escrow accepted, bulk discounts for returning buyers, replacements within "
+    "24 hours if the data is dead. Contact the vendor over jabber for the price list "
+    "and sample records before you buy."
+)
+# Same listing re-skinned: one word changed
+MIRROR = LISTING.replace("week", "day")
+OTHER = (
+    "Ransomware affiliate program now recruiting experienced penetration testers. "
+    "We provide the locker, the leak site and negotiation support; affiliates keep "
+    "eighty percent of every ransom paid. Apply through the forum with references."
+)
+
+
+def test_signature_is_deterministic():
+    signature = minhash(LISTING)
+    assert signature.shape == (NUM_PERM,)
+    assert (signature == minhash(LISTING.upper())).all()
+    assert jaccard(signature, minhash(LISTING)) == 1.0
+
+
+def test_short_text_not_fingerprinted():
+    assert minhash(" ".join(["word"] * (MIN_WORDS - 1))) is None
+    assert minhash("") is None
+    assert minhash(None) is None
+
+
+def test_similarity_estimate():
+    assert jaccard(minhash(LISTING), minhash(MIRROR)) > 0.7
+    assert jaccard(minhash(LISTING), minhash(OTHER)) < 0.2
+
+
+def test_band_keys_shared_by_near_duplicates():
+    keys = band_keys(minhash(LISTING))
+    assert len(keys) == len(set(keys))
+    assert set(keys) & set(band_keys(minhash(MIRROR)))
+
+
+@pytest.fixture()
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    migrate(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def test_near_duplicate_index(db):
+    index = NearDuplicateIndex(db, threshold=0.7)
+    assert index.find(minhash(LISTING)) == (None, None)
+
+    index.add(minhash(LISTING), "item-1")
+    db.commit()
+
+    item_id, similarity = index.find(minhash(MIRROR))
+    assert item_id == "item-1" and similarity > 0.7
+    assert index.find(minhash(OTHER)) == (None, None)
+    assert index.find(None) == (None, None)